@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:03
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+# Copies of `unique_slug`, `fix_duplicate_slugs` and `delete_duplicate_rows`
+# from core/duplicates.py as they were when this migration was written.
+# Migrations keep their own copy of any code they need, so they still do the
+# same thing if the original changes later
+def unique_slug(queryset, value, max_length=255):
+    base = slugify(value, allow_unicode=True)[:max_length] or 'untitled'
+    slug = base
+    number = 2
+    while queryset.filter(slug=slug).exists():
+        suffix = '-%d' % number
+        slug = base[:max_length - len(suffix)] + suffix
+        number += 1
+    return slug
+
+
+def fix_duplicate_slugs(model, max_length=255):
+    changed = 0
+    seen = set()
+    for pk, title, slug in model.objects.order_by('pk').values_list(
+            'pk', 'title', 'slug'):
+        if slug and slug not in seen:
+            seen.add(slug)
+            continue
+        slug = unique_slug(
+            model.objects.exclude(pk=pk), slug or title, max_length)
+        model.objects.filter(pk=pk).update(slug=slug)
+        seen.add(slug)
+        changed += 1
+    return changed
+
+
+def delete_duplicate_rows(model, fields):
+    seen = set()
+    duplicates = []
+    for row in model.objects.order_by('pk').values_list('pk', *fields):
+        if row[1:] in seen:
+            duplicates.append(row[0])
+        seen.add(row[1:])
+    model.objects.filter(pk__in=duplicates).delete()
+    return len(duplicates)
+
+
+def fix_slugs(apps, schema_editor):
+    # Slugs are about to become unique. Blank and repeated slugs get a new
+    # one (see core/duplicates.py)
+    fix_duplicate_slugs(apps.get_model('album', 'Album'))
+
+
+def delete_duplicate_relationships(apps, schema_editor):
+    # Each page can only be linked to an artist, album etc once from now on,
+    # so repeats are removed first (see core/duplicates.py)
+    delete_duplicate_rows(
+        apps.get_model('album', 'AlbumArtistRelationship'),
+        ['page', 'artist_name'])
+    delete_duplicate_rows(
+        apps.get_model('album', 'GenreClassAlbumRelationship'),
+        ['page', 'genres'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('album', '0015_auto_20161023_1700'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_slugs, migrations.RunPython.noop),
+        migrations.RunPython(
+            delete_duplicate_relationships, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='album',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, help_text='The name of the page as it will appear in URLs e.g http://domain.com/blog/[my-slug]/', max_length=255, unique=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='albumartistrelationship',
+            unique_together=set([('page', 'artist_name')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='genreclassalbumrelationship',
+            unique_together=set([('page', 'genres')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='albumartistrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='genreclassalbumrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+    ]
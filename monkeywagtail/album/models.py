@@ -1,7 +1,7 @@
 import collections
 
 from django.db import models
-from wagtail.wagtailcore.models import Page, Orderable
+from wagtail.wagtailcore.models import Orderable
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 from wagtail.wagtailsearch import index
 from wagtail.wagtailcore.fields import StreamField
@@ -10,6 +10,11 @@ from wagtail.wagtailadmin.edit_handlers import (
 from wagtail.wagtailsnippets.models import register_snippet
 from wagtail.wagtailsnippets.edit_handlers import SnippetChooserPanel
 from monkeywagtail.core.blocks import SongStreamBlock
+from monkeywagtail.core.duplicates import unique_slug
+from monkeywagtail.core.memoize import (
+    CachedRelationsMixin, cached_relation, related_objects)
+from monkeywagtail.core.models import DistinctRelationshipsMixin
+from monkeywagtail.core.renditions import rendition_img_tag
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
 
@@ -37,6 +42,14 @@ class GenreClassAlbumRelationship(Orderable, models.Model):
         FieldPanel('genres')
     ]
 
+    # The unique index stops a genre being added to an album twice (see
+    # DistinctRelationshipsMixin in core/models.py) and, starting with
+    # `page`, finds an album's genres on its own. The second index
+    # gives them back in the editor's order without sorting them
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'genres')]
+        index_together = [('page', 'sort_order')]
+
 
 class AlbumArtistRelationship(Orderable, models.Model):
     page = ParentalKey(
@@ -53,13 +66,20 @@ class AlbumArtistRelationship(Orderable, models.Model):
         SnippetChooserPanel('artist_name')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'artist_name')]
+        index_together = [('page', 'sort_order')]
 
-@register_snippet
-class Album(ClusterableModel):
 
-    search_fields = Page.search_fields + [
-        index.SearchField('title'),
-        index.SearchField('biography'),
+@register_snippet
+class Album(
+        DistinctRelationshipsMixin, CachedRelationsMixin, index.Indexed,
+        ClusterableModel):
+
+    search_fields = [
+        # Albums don't have a biography, so the title is all we search. Look
+        # at artist/models.py for why we're not adding to Page.search_fields
+        index.SearchField('title', partial_match=True, boost=2),
     ]
 
     title = models.CharField("The album's name", blank=True, max_length=254)
@@ -67,6 +87,7 @@ class Album(ClusterableModel):
     slug = models.SlugField(
         allow_unicode=True,
         max_length=255,
+        unique=True,
         help_text="The name of the page as it will appear in URLs e.g http://domain.com/blog/[my-slug]/",
     )
 
@@ -86,7 +107,19 @@ class Album(ClusterableModel):
 
     @property
     def url(self):
-        return '/albums/' + self.slug
+        # Albums don't have a page of their own (see the note at the bottom
+        # of artist/templates/artist/artist_detail.html), so we link to the
+        # album's review or its artist. Use `album_links` below for a list
+        return album_links([self])[self.pk]
+
+    def save(self, *args, **kwargs):
+        # The slug isn't in the editor (see the panels below), so new albums
+        # get one made from their title. Slugs are unique, so a second
+        # 'Greatest Hits' becomes 'greatest-hits-2'
+        if not self.slug:
+            self.slug = unique_slug(
+                Album.objects.exclude(pk=self.pk), self.title)
+        return super(Album, self).save(*args, **kwargs)
 
     panels = [
         FieldPanel('title'),
@@ -108,18 +141,17 @@ class Album(ClusterableModel):
     ]
 
     # We iterate within the model over the artists, genres and subgenres
-    # so they can be accessible to the template via a for loop
+    # so they can be accessible to the template via a for loop.
+    # @cached_relation means each is only fetched once per album, however many
+    # times it's called. Have a look at core/memoize.py
+    @cached_relation
     def artists(self):
-        artists = [
-            n.artist_name for n in self.album_artist_relationship.all()
-        ]
-        return artists
+        return related_objects(
+            self, 'album_artist_relationship', 'artist_name')
 
+    @cached_relation
     def genres(self):
-        genres = [
-            n.genres for n in self.album_genre_relationship.all()
-        ]
-        return genres
+        return related_objects(self, 'album_genre_relationship', 'genres')
 
     def subgenres(self):
         subgenres = [
@@ -128,9 +160,7 @@ class Album(ClusterableModel):
         return subgenres
 
     def artist_name(self):
-        artists = [
-             n.artist_name.title for n in self.album_artist_relationship.all()
-        ]
+        artists = [artist.title for artist in self.artists()]
 
         return ", ".join(artists)
         # We return the list as a string by joining all the list items. We do this
@@ -147,29 +177,59 @@ class Album(ClusterableModel):
         # Need to get the result of the function call using artist_name(). Rather
         # than just artist_name. c/f http://stackoverflow.com/questions/31937532/python-django-query-error-cant-convert-method-object-to-str-implicitly
 
+    def cache_dependents(self):
+        # Albums are listed on their artists' pages, so we clear those from
+        # the page cache when the album changes. Have a look at
+        # core/pagecache.py
+        return [artist.url for artist in self.artists()]
+
     @property
     def album_image(self):
-        # fail silently if there is no profile pic or the rendition file can't
-        # be found. Note @richbrennan worked out how to do this...
-        try:
-            return self.image.get_rendition('fill-400x400').img_tag()
-        except:
-            return ''
-
-    artist_name.admin_order_field = 'album_artist_relationship__artist_name'
-    # artist_name references the string created from the artist_name list whilst
-    # the reverse lookup to __artist_name is the related name ForeignKey
+        # Returns '' if there is no image or the rendition file can't be
+        # found. Note @richbrennan worked out how to do this...
+        # Listings can fetch the renditions for every album at once, have a
+        # look at core/renditions.py
+        return rendition_img_tag(self, 'image', 'fill-400x400')
+
+    artist_name.admin_order_field = 'artist_sort'
+    # artist_name references the string created from the artist_name list.
+    # To sort on it we use 'artist_sort', the (alphabetically) first artist's
+    # name, which AlbumAdmin.get_queryset (album/wagtail_hooks.py) adds to each
+    # album. Ordering on 'album_artist_relationship__artist_name' directly
+    # would list an album once per artist
 
     def genre(obj):
-        genre = ','.join([
-                    str(n.genres) for n in obj.album_genre_relationship.all()
-            ])
+        genre = ','.join([str(genre) for genre in obj.genres()])
         return genre
         # Again note we call `genres` because it's what we called the fk
 
-        genre.admin_order_field = 'album_genre_relationship__genre'
+    genre.admin_order_field = 'genre_sort'
+    # Like artist_sort above, added by AlbumAdmin.get_queryset
 
     class Meta:
         ordering = ['title']
         verbose_name = "Album"
         verbose_name_plural = "Albums"
+
+
+def album_links(albums):
+    """
+    Where to link to for each of `albums`: its latest live review, or its
+    (first) artist's page if it hasn't been reviewed. Returns a dictionary of
+    album id to url, with two queries however many albums there are
+    """
+    # review/models.py imports this file, so we import from it in here
+    from monkeywagtail.review.models import ReviewAlbumRelationship
+
+    ids = [album.pk for album in albums]
+    links = {pk: '/artists/' for pk in ids}
+    # Later rows win, so the first artist and the latest review come last
+    for relationship in AlbumArtistRelationship.objects.filter(
+            page_id__in=ids).select_related('artist_name').order_by(
+                '-sort_order'):
+        links[relationship.page_id] = relationship.artist_name.url
+    for relationship in ReviewAlbumRelationship.objects.filter(
+            album_id__in=ids, page__live=True).select_related(
+                'page').order_by('page__first_published_at'):
+        links[relationship.album_id] = relationship.page.url
+    return links
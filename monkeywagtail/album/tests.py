@@ -0,0 +1,59 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from monkeywagtail.album.models import (
+    Album, AlbumArtistRelationship, GenreClassAlbumRelationship)
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.genre.models import GenreClass
+
+# Run with `./manage.py test monkeywagtail.album`
+# https://docs.djangoproject.com/en/1.9/topics/testing/overview/
+
+
+class AlbumAdminQueriesTest(TestCase):
+    """
+    The albums listing in the admin fetches every row's artists and genres up
+    front, so it should take the same number of queries however many rows
+    there are. Have a look at album/wagtail_hooks.py
+    """
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+        self.artists = [
+            Artist.objects.create(title=title, slug='test-' + title)
+            for title in ('fugazi', 'minor-threat')]
+        self.genres = [
+            GenreClass.objects.create(title=title, slug='test-' + title)
+            for title in ('punk', 'hardcore')]
+
+    def add_albums(self, count):
+        start = Album.objects.count()
+        for i in range(start, start + count):
+            album = Album(
+                title='Album %d' % i, release_date=datetime.date(1990, 1, 1))
+            album.album_artist_relationship = [
+                AlbumArtistRelationship(artist_name=artist)
+                for artist in self.artists]
+            album.album_genre_relationship = [
+                GenreClassAlbumRelationship(genres=genre)
+                for genre in self.genres]
+            album.save()
+
+    def test_queries_dont_grow_with_rows(self):
+        path = '/admin/album/album/'
+        self.add_albums(1)
+        self.client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(path)
+        expected = len(queries)
+
+        for total in (10, 50):
+            self.add_albums(total - Album.objects.count())
+            with self.assertNumQueries(expected):
+                response = self.client.get(path)
+            self.assertEqual(len(response.context['object_list']), total)
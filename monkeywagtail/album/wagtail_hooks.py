@@ -1,5 +1,7 @@
+from django.db.models import Min
 from wagtail.contrib.modeladmin.options import (
     ModelAdmin, modeladmin_register)
+from monkeywagtail.core.prefetch import album_prefetches
 from .models import Album
 
 
@@ -16,10 +18,23 @@ class AlbumAdmin(ModelAdmin):
         'album_genre_relationship__genres',
         'release_date',)
     search_fields = (
-        'album_artist_relationship__artist_name',
+        # Search on the artist's name (title) rather than the artist itself,
+        # Django can't do a text search on a ForeignKey
+        'album_artist_relationship__artist_name__title',
         'title',
         'release_date',)
 
+    def get_queryset(self, request):
+        # Fetch every row's artists and genres in two queries (rather than two
+        # queries a row) and add the names we sort the artist and genre
+        # columns on. Have a look at core/prefetch.py and `artist_name` on the
+        # Album model
+        qs = super(AlbumAdmin, self).get_queryset(request)
+        return qs.prefetch_related(*album_prefetches()).annotate(
+            artist_sort=Min('album_artist_relationship__artist_name__title'),
+            genre_sort=Min('album_genre_relationship__genres__title'),
+        )
+
 
 modeladmin_register(AlbumAdmin)
 
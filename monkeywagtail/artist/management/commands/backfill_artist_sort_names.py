@@ -0,0 +1,36 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from monkeywagtail.artist.models import Artist, make_sort_name
+from monkeywagtail.core.pagecache import purge_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in the sort name (see make_sort_name in artist/models.py) of "
+        "every artist whose sort name is out of step with their title. The "
+        "migration that adds it fills it in, so this is for re-runs, e.g. "
+        "after changing make_sort_name. The review filters' A-Z list is "
+        "rebuilt afterwards so its letters match"
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        with transaction.atomic():
+            artists = Artist.objects.values_list(
+                'pk', 'title', 'sort_name').order_by('pk')
+            for pk, title, sort_name in artists.iterator():
+                new_sort_name = make_sort_name(title)
+                if new_sort_name != sort_name:
+                    # `update` rather than `save` so we don't reindex every
+                    # artist for search or empty the page cache for each
+                    Artist.objects.filter(pk=pk).update(
+                        sort_name=new_sort_name)
+                    count += 1
+
+        self.stdout.write("Updated the sort names of %d artists" % count)
+        if count:
+            call_command('rebuild_review_facets', stdout=self.stdout)
+            # The artist listings are in a new order
+            purge_all()
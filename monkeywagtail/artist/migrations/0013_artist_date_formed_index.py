@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 08:33
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artist', '0012_auto_20170127_1644'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='artist',
+            name='date_formed',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Date the artist started'),
+        ),
+    ]
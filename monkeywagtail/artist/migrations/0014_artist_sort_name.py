@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 08:59
+from __future__ import unicode_literals
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+# A copy of `make_sort_name` from artist/models.py as it was when this
+# migration was written. Migrations keep their own copy of any code they
+# need, so they still do the same thing if the original changes later
+SORT_NAME_PREFIXES = ('the ',)
+
+
+def make_sort_name(title):
+    name = ''.join(
+        character for character in unicodedata.normalize('NFKD', title)
+        if not unicodedata.combining(character))
+    name = ' '.join(name.casefold().split())
+    for prefix in SORT_NAME_PREFIXES:
+        if name.startswith(prefix) and len(name) > len(prefix):
+            name = name[len(prefix):]
+    return name
+
+
+# Fill in the new sort name of every artist there is already. `update` rather
+# than `save` as the historical model doesn't work it out on save
+def fill_sort_names(apps, schema_editor):
+    Artist = apps.get_model('artist', 'Artist')
+    for pk, title in Artist.objects.order_by('pk').values_list('pk', 'title'):
+        Artist.objects.filter(pk=pk).update(sort_name=make_sort_name(title))
+
+
+# On PostgreSQL `sort_name__startswith` is a `LIKE 'b%'`, which can only use
+# an index made with varchar_pattern_ops (unless the database's collation is
+# 'C'). Django makes one alongside the normal index when a table is created,
+# but not when a field is added to an existing table, so we make it here
+# https://www.postgresql.org/docs/9.5/static/indexes-opclass.html
+def add_pattern_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX artist_artist_sort_name_like ON artist_artist '
+            '(sort_name varchar_pattern_ops)')
+
+
+def remove_pattern_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS artist_artist_sort_name_like')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artist', '0013_artist_date_formed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='sort_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.RunPython(fill_sort_names, migrations.RunPython.noop),
+        migrations.RunPython(add_pattern_index, remove_pattern_index),
+    ]
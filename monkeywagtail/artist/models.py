@@ -1,6 +1,8 @@
+import unicodedata
+
 from django.db import models
 from django.contrib import admin
-from wagtail.wagtailcore.models import Page, Orderable
+from wagtail.wagtailcore.models import Orderable
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 from wagtail.wagtailsearch import index
 from wagtail.wagtailadmin.edit_handlers import (
@@ -11,6 +13,37 @@ from modelcluster.models import ClusterableModel
 from modelcluster.fields import ParentalKey
 from wagtail.wagtailcore.fields import StreamField
 from monkeywagtail.core.blocks import StandardBlock
+from monkeywagtail.core.memoize import (
+    CachedRelationsMixin, cached_relation, related_objects)
+from monkeywagtail.core.models import DistinctRelationshipsMixin
+from monkeywagtail.core.renditions import rendition_img_tag
+
+
+# Sorting and A-Z lists
+# Artists are listed and grouped by letter on `sort_name` rather than their
+# title, so that 'Björk' sits with 'bjork' under B and 'The Cure' sits
+# under C. It's worked out when the artist is saved, and the migration that
+# added it filled it in for the artists there were. If titles are ever
+# changed without saving (with `update`, say) or `make_sort_name` changes,
+# `./manage.py backfill_artist_sort_names` brings them all up to date
+SORT_NAME_PREFIXES = ('the ',)
+
+
+def make_sort_name(title):
+    """
+    Lower case, without accents and with any leading 'The ' dropped e.g.
+    'The Beyoncé Experience' becomes 'beyonce experience'
+    """
+    # NFKD splits 'é' in to 'e' and an accent, then we drop the accents
+    # https://docs.python.org/3/library/unicodedata.html#unicodedata.normalize
+    name = ''.join(
+        character for character in unicodedata.normalize('NFKD', title)
+        if not unicodedata.combining(character))
+    name = ' '.join(name.casefold().split())
+    for prefix in SORT_NAME_PREFIXES:
+        if name.startswith(prefix) and len(name) > len(prefix):
+            name = name[len(prefix):]
+    return name
 
 
 class GenreArtistRelationship(Orderable, models.Model):
@@ -25,6 +58,10 @@ class GenreArtistRelationship(Orderable, models.Model):
         FieldPanel('genres')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'genres')]
+        index_together = [('page', 'sort_order')]
+
 
 @register_snippet
 # A snippet is created by adding a `@register_snippet` decorator to a
@@ -57,7 +94,9 @@ class GenreArtistRelationship(Orderable, models.Model):
 # multiple artists (e.g. split records or compilations) and would be useless if
 # we ever wanted to extend the site beyond the paradigm of artist albums.
 #
-class Artist(ClusterableModel):
+class Artist(
+        DistinctRelationshipsMixin, CachedRelationsMixin, index.Indexed,
+        ClusterableModel):
     """
     The artist snippet gives content fields to define an artist
     """
@@ -67,12 +106,22 @@ class Artist(ClusterableModel):
     slug = models.SlugField(
         allow_unicode=True,
         max_length=255,
+        unique=True,
         help_text="The name of the page as it will appear in URLs e.g http://domain.com/blog/[my-slug]/",
     )
 
-    search_fields = Page.search_fields + [
-        # Defining what fields the search catches
-        index.SearchField('title'),
+    sort_name = models.CharField(
+        max_length=254, blank=True, editable=False, db_index=True)
+    # Made from the title by `make_sort_name` (above) whenever the artist is
+    # saved. The index lets the A-Z filters on the artist and review listings
+    # find the artists starting with a letter (`sort_name__startswith`)
+    # without reading every artist
+
+    search_fields = [
+        # Defining what fields the search catches. We don't start from
+        # Page.search_fields like a page would, since those include fields
+        # (e.g. `live`) that snippets don't have
+        index.SearchField('title', partial_match=True, boost=2),
         index.SearchField('biography'),
     ]
 
@@ -95,7 +144,10 @@ class Artist(ClusterableModel):
     # it a unique name
     # https://docs.djangoproject.com/en/dev/topics/db/models/#specifying-the-parent-link-field
 
-    date_formed = models.DateField("Date the artist started", blank=True, null=True)
+    date_formed = models.DateField(
+        "Date the artist started", blank=True, null=True, db_index=True)
+    # The index lets the admin filter artists by decade (a date range) without
+    # reading the whole table
 
     biography = StreamField(
         StandardBlock(),
@@ -139,12 +191,27 @@ class Artist(ClusterableModel):
         # below for returning a HTML rendition
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.sort_name = make_sort_name(self.title)
+        return super(Artist, self).save(*args, **kwargs)
+
+    @property
+    def letter(self):
+        # The letter the artist is listed under in the A-Z lists
+        return self.sort_name[:1].upper()
+
     # CONTENT FOR TEMPLATE
+    # Only fetched once per artist, have a look at core/memoize.py
+    @cached_relation
     def genres(self):
-        genres = [
-            n.genres for n in self.artist_genre_relationship.all()
-        ]
-        return genres
+        return related_objects(self, 'artist_genre_relationship', 'genres')
+
+    def cache_dependents(self):
+        # The listings to clear from the page cache when the artist changes,
+        # as well as the pages made using it. Have a look at
+        # core/pagecache.py
+        return ['/artists/', self.url] + [
+            '/artists/genre/' + genre.slug for genre in self.genres()]
 
     # MODEL ADMIN THINGS
     @property
@@ -156,93 +223,46 @@ class Artist(ClusterableModel):
 
     @property
     def artist_image(self):
-        # fail silently if there is no profile pic or the rendition file can't
+        # Returns '' if there is no profile pic or the rendition file can't
         # be found. Note @richbrennan worked out how to do this...
-        try:
-            return self.profile_image.get_rendition('fill-50x50').img_tag()
-        except:
-            return ''
-        # c/f https://docs.python.org/3/tutorial/errors.html
-        # for try / except explanation
+        # The ModelAdmin listing fetches every row's rendition at once, have a
+        # look at core/renditions.py
+        return rendition_img_tag(self, 'profile_image', 'fill-50x50')
 
     def genre(obj):
-        genre = ','.join([
-                str(n.genres) for n in obj.artist_genre_relationship.all()
-        ])
+        genre = ','.join([str(genre) for genre in obj.genres()])
         return genre
 
-        artist.admin_order_field = 'artist_genre_relationship__genres'
+    genre.admin_order_field = 'genre_sort'
+    # 'genre_sort' is the (alphabetically) first genre's title, which
+    # ArtistAdmin.get_queryset (artist/wagtail_hooks.py) adds to each artist.
+    # Ordering on 'artist_genre_relationship__genres' directly would list an
+    # artist once per genre
 
     def decade_formed(self):
-        # We fail silently because date formed isn't mandatory
-        try:
-            return self.date_formed.strftime('%Y')[:3] + "0's"
-        except:
+        # In the admin listing the database has already worked out the decade
+        # for us (see ArtistAdmin.get_queryset in artist/wagtail_hooks.py).
+        # Anywhere else we work it out here. We return a message rather than
+        # fail because date formed isn't mandatory
+        decade = getattr(self, 'decade', None)
+        if decade is None and self.date_formed:
+            decade = self.date_formed.year // 10 * 10
+        if decade is None:
             return 'No date given'
+        return "%d's" % decade
     decade_formed.short_description = 'Decade the artist began'
+    decade_formed.admin_order_field = 'date_formed'
     # We're extending date_formed so that it's slightly easier to filter when
     # there's lots of artists. The default returned by date_formed would be
     # dd MM yyyy (e.g. 08 Oct 2016), which is a bit too granular
     #
-    # That's unfortunately the easy part...
+    # Sorting by the date formed puts the artists in decade order too, and
+    # unlike sorting on the decade it can use the index on date_formed.
     #
-    # If you want to filter on it too (which you might well do) I can't figure
-    # it out :(
-
-    # def decade_formed_filter(obj):
-    #         date = obj.date_formed.strftime('%Y')[:3] + "0's"
-    #         return date
+    # To filter by decade have a look at DecadeFormedListFilter in
+    # artist/wagtail_hooks.py
 
 
-# class decade_born_list_filter(admin.SimpleListFilter):
-#         # Human-readable title which will be displayed in the
-#         # right admin sidebar just above the filter options.
-#         title = ('decade formed')
-#
-#     # Parameter for the filter that will be used in the URL query.
-#         parameter_name = 'decade'
-#
-#         def lookups(self, request, model_admin):
-#             """
-#             Returns a list of tuples. The first element in each
-#             tuple is the coded value for the option that will
-#             appear in the URL query. The second element is the
-#             human-readable name for the option that will appear
-#             in the right sidebar.
-#             """
-#             return (
-#                 ('80s', _('in the eighties')),
-#                 ('90s', _('in the nineties')),
-#                 ('2010s', _('in the 2010s')),
-#             )
-#
-#         def queryset(self, request, queryset):
-#             """
-#             Returns the filtered queryset based on the value
-#             provided in the query string and retrievable via
-#             `self.value()`.
-#             """
-#             # Compare the requested value (either '80s' or '90s')
-#             # to decide how to filter the queryset.
-#             if self.value() == '80s':
-#                 return queryset.filter(
-#                     date_formed__gte=date(1980, 1, 1),
-#                     date_formed__lte=date(1989, 12, 31))
-#             if self.value() == '90s':
-#                 return queryset.filter(
-#                     date_formed__gte=date(1990, 1, 1),
-#                     date_formed__lte=date(1999, 12, 31))
-#             if self.value() == '2010s':
-#                 return queryset.filter(
-#                     date_formed__gte=date(2010, 1, 1),
-#                     date_formed__lte=date(2019, 12, 31))
-#
-#
-# class PersonAdmin(admin.ModelAdmin):
-#     list_filter = (DecadeBornListFilter,)
-#
-#
-#
 # Missing index page?
 # -------------------
 # Normally, in Wagtail, if one were to use a generic ClusterableModel as `Album`
@@ -0,0 +1,169 @@
+import datetime
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.images import ImageFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image as PILImage
+from wagtail.wagtailcore.models import Site
+from wagtail.wagtailimages.models import get_image_model
+
+from monkeywagtail.album.models import (
+    Album, AlbumArtistRelationship, GenreClassAlbumRelationship)
+from monkeywagtail.artist.models import Artist, GenreArtistRelationship
+from monkeywagtail.author.models import Author
+from monkeywagtail.feature_content_page.models import (
+    ArtistFeaturePageRelationship, AuthorFeaturePageRelationship,
+    FeatureContentPage, FeatureIndexPage, GenreFeaturePageRelationship)
+from monkeywagtail.genre.models import GenreClass
+from monkeywagtail.review.models import (
+    ReviewAlbumRelationship, ReviewAuthorRelationship, ReviewIndexPage,
+    ReviewPage)
+
+# Run with `./manage.py test monkeywagtail.artist`
+# https://docs.djangoproject.com/en/1.9/topics/testing/overview/
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(title):
+    data = io.BytesIO()
+    PILImage.new('RGB', (800, 800), (230, 57, 70)).save(data, 'PNG')
+    return get_image_model().objects.create(
+        title=title, file=ImageFile(data, name=title + '.png'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PAGE_CACHE=False)
+class ArtistDetailQueriesTest(TestCase):
+    """
+    The artist page fetches its albums, reviews and features (and their
+    artists, genres, authors and images) up front, so it should take the
+    same number of queries however many of them the artist has. Have a look
+    at artist/views.py and core/prefetch.py
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        home = Site.objects.get(is_default_site=True).root_page
+        cls.reviews = home.add_child(instance=ReviewIndexPage(
+            title='Reviews', slug='test-reviews'))
+        cls.features = home.add_child(instance=FeatureIndexPage(
+            title='Features', slug='test-features'))
+        cls.image = make_image('test-cover')
+        cls.genre = GenreClass.objects.create(title='Punk', slug='test-punk')
+        cls.author = Author.objects.create(
+            title='Ann Author', slug='test-author')
+        cls.artist = Artist(title='The Fugazis', slug='test-fugazis')
+        cls.artist.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(ArtistDetailQueriesTest, cls).tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def add_albums_and_features(self, count):
+        """
+        Give the artist `count` more reviewed albums and features
+        """
+        start = Album.objects.count()
+        for i in range(start, start + count):
+            album = Album(
+                title='Album %d' % i, image=self.image,
+                release_date=datetime.date(2016, 1, 1))
+            album.album_artist_relationship = [
+                AlbumArtistRelationship(artist_name=self.artist)]
+            album.album_genre_relationship = [
+                GenreClassAlbumRelationship(genres=self.genre)]
+            album.save()
+
+            review = ReviewPage(
+                title='Album %d review' % i, slug='test-review-%d' % i,
+                rating=4, image=self.image, introduction='Loud.')
+            review.review_album_relationship = [
+                ReviewAlbumRelationship(album=album)]
+            review.review_author_relationship = [
+                ReviewAuthorRelationship(author=self.author)]
+            self.reviews.add_child(instance=review)
+
+            feature = FeatureContentPage(
+                title='Feature %d' % i, slug='test-feature-%d' % i,
+                date=datetime.date(2016, 1, 1), image=self.image,
+                image_choices='fit', introduction='All about it.')
+            feature.feature_page_artist_relationship = [
+                ArtistFeaturePageRelationship(artist=self.artist)]
+            feature.feature_page_genre_relationship = [
+                GenreFeaturePageRelationship(genre=self.genre)]
+            feature.feature_page_author_relationship = [
+                AuthorFeaturePageRelationship(author=self.author)]
+            self.features.add_child(instance=feature)
+
+    def warm_up(self):
+        # The first request for the page makes any missing renditions and
+        # fills the caches shared by every page (the site's root paths and
+        # so on), so we count the request after it
+        self.client.get(self.path)
+
+    def test_queries_dont_grow_with_albums_and_features(self):
+        self.path = '/artists/%s/' % self.artist.slug
+        self.add_albums_and_features(1)
+        self.warm_up()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.path)
+        expected = len(queries)
+
+        for total in (50, 500):
+            self.add_albums_and_features(total - Album.objects.count())
+            self.warm_up()
+            with self.assertNumQueries(expected):
+                response = self.client.get(self.path)
+            self.assertContains(response, 'test-review-%d/' % (total - 1))
+            self.assertContains(response, 'test-feature-%d/' % (total - 1))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ArtistAdminQueriesTest(TestCase):
+    """
+    The artists listing in the admin fetches every row's genres and image up
+    front, so it should take the same number of queries however many rows
+    there are. Have a look at artist/wagtail_hooks.py
+    """
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+        self.image = make_image('test-profile')
+        self.genres = [
+            GenreClass.objects.create(title=title, slug='test-' + title)
+            for title in ('punk', 'metal')]
+
+    def add_artists(self, count):
+        start = Artist.objects.count()
+        for i in range(start, start + count):
+            artist = Artist(
+                title='Artist %d' % i, slug='test-artist-%d' % i,
+                profile_image=self.image,
+                date_formed=datetime.date(1960 + i % 50, 1, 1))
+            artist.artist_genre_relationship = [
+                GenreArtistRelationship(genres=genre)
+                for genre in self.genres]
+            artist.save()
+
+    def test_queries_dont_grow_with_rows(self):
+        path = '/admin/artist/artist/'
+        self.add_artists(1)
+        # The first request makes the renditions, so we count the second
+        self.client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(path)
+        expected = len(queries)
+
+        for total in (10, 50):
+            self.add_artists(total - Artist.objects.count())
+            self.client.get(path)
+            with self.assertNumQueries(expected):
+                response = self.client.get(path)
+            self.assertEqual(len(response.context['object_list']), total)
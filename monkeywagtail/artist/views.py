@@ -1,26 +1,35 @@
+from django.db.models.functions import Substr, Upper
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from wagtail.wagtailcore.models import Page
-from .models import Artist
+from monkeywagtail.core.pagination import paginate
+from monkeywagtail.core.prefetch import artist_albums, artist_feature_pages
+from monkeywagtail.core.renditions import attach_renditions
+from .models import Artist, make_sort_name
 
 
 def artist_list(request):
-    artists = Artist.objects.all()
+    artists = Artist.objects.order_by('sort_name')
+    # `sort_name` is the title in lower case without accents or a leading
+    # 'The' (see artist/models.py), so 'The Cure' is listed amongst the C's
 
-    paginator = Paginator(artists, 2)  # Show 2 contacts per page
+    # The A-Z list. `?letter=c` lists the artists starting with C, which the
+    # database finds with the index on sort_name rather than by checking
+    # every artist
+    letter = make_sort_name(request.GET.get('letter', ''))[:1]
+    if letter:
+        artists = artists.filter(sort_name__startswith=letter)
+    letters = Artist.objects.exclude(sort_name='').annotate(
+        letter=Upper(Substr('sort_name', 1, 1))).order_by(
+            'letter').values_list('letter', flat=True).distinct()
 
-    page = request.GET.get('page')
-    try:
-        artists = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        artists = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        artists = paginator.page(paginator.num_pages)
+    artists = paginate(request, artists)
+    # `paginate` lives in core/pagination.py and is shared by all of our
+    # listings. It shows the number of items defined by DEFAULT_PER_PAGE in
+    # settings/base.py
 
     return render(request, 'artist/artist_list.html', {
          'artists': artists,
+         'letters': letters,
+         'filters': {'letter': letter.upper()},
     })
     # For more details on pagination
     # https://docs.djangoproject.com/en/1.10/topics/pagination/
@@ -29,7 +38,7 @@ def artist_list(request):
 def artist_genre_list(request, genre):
     artists = Artist.objects.all().filter(
         artist_genre_relationship__genres__slug=genre
-        )
+        ).order_by('sort_name')
 
     return render(request, 'artist/artist_list.html', {
          'artists': artists,
@@ -38,43 +47,41 @@ def artist_genre_list(request, genre):
 
 def artist_detail(request, slug):
     artist = get_object_or_404(Artist, slug=slug)
-    features = set(
-        p.page for p in artist.artist_feature_page_relationship.select_related('page')
-        .all() if p.page.live)
-    # feature_index = Page.objects.parent_of(features)
-    albums = set(
-        p.page for p
-        in artist.artist_album_relationship.select_related('page')
-        .all()
-        )
-    reviews = Artist.objects.all()
-    # We use `page` because the parental key name is key on line 21 of
-    # review/models.py
+    features = artist_feature_pages(artist)
+    albums = artist_albums(artist)
+    # Both of these come from core/prefetch.py. They return querysets that
+    # fetch the related genres, authors, artists and reviews in a handful of
+    # queries up front, rather than a query for every loop in the template.
+    # The page takes the same number of queries whether the artist has one
+    # album or five hundred.
     #
-    # We use `p` because I want to. You just need to use a variable that can be
-    # passed through
+    # Previously this was
     #
-    # This works by getting pages into a list we can loop through on the template
-    # It's `{classname}.{related_name}.select_related('page').all()`
-    # Not entirely sure what `set` does other than to reverse order chronology
+    # features = set(
+    #     p.page for p in artist.artist_feature_page_relationship
+    #     .select_related('page').all() if p.page.live)
     #
-    # Turn below in to useful thoughts... (what didn't work)
+    # which works (`{classname}.{related_name}.select_related('page').all()`
+    # gets the pages in to a list we can loop through on the template) but
+    # every `feature.genres` and `feature.authors` in the template then went
+    # back to the database.
     #
-    # artist.artist_album_relationship error = 'RelatedManager' object is not iterable
+    # A couple of things that don't work, if you're experimenting:
     #
-    # If no relatedname on `artist_feature_page_relationship` is set then
-    # articles = artists.artist_feature_page_relationship.all()
-    # returns `ArtistFeaturePageRelationship object` if {{article}} is put in the
-    # template. set() works because it steps over each page? What happens if
-    # it's not a page?
-    # But `FeatureContentPage.artists.all().select_related("page")` will throw
-    # an error
-    # album_artist_relationship__artist_name
+    # artist.artist_album_relationship error = 'RelatedManager' object is not
+    # iterable (you need `.all()`)
+    #
+    # `FeatureContentPage.artists.all().select_related("page")` will throw an
+    # error because `artists` is a method on the model, not a relationship
     # Docs https://docs.djangoproject.com/en/1.10/topics/db/queries/#many-to-many-relationships
+
+    # Fetch the cover images `album.album_image` shows for all the albums, and
+    # the feature images, in one go each (see core/renditions.py)
+    albums = attach_renditions(albums, 'image', 'fill-400x400')
+    features = attach_renditions(features, 'image', 'width-400')
+
     return render(request, 'artist/artist_detail.html', {
          'artist': artist,
          'articles': features,
-         # 'feature_index': feature_index,
-         'review': reviews,
          'album': albums,
     })
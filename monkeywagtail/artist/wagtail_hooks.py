@@ -1,8 +1,43 @@
+from datetime import date
+
+from django.contrib.admin import SimpleListFilter
+from django.db.models import Min
 from wagtail.contrib.modeladmin.options import (
     ModelAdmin, modeladmin_register)
+from monkeywagtail.core.functions import Decade
+from monkeywagtail.core.prefetch import artist_prefetches
+from monkeywagtail.core.views import RenditionIndexView
 from .models import Artist
 
 
+class DecadeFormedListFilter(SimpleListFilter):
+    # Lets editors filter the artist listing by the decade the artist started
+    # e.g. "1970's"
+    # https://docs.djangoproject.com/en/1.9/ref/contrib/admin/#django.contrib.admin.ModelAdmin.list_filter
+    title = 'decade formed'
+    parameter_name = 'decade'
+
+    def lookups(self, request, model_admin):
+        # The decades we've got artists for, worked out by the database
+        decades = model_admin.model.objects.filter(
+            date_formed__isnull=False).annotate(
+                decade=Decade('date_formed')).order_by('decade').values_list(
+                    'decade', flat=True).distinct()
+        return [(str(decade), "%d's" % decade) for decade in decades]
+
+    def queryset(self, request, queryset):
+        try:
+            decade = int(self.value())
+        except (TypeError, ValueError):
+            return queryset
+        # We filter on a range of dates rather than on Decade('date_formed')
+        # so the database can use the index on date_formed to go straight to
+        # the right artists, rather than working out the decade for every one
+        return queryset.filter(
+            date_formed__gte=date(decade, 1, 1),
+            date_formed__lt=date(decade + 10, 1, 1))
+
+
 class ArtistAdmin(ModelAdmin):
     model = Artist
     menu_label = 'Artists'  # ditch this to use verbose_name_plural from model
@@ -12,10 +47,28 @@ class ArtistAdmin(ModelAdmin):
     list_display = ('title', 'decade_formed', 'genre', 'artist_image')
     # https://docs.djangoproject.com/en/1.8/ref/contrib/admin/#django.contrib.admin.ModelAdmin.list_display
     list_filter = (
+        DecadeFormedListFilter,
         'date_formed',
         'artist_genre_relationship__genres'
         )
     search_fields = ('title',)
+    # Fetch the images for every row at once rather than row by row. Have a
+    # look at core/views.py
+    index_view_class = RenditionIndexView
+    list_renditions = [('profile_image', 'fill-50x50')]
+
+    def get_queryset(self, request):
+        # Fetch every row's genres and image up front (rather than a query or
+        # two a row) and add the genre name we sort the genre column on. Have
+        # a look at core/prefetch.py and `genre` on the Artist model
+        #
+        # The database also works out the decade each artist started for the
+        # decade_formed column. Have a look at core/functions.py
+        qs = super(ArtistAdmin, self).get_queryset(request)
+        return qs.select_related('profile_image').prefetch_related(
+            *artist_prefetches()).annotate(
+                genre_sort=Min('artist_genre_relationship__genres__title'),
+                decade=Decade('date_formed'))
 
 
 modeladmin_register(ArtistAdmin)
@@ -1,26 +1,27 @@
 from django.db import models
 from django.conf import settings
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from wagtail.wagtailcore.models import Page
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 from wagtail.wagtailcore.fields import RichTextField
 from wagtail.wagtailsearch import index
 from wagtail.wagtailadmin.edit_handlers import FieldPanel, MultiFieldPanel
 from wagtail.wagtailsnippets.models import register_snippet
+from monkeywagtail.core.renditions import rendition_img_tag
 
 
 @register_snippet
 # Look at artist/models.py, line 16 for info on snippets
-class Author(models.Model):
+class Author(index.Indexed, models.Model):
     """
     The author snippet gives a way to relate authors to other content and create
     a range of relationships (e.g. one-to-one, one-to-many or many-to-many
     relationships) with content
     """
 
-    search_fields = Page.search_fields + [
-        # Defining what fields the search catches
-        index.SearchField('title'),
+    search_fields = [
+        # Defining what fields the search catches. Look at artist/models.py
+        # for why we're not adding to Page.search_fields
+        index.SearchField('title', partial_match=True, boost=2),
         index.SearchField('biography'),
     ]
 
@@ -29,6 +30,7 @@ class Author(models.Model):
     slug = models.SlugField(
         allow_unicode=True,
         max_length=255,
+        unique=True,
         help_text="The name of the page as it will appear in URLs e.g http://domain.com/blog/[my-slug]/",
     )
 
@@ -84,22 +86,24 @@ class Author(models.Model):
         # below for returning a HTML rendition
         return self.title
 
+    def cache_dependents(self):
+        # The listing to clear from the page cache when the author changes,
+        # as well as the pages made using it. Have a look at
+        # core/pagecache.py
+        return ['/authors/', self.url]
+
     @property
     def image_listing(self):
-        # fail silently if there is no profile pic or the rendition file can't
+        # Returns '' if there is no profile pic or the rendition file can't
         # be found. Note @richbrennan worked out how to do this...
-        try:
-            return self.image.get_rendition('fill-150x150').img_tag()
-        except:
-            return ''
+        # Listings can fetch the renditions for every author at once, have a
+        # look at core/renditions.py
+        return rendition_img_tag(self, 'image', 'fill-150x150')
 
     @property
     def image_listing_small(self):
-        # Needs to fail silently because image = null
-        try:
-            return self.image.get_rendition('fill-50x50').img_tag()
-        except:
-            return ''
+        # Needs to return '' when image = null
+        return rendition_img_tag(self, 'image', 'fill-50x50')
         # @TODO Give a more attractive verbose name (e.g. image)
         # @TODO work out whether this is actually okay to do
         # It feels repetitive to have to define every image size
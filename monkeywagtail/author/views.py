@@ -1,27 +1,21 @@
 from django.shortcuts import render, get_object_or_404
-from django.conf import settings
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from monkeywagtail.core.pagination import paginate
+from monkeywagtail.core.renditions import attach_renditions
 from .models import Author
 
 
 def author_list(request):
-    authors = Author.objects.all()
+    authors = Author.objects.order_by('title')
 
-    paginator = Paginator(
-        authors, settings.DEFAULT_PER_PAGE
-    )  # Show number of items defined by site default
+    authors = paginate(request, authors)
+    # Show number of items defined by site default (DEFAULT_PER_PAGE). Have a
+    # look at core/pagination.py for how this works
     # To show a sepcific number
-    # paginator = Paginator(authors, 2)  # Show 2 contacts per page
+    # authors = paginate(request, authors, per_page=2)  # Show 2 authors per page
 
-    page = request.GET.get('page')
-    try:
-        authors = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        authors = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results
-        authors = paginator.page(paginator.num_pages)
+    # Fetch the images `author.image_listing` shows for the whole page at once
+    # (see core/renditions.py)
+    attach_renditions(authors, 'image', 'fill-150x150')
 
     return render(request, 'author/author_list.html', {
          'authors': authors,
@@ -1,5 +1,6 @@
 from wagtail.contrib.modeladmin.options import (
     ModelAdmin, modeladmin_register)
+from monkeywagtail.core.views import RenditionIndexView
 from .models import Author
 
 
@@ -13,6 +14,10 @@ class AuthorAdmin(ModelAdmin):
     # https://docs.djangoproject.com/en/1.8/ref/contrib/admin/#django.contrib.admin.ModelAdmin.list_display
     list_filter = ()
     search_fields = ('title',)
+    # Fetch the images for every row at once rather than row by row. Have a
+    # look at core/views.py
+    index_view_class = RenditionIndexView
+    list_renditions = [('image', 'fill-50x50')]
 
 
 modeladmin_register(AuthorAdmin)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'monkeywagtail.core'
+    label = 'core'
+
+    def ready(self):
+        # Connect the signals that clear the cached navigation
+        from . import signals  # noqa
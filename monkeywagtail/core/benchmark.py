@@ -0,0 +1,176 @@
+import json
+import random
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.feature_content_page.models import FeatureIndexPage
+from monkeywagtail.genre.models import GenreClass
+from monkeywagtail.review.models import ReviewIndexPage
+
+# SITE BENCHMARK
+# `./manage.py benchmark_site` requests the pages that matter most (the home
+# page, the review index with and without its filters, the feature index,
+# the artist, author and genre pages and search) through the whole of Django
+# with the test client, several times each, and reports how long they took
+# and how many queries they ran.
+#
+# Pages of the same kind (e.g. a sample of artist pages) are reported
+# together as a group. The results can be saved as JSON and compared with an
+# earlier run to spot a change that made things slower or added queries.
+#
+# It's most useful on a catalogue of a realistic size, see
+# core/catalogue.py.
+
+# A group is slower if its median time is this much longer than before
+DEFAULT_TOLERANCE = 0.2
+
+
+def percentile(timings, percent):
+    timings = sorted(timings)
+    index = int(round(percent / 100.0 * (len(timings) - 1)))
+    return timings[index]
+
+
+def sample(queryset, count, rng):
+    pks = sorted(queryset.values_list('pk', flat=True))
+    return queryset.model.objects.filter(
+        pk__in=rng.sample(pks, min(count, len(pks))))
+
+
+def benchmark_urls(samples=5, seed=0):
+    """
+    (group, path) for every page to request. The same seed picks the same
+    artists, authors and genres so runs can be compared
+    """
+    rng = random.Random(seed)
+    urls = [('home', '/')]
+
+    reviews = ReviewIndexPage.objects.live().first()
+    if reviews is not None:
+        path = reviews.url
+        genre = GenreClass.objects.order_by('pk').first()
+        urls += [
+            ('review index', path),
+            ('review index page 2', path + '?page=2'),
+            ('review index by rating', path + '?rating=4'),
+            ('review index by artist', path + '?artist_name=t'),
+            ('review index sorted', path + '?sort_by=rating-asc'),
+        ]
+        if genre is not None:
+            urls.append(
+                ('review index by genre', path + '?genre=' + genre.slug))
+
+    features = FeatureIndexPage.objects.live().first()
+    if features is not None:
+        urls.append(('feature index', features.url))
+
+    urls += [
+        ('artist list', '/artists/'),
+        ('artist list by letter', '/artists/?letter=b'),
+        ('author list', '/authors/'),
+        ('genre list', '/genres/'),
+        ('search', '/search/?query=the'),
+    ]
+    urls += [
+        ('artist detail', artist.url + '/')
+        for artist in sample(Artist.objects.all(), samples, rng)]
+    urls += [
+        ('author detail', author.url + '/')
+        for author in sample(Author.objects.all(), samples, rng)]
+    urls += [
+        ('genre detail', genre.url + '/')
+        for genre in sample(GenreClass.objects.all(), samples, rng)]
+    return urls
+
+
+def measure(client, path, repeat, before_each=None):
+    """
+    Request `path` `repeat` times. Returns the time each request took and
+    how many queries it ran, along with the status codes
+    """
+    timings = []
+    queries = []
+    statuses = set()
+    for i in range(repeat):
+        if before_each is not None:
+            before_each()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.time()
+            response = client.get(path)
+            timings.append(time.time() - start)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    return timings, queries, statuses
+
+
+def run(urls, repeat=10, warmup=2, host='localhost', before_each=None,
+        log=None):
+    """
+    Request each of `urls` and return the results for each group
+    """
+    client = Client(HTTP_HOST=host)
+    groups = {}
+    for group, path in urls:
+        # The first requests fill the caches (and Python's imports), which
+        # isn't what we want to measure
+        measure(client, path, warmup)
+        timings, queries, statuses = measure(
+            client, path, repeat, before_each)
+        results = groups.setdefault(
+            group, {'timings': [], 'queries': [], 'statuses': set()})
+        results['timings'] += timings
+        results['queries'] += queries
+        results['statuses'] |= statuses
+        if log:
+            log("%-26s %s" % (group, path))
+
+    return {
+        group: {
+            'requests': len(results['timings']),
+            'p50': percentile(results['timings'], 50) * 1000,
+            'p90': percentile(results['timings'], 90) * 1000,
+            'p99': percentile(results['timings'], 99) * 1000,
+            'max': max(results['timings']) * 1000,
+            'mean_queries': (
+                sum(results['queries']) / float(len(results['queries']))),
+            'max_queries': max(results['queries']),
+            'statuses': sorted(results['statuses']),
+        }
+        for group, results in groups.items()
+    }
+
+
+def compare(old, new, tolerance=DEFAULT_TOLERANCE):
+    """
+    A message for every group in both results that's got slower (by more
+    than `tolerance`) or runs more queries
+    """
+    regressions = []
+    for group in sorted(set(old) & set(new)):
+        before, after = old[group], new[group]
+        if after['p50'] > before['p50'] * (1 + tolerance):
+            regressions.append(
+                "%s: median %.1fms, was %.1fms" % (
+                    group, after['p50'], before['p50']))
+        if after['max_queries'] > before['max_queries']:
+            regressions.append(
+                "%s: %d queries, was %d" % (
+                    group, after['max_queries'], before['max_queries']))
+    return regressions
+
+
+def save(filename, results, options):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'options': options, 'results': results}, f, indent=1,
+            sort_keys=True)
+
+
+def load(filename):
+    with open(filename, encoding='utf-8') as f:
+        return json.load(f)['results']
@@ -0,0 +1,67 @@
+import time
+
+from django.core.cache import cache
+
+from monkeywagtail.core import instrumentation
+
+# GENERATIONAL CACHING
+# Rather than hunting down and deleting every cached menu (or search result,
+# or whatever) when something is published we give each group of cached things
+# a 'generation' number that forms part of the cache key e.g.
+#
+#   navigation:1476800000123:top_menu:1:3
+#
+# Bumping the generation changes every key in the group at once, so the next
+# request misses the cache and rebuilds. The old entries are never read again
+# and simply expire (or get pushed out by Redis when it needs the memory).
+#
+# We're using the cache configured in settings (Redis in production)
+# https://docs.djangoproject.com/en/1.9/topics/cache/#the-low-level-cache-api
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def generation_key(name):
+    return 'generation:%s' % name
+
+
+def get_generation(name):
+    generation = cache.get(generation_key(name))
+    if generation is None:
+        # Start from the current time rather than 1, so that if the
+        # generation itself is ever evicted we don't go back to reading
+        # entries from an earlier generation
+        generation = int(time.time() * 1000)
+        cache.add(generation_key(name), generation, None)
+        generation = cache.get(generation_key(name), generation)
+    return generation
+
+
+def bump_generation(name):
+    """
+    Move `name` on to a new generation, and return it
+    """
+    try:
+        return cache.incr(generation_key(name))
+    except ValueError:
+        # incr raises a ValueError if the key doesn't exist yet
+        return get_generation(name)
+
+
+def make_key(name, *parts):
+    return ':'.join(
+        [name, str(get_generation(name))] + [str(part) for part in parts])
+
+
+def cached(name, parts, build, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the value cached under `name` and `parts` for the current
+    generation of `name`, calling `build()` to make it if it isn't cached yet
+    """
+    key = make_key(name, *parts)
+    value = cache.get(key)
+    instrumentation.note_cache(value is not None)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
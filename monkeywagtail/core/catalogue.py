@@ -0,0 +1,388 @@
+import datetime
+import io
+import random
+
+from django.core.files.images import ImageFile
+from django.utils import timezone
+from PIL import Image as PILImage
+from wagtail.wagtailcore.models import Page
+from wagtail.wagtailimages.models import get_image_model
+
+from monkeywagtail.album.models import (
+    Album, AlbumArtistRelationship, GenreClassAlbumRelationship)
+from monkeywagtail.artist.models import Artist, GenreArtistRelationship
+from monkeywagtail.author.models import Author
+from monkeywagtail.feature_content_page.models import (
+    ArtistFeaturePageRelationship, AuthorFeaturePageRelationship,
+    FeatureContentPage, FeatureIndexPage, GenreFeaturePageRelationship)
+from monkeywagtail.genre.models import GenreClass, Subgenre
+from monkeywagtail.home.models import HomePage
+from monkeywagtail.news.models import (
+    AuthorFeaturePageRelationship as NewsAuthorRelationship,
+    NewsAlbumRelationship, NewsArtistRelationship, NewsIndexPage, NewsPage)
+from monkeywagtail.review.models import (
+    ReviewAlbumRelationship, ReviewAuthorRelationship, ReviewIndexPage,
+    ReviewPage)
+from monkeywagtail.tours.models import (
+    COUNTRY_CHOICES, TourAlbumRelationship, TourArtistRelationship,
+    TourDates, TourIndexPage, TourPage)
+
+# SYNTHETIC CATALOGUE
+# The example data is a handful of artists, which is no good for seeing how
+# the site copes with a real catalogue. `./manage.py generate_catalogue` makes
+# as many artists, albums, genres, authors, images, reviews, features, news
+# and tour pages as you ask for, related to each other roughly the way real
+# ones are:
+#
+# * most artists have a couple of albums, a few have lots
+# * most albums are by one artist, some are collaborations
+# * popular artists turn up in far more features, news and tours
+# * reviews and other pages are spread over the last few years
+#
+# Everything made has a slug (or title, for images) starting with the prefix
+# ('synthetic' by default) so it can be found and deleted again with
+# `./manage.py generate_catalogue --delete`. The same seed always makes the
+# same catalogue, so benchmarks (see core/benchmark.py) can be compared.
+#
+# Pages are added as live pages without revisions, which is much quicker than
+# publishing each one, so the review filters are rebuilt at the end (see
+# review/management/commands/rebuild_review_facets.py).
+
+WORDS = [
+    'black', 'electric', 'velvet', 'silver', 'broken', 'northern', 'midnight',
+    'paper', 'neon', 'wild', 'quiet', 'burning', 'crystal', 'lonely',
+    'golden', 'savage', 'static', 'hollow', 'violet', 'atomic',
+]
+NOUNS = [
+    'wolves', 'hearts', 'machine', 'garden', 'riot', 'ocean', 'ghosts',
+    'tigers', 'signal', 'canyon', 'youth', 'engine', 'mirrors', 'saints',
+    'lights', 'river', 'cathedral', 'planet', 'fever', 'horses',
+]
+GENRES = [
+    'Punk', 'Metal', 'Pop', 'Indie', 'Hip hop', 'Jazz', 'Folk', 'Electronic',
+    'Soul', 'Blues', 'Reggae', 'Country', 'Classical', 'Hardcore', 'Grunge',
+    'Shoegaze', 'Post-rock', 'Ska', 'Funk', 'Disco',
+]
+COLOURS = [
+    (230, 57, 70), (29, 53, 87), (69, 123, 157), (244, 162, 97),
+    (42, 157, 143), (38, 70, 83), (233, 196, 106), (131, 56, 236),
+]
+
+
+def fan_out(rng, low, high):
+    """
+    A whole number between `low` and `high`, mostly near `low` with a long
+    tail towards `high`
+    """
+    return low + int((high - low + 1) * rng.random() ** 3)
+
+
+def popular(rng, objects, count):
+    """
+    `count` different objects, favouring those near the start of the list
+    the way a few artists get far more attention than the rest
+    """
+    count = min(count, len(objects))
+    chosen = []
+    while len(chosen) < count:
+        obj = objects[int(len(objects) * rng.random() ** 2)]
+        if obj not in chosen:
+            chosen.append(obj)
+    return chosen
+
+
+def name(rng, words=2):
+    return ' '.join(
+        rng.choice(WORDS) for i in range(words - 1)).title() + (
+            ' ' + rng.choice(NOUNS).title())
+
+
+def published_at(rng, years=5):
+    return timezone.now() - datetime.timedelta(
+        seconds=rng.randint(0, years * 365 * 24 * 60 * 60))
+
+
+def maybe(rng, chance, value):
+    return value if rng.random() < chance else None
+
+
+class Catalogue(object):
+    """
+    Makes a synthetic catalogue. `counts` is a dictionary with how many
+    'artists', 'genres', 'subgenres' (per genre), 'authors', 'images',
+    'reviews', 'features', 'news' and 'tours' to make
+    """
+
+    def __init__(self, counts, prefix='synthetic', seed=0, log=None):
+        self.counts = counts
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.made = {}
+
+    def slug(self, kind, number):
+        return '%s-%s-%d' % (self.prefix, kind, number)
+
+    def generate(self):
+        self.images = self.make_images(self.counts['images'])
+        self.genres = self.make_genres(
+            self.counts['genres'], self.counts['subgenres'])
+        self.authors = self.make_authors(self.counts['authors'])
+        self.artists = self.make_artists(self.counts['artists'])
+        self.albums = self.make_albums()
+
+        home = HomePage.objects.first()
+        if home is None:
+            raise ValueError("There's no home page to add the pages to")
+        self.make_reviews(
+            self.index_page(home, ReviewIndexPage, 'Reviews', 'reviews'),
+            self.counts['reviews'])
+        self.make_features(
+            self.index_page(home, FeatureIndexPage, 'Features', 'features'),
+            self.counts['features'])
+        self.make_news(
+            self.index_page(home, NewsIndexPage, 'News', 'news'),
+            self.counts['news'])
+        self.make_tours(
+            self.index_page(home, TourIndexPage, 'Tours', 'tours'),
+            self.counts['tours'])
+        return self.made
+
+    def note(self, kind, count):
+        self.made[kind] = count
+        self.log("Made %d %s" % (count, kind))
+
+    # SNIPPETS
+
+    def make_images(self, count):
+        Image = get_image_model()
+        images = []
+        for i in range(count):
+            width, height = self.rng.choice(
+                [(1200, 800), (800, 800), (1600, 900)])
+            data = io.BytesIO()
+            PILImage.new(
+                'RGB', (width, height), self.rng.choice(COLOURS)
+            ).save(data, 'PNG')
+            title = self.slug('image', i)
+            images.append(Image.objects.create(
+                title=title, file=ImageFile(data, name=title + '.png')))
+        self.note('images', len(images))
+        return images
+
+    def image(self, chance=0.8):
+        return maybe(self.rng, chance, self.rng.choice(self.images)) if (
+            self.images) else None
+
+    def make_genres(self, count, subgenres):
+        genres = []
+        for i in range(count):
+            title = GENRES[i % len(GENRES)]
+            if i >= len(GENRES):
+                title += ' %d' % (i // len(GENRES) + 1)
+            genre = GenreClass(
+                title=title, slug=self.slug('genre', i), image=self.image(),
+                genre_description='<p>All about %s.</p>' % title)
+            genre.sub_genre_relationship = [
+                Subgenre(title='%s %s' % (name(self.rng), title))
+                for j in range(fan_out(self.rng, 0, subgenres * 2))
+            ]
+            genre.save()
+            genres.append(genre)
+        self.note('genres', len(genres))
+        return genres
+
+    def make_authors(self, count):
+        authors = []
+        for i in range(count):
+            authors.append(Author.objects.create(
+                title=name(self.rng), slug=self.slug('author', i),
+                image=self.image(), job_title='Writer',
+                biography='<p>Writes about music.</p>'))
+        self.note('authors', len(authors))
+        return authors
+
+    def make_artists(self, count):
+        artists = []
+        for i in range(count):
+            artist = Artist(
+                title='The %s' % name(self.rng),
+                slug=self.slug('artist', i),
+                profile_image=self.image(),
+                date_formed=datetime.date(
+                    self.rng.randint(1955, 2015), self.rng.randint(1, 12), 1))
+            artist.artist_genre_relationship = [
+                GenreArtistRelationship(genres=genre)
+                for genre in popular(
+                    self.rng, self.genres, fan_out(self.rng, 1, 3))
+            ]
+            artist.save()
+            artists.append(artist)
+        self.note('artists', len(artists))
+        return artists
+
+    def make_albums(self):
+        albums = []
+        self.albums_by_artist = {}
+        for artist in self.artists:
+            for i in range(fan_out(self.rng, 1, 12)):
+                album = Album(
+                    title=name(self.rng, 3),
+                    slug=self.slug('album', len(albums)),
+                    image=self.image(0.9),
+                    release_date=datetime.date(
+                        self.rng.randint(artist.date_formed.year, 2016),
+                        self.rng.randint(1, 12), 1))
+                artists = [artist]
+                if self.rng.random() < 0.1:
+                    artists += popular(self.rng, self.artists, 1)
+                album.album_artist_relationship = [
+                    AlbumArtistRelationship(artist_name=album_artist)
+                    for album_artist in set(artists)
+                ]
+                album.album_genre_relationship = [
+                    GenreClassAlbumRelationship(genres=genre)
+                    for genre in artist.genres()
+                ]
+                album.save()
+                albums.append(album)
+                self.albums_by_artist.setdefault(artist, []).append(album)
+        self.note('albums', len(albums))
+        return albums
+
+    # PAGES
+
+    def index_page(self, home, model, title, slug):
+        index = model.objects.descendant_of(home).first()
+        if index is None:
+            index = home.add_child(instance=model(
+                title=title, slug=slug, show_in_menus=True))
+        return index
+
+    def add_page(self, parent, page):
+        page.live = True
+        page.first_published_at = published_at(self.rng)
+        page.latest_revision_created_at = page.first_published_at
+        parent.add_child(instance=page)
+        return page
+
+    def make_reviews(self, index, count):
+        albums = self.albums[:]
+        self.rng.shuffle(albums)
+        for i, album in enumerate(albums[:count]):
+            review = ReviewPage(
+                title='%s review' % album.title,
+                slug=self.slug('review', i),
+                rating=self.rng.choice([1, 2, 3, 3, 3, 4, 4, 4, 5]),
+                image=self.image(),
+                introduction="What we thought of %s." % album.title,
+                listing_introduction="A review of %s." % album.title)
+            review.review_album_relationship = [
+                ReviewAlbumRelationship(album=album)]
+            review.review_author_relationship = [
+                ReviewAuthorRelationship(author=author)
+                for author in popular(
+                    self.rng, self.authors, fan_out(self.rng, 1, 2))
+            ]
+            self.add_page(index, review)
+        self.note('reviews', min(count, len(albums)))
+
+    def make_features(self, index, count):
+        for i in range(count):
+            title = name(self.rng, 3)
+            feature = FeatureContentPage(
+                title=title, slug=self.slug('feature', i),
+                date=published_at(self.rng).date(),
+                image=self.image(), image_choices='fit',
+                introduction="A feature about %s." % title,
+                listing_introduction="A feature about %s." % title)
+            feature.feature_page_artist_relationship = [
+                ArtistFeaturePageRelationship(artist=artist)
+                for artist in popular(
+                    self.rng, self.artists, fan_out(self.rng, 1, 4))
+            ]
+            feature.feature_page_genre_relationship = [
+                GenreFeaturePageRelationship(genre=genre)
+                for genre in popular(
+                    self.rng, self.genres, fan_out(self.rng, 1, 2))
+            ]
+            feature.feature_page_author_relationship = [
+                AuthorFeaturePageRelationship(author=author)
+                for author in popular(self.rng, self.authors, 1)
+            ]
+            self.add_page(index, feature)
+        self.note('features', count)
+
+    def make_news(self, index, count):
+        for i in range(count):
+            artists = popular(self.rng, self.artists, fan_out(self.rng, 1, 3))
+            news = NewsPage(
+                title='News from %s' % artists[0],
+                slug=self.slug('news', i),
+                image=self.image(),
+                news_listing_introduction="What %s have been up to." % (
+                    artists[0]))
+            news.news_artist_relationship = [
+                NewsArtistRelationship(artists=artist) for artist in artists]
+            news.news_album_relationship = [
+                NewsAlbumRelationship(albums=album)
+                for album in popular(
+                    self.rng, self.albums, fan_out(self.rng, 0, 2))
+            ]
+            news.news_author_relationship = [
+                NewsAuthorRelationship(author=author)
+                for author in popular(self.rng, self.authors, 1)
+            ]
+            self.add_page(index, news)
+        self.note('news pages', count)
+
+    def make_tours(self, index, count):
+        countries = [value for value, label in COUNTRY_CHOICES]
+        for i in range(count):
+            artist = popular(self.rng, self.artists, 1)[0]
+            tour = TourPage(
+                title='%s on tour' % artist,
+                slug=self.slug('tour', i),
+                tour_image=self.image(),
+                tour_listing_introduction="%s are on the road." % artist,
+                tour_description='<p>%s are on the road.</p>' % artist)
+            tour.tour_artist_relationship = [
+                TourArtistRelationship(artists=artist)]
+            tour.tour_album_relationship = [
+                TourAlbumRelationship(albums=album)
+                for album in self.albums_by_artist[artist][
+                    :fan_out(self.rng, 0, 2)]
+            ]
+            start = published_at(self.rng).date()
+            tour.tourdates = [
+                TourDates(
+                    date=start + datetime.timedelta(days=day * 2),
+                    venue='The %s' % name(self.rng),
+                    city=name(self.rng, 1),
+                    country=self.rng.choice(countries),
+                    price=self.rng.randint(5, 60))
+                for day in range(fan_out(self.rng, 3, 20))
+            ]
+            self.add_page(index, tour)
+        self.note('tours', count)
+
+
+def delete_catalogue(prefix='synthetic'):
+    """
+    Delete everything a Catalogue made with `prefix`. Returns how many pages,
+    snippets and images went
+    """
+    start = prefix + '-'
+    deleted = 0
+    for page in Page.objects.filter(slug__startswith=start):
+        # Deleting a page deletes the pages beneath it too, so it might have
+        # gone already
+        if Page.objects.filter(pk=page.pk).exists():
+            page.delete()
+            deleted += 1
+    for model in (Album, Artist, Author, GenreClass):
+        deleted += model.objects.filter(slug__startswith=start).delete()[0]
+    for image in get_image_model().objects.filter(title__startswith=start):
+        image.delete()
+        deleted += 1
+    return deleted
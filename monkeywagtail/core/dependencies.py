@@ -0,0 +1,166 @@
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.wagtailcore.models import Page
+
+# PAGE CACHE DEPENDENCIES
+# An artist turns up on far more pages than its own: the reviews of its
+# albums, news, tour and feature pages that mention it, genre pages and the
+# listings. When the artist is edited, every one of those cached pages is out
+# of date, but nothing about the artist tells us which pages they are.
+#
+# So we write it down as the pages are made. While a page is being rendered
+# for the page cache (see core/middleware.py) we note every artist, album,
+# author, genre and page that's loaded from the database to make it, using
+# Django's `post_init` signal which is sent whenever a model instance is
+# created (see core/signals.py). Once the page is cached we add its path to a
+# list kept (in the cache) for each of those objects, e.g.
+#
+#   pagedeps:artist.artist:5 -> {(1, '/artists/fugazi/'), (1, '/reviews/...')}
+#
+# When the artist is saved we throw away just the pages on its list. Have a
+# look at `purge_object` in core/pagecache.py.
+#
+# A couple of things to bear in mind:
+#
+# * Things that come out of another cache (e.g. the cached menus) aren't
+#   loaded from the database, so aren't noted. The menus are handled by
+#   clearing every page when a menu page changes.
+# * Something new can't be on any list yet, so models can also say which
+#   pages (e.g. listings) to clear with a `cache_dependents()` method.
+# * Two workers adding to the same list at the same moment can lose one of
+#   the additions. The page then stays cached until PAGE_CACHE_TIMEOUT at
+#   worst.
+
+DEPENDENCY_MODELS = [
+    'album.Album',
+    'artist.Artist',
+    'author.Author',
+    'genre.GenreClass',
+]
+
+_local = threading.local()
+_models = None
+
+
+def tracked_models():
+    global _models
+    if _models is None:
+        _models = tuple(apps.get_model(label) for label in getattr(
+            settings, 'PAGE_CACHE_DEPENDENCY_MODELS', DEPENDENCY_MODELS))
+    return _models
+
+
+def model_key(label, pk):
+    return '%s:%s' % (label.lower(), pk)
+
+
+def object_key(obj):
+    """
+    e.g. 'artist.artist:5'. Every type of page shares 'wagtailcore.page' so
+    a ReviewPage and the plain Page it's loaded as are the same thing
+    """
+    if isinstance(obj, Page):
+        return model_key('wagtailcore.page', obj.pk)
+    return model_key(obj._meta.label, obj.pk)
+
+
+def dependencies_key(key):
+    return 'pagedeps:%s' % key
+
+
+# RECORDING
+# Recordings can be nested, e.g. the home page's featured content (see
+# home/featured.py) is recorded on its own so it can be kept with the cached
+# content. Whatever an inner recording notes is noted by the outer one too.
+
+def start_recording():
+    if getattr(_local, 'stack', None) is None:
+        _local.stack = []
+    _local.stack.append(set())
+
+
+def stop_recording():
+    stack = getattr(_local, 'stack', None)
+    if not stack:
+        return set()
+    dependencies = stack.pop()
+    if stack:
+        stack[-1].update(dependencies)
+    return dependencies
+
+
+@contextmanager
+def recording():
+    """
+    with dependencies.recording() as used:
+        ...
+    """
+    start_recording()
+    used = set()
+    try:
+        yield used
+    finally:
+        used.update(stop_recording())
+
+
+def note_key(key):
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1].add(key)
+
+
+def note(label, pk):
+    """
+    Note something the page shows without loading it as a model instance,
+    e.g. `note('artist.Artist', 5)` for an artist's name read with
+    `values_list`
+    """
+    note_key(model_key(label, pk))
+
+
+def note_instance(instance):
+    if not getattr(_local, 'stack', None) or instance.pk is None:
+        return
+    if isinstance(instance, Page) or isinstance(instance, tracked_models()):
+        note_key(object_key(instance))
+
+
+def record(site_id, path, dependencies, timeout):
+    """
+    Add `path` on the site to the list of pages for each of `dependencies`
+    """
+    if not dependencies:
+        return
+    keys = [dependencies_key(key) for key in dependencies]
+    existing = cache.get_many(keys)
+    updated = {}
+    for key in keys:
+        paths = existing.get(key, set())
+        if (site_id, path) not in paths:
+            paths.add((site_id, path))
+            updated[key] = paths
+    if updated:
+        cache.set_many(updated, timeout)
+
+
+# LOOKING UP
+
+def dependent_paths(obj):
+    """
+    (site id, path) for every cached page made using `obj`
+    """
+    return cache.get(dependencies_key(object_key(obj)), set())
+
+
+def forget(obj):
+    # Once the pages are purged they'll note `obj` again when they're next
+    # made, so there's no need to keep the list
+    forget_key(object_key(obj))
+
+
+def forget_key(key):
+    cache.delete(dependencies_key(key))
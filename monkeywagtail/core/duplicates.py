@@ -0,0 +1,59 @@
+from django.utils.text import slugify
+
+# DUPLICATES
+# Slugs are unique (the artist, album, author and genre pages are looked up
+# by them) and the relationship tables can only link a page to an artist,
+# album etc once. These help keep to that: `unique_slug` makes a slug that
+# isn't taken yet, and the other two tidy up the rows from before the unique
+# indexes existed. They're used by data migrations, so they only use what a
+# migration's historical models have (no custom methods).
+
+
+def unique_slug(queryset, value, max_length=255):
+    """
+    Slugify `value`, adding -2, -3 etc if the slug's already used by
+    something in `queryset`
+    """
+    base = slugify(value, allow_unicode=True)[:max_length] or 'untitled'
+    slug = base
+    number = 2
+    while queryset.filter(slug=slug).exists():
+        suffix = '-%d' % number
+        slug = base[:max_length - len(suffix)] + suffix
+        number += 1
+    return slug
+
+
+def fix_duplicate_slugs(model, max_length=255):
+    """
+    Give every object with a blank slug, or a slug an older object already
+    has, a new one made from its title. Returns how many were changed
+    """
+    changed = 0
+    seen = set()
+    for pk, title, slug in model.objects.order_by('pk').values_list(
+            'pk', 'title', 'slug'):
+        if slug and slug not in seen:
+            seen.add(slug)
+            continue
+        slug = unique_slug(
+            model.objects.exclude(pk=pk), slug or title, max_length)
+        model.objects.filter(pk=pk).update(slug=slug)
+        seen.add(slug)
+        changed += 1
+    return changed
+
+
+def delete_duplicate_rows(model, fields):
+    """
+    Delete the rows of `model` that repeat an older row's values of `fields`
+    e.g. an album linked to the same artist twice. Returns how many went
+    """
+    seen = set()
+    duplicates = []
+    for row in model.objects.order_by('pk').values_list('pk', *fields):
+        if row[1:] in seen:
+            duplicates.append(row[0])
+        seen.add(row[1:])
+    model.objects.filter(pk__in=duplicates).delete()
+    return len(duplicates)
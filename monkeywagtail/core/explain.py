@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import connection
+from django.test import RequestFactory
+
+from monkeywagtail.album.models import Album, AlbumArtistRelationship
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.core.prefetch import artist_albums, artist_feature_pages
+from monkeywagtail.feature_content_page.models import FeatureIndexPage
+from monkeywagtail.genre.models import GenreClass
+from monkeywagtail.review.models import ReviewIndexPage
+
+# QUERY PLANS
+# We ask PostgreSQL how it would run the main listing queries (the filtered
+# review and feature indexes, the artist A-Z and the artist, album, author
+# and genre pages) and complain about any table it would read from start to
+# finish (a 'Seq Scan') rather than use an index.
+# https://www.postgresql.org/docs/9.5/static/using-explain.html
+#
+# On a handful of rows reading the whole table is the quickest thing to do,
+# so PostgreSQL picks it whatever indexes we have. So the check
+# (ListingQueryPlanTest in core/tests.py) runs on a generated catalogue of a
+# realistic size (see core/catalogue.py), after ANALYZE has told PostgreSQL
+# how big it is, takes the plan PostgreSQL would really use and only minds
+# Seq Scans of tables with more than SMALL_TABLE_ROWS rows. There are only
+# ever a few dozen genres and authors, say, and reading those whole is fine.
+
+SMALL_TABLE_ROWS = 500
+
+
+def typical(model):
+    # The middle row rather than the first: the catalogue makes its first
+    # artists (and so on) the most popular, with far more albums than most
+    objects = model.objects.order_by('pk')
+    count = objects.count()
+    return objects[count // 2] if count else None
+
+
+def listing_queries():
+    """
+    (name, queryset) for each query to check, made the same way the views
+    and pages make them
+    """
+    factory = RequestFactory()
+    per_page = settings.DEFAULT_PER_PAGE
+    artist = typical(Artist)
+    album = typical(Album)
+    author = typical(Author)
+    genre = typical(GenreClass)
+    queries = []
+
+    reviews = ReviewIndexPage.objects.live().first()
+    if reviews is not None:
+        for name, params in [
+                ('review index', {}),
+                ('review index by rating', {'rating': '4'}),
+                ('review index by artist', {'artist_name': 'b'}),
+                ('review index by genre', {
+                    'genre': genre.slug if genre else ''})]:
+            # We don't check the index sorted by rating. Rating and date are
+            # in different tables, so no index has them in that order and
+            # PostgreSQL has to sort every live review whatever we do
+            queryset = reviews.get_filtered_review_pages(
+                factory.get('/', params))[0]
+            queries.append((name, queryset[:per_page]))
+
+    features = FeatureIndexPage.objects.live().first()
+    if features is not None:
+        for name, params in [
+                ('feature index', {}),
+                ('feature index by year', {'year': '2012'}),
+                ('feature index by genre', {
+                    'genre': genre.slug if genre else ''})]:
+            queryset = features.get_filtered_feature_pages(
+                factory.get('/', params))[0]
+            queries.append((name, queryset[:per_page]))
+
+    queries.append((
+        'artist list by letter',
+        Artist.objects.filter(
+            sort_name__startswith='b').order_by('sort_name')[:per_page]))
+    for name, model, obj in [
+            ('artist by slug', Artist, artist),
+            ('album by slug', Album, album),
+            ('author by slug', Author, author),
+            ('genre by slug', GenreClass, genre)]:
+        if obj is not None:
+            queries.append((name, model.objects.filter(slug=obj.slug)))
+    if artist is not None:
+        queries += [
+            ("artist's albums", artist_albums(artist)),
+            ("artist's features", artist_feature_pages(artist)),
+        ]
+    if album is not None:
+        queries.append((
+            "album's artists", AlbumArtistRelationship.objects.filter(
+                page=album).order_by('sort_order')))
+    return queries
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        for node in plan_nodes(child):
+            yield node
+
+
+def seq_scans(queryset):
+    """
+    The tables with more than SMALL_TABLE_ROWS rows PostgreSQL would read in
+    full to run `queryset`
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        # psycopg2 turns the JSON in to Python lists and dicts for us
+        plan = cursor.fetchone()[0]
+        tables = set(
+            node['Relation Name'] for node in plan_nodes(plan[0]['Plan'])
+            if node['Node Type'] == 'Seq Scan')
+        if not tables:
+            return []
+        # How many rows ANALYZE counted in each
+        cursor.execute(
+            'SELECT relname FROM pg_class WHERE relname IN %s AND '
+            'reltuples > %s', [tuple(tables), SMALL_TABLE_ROWS])
+        return sorted(row[0] for row in cursor.fetchall())
@@ -0,0 +1,317 @@
+import collections
+import hashlib
+import json
+import os
+
+from django.apps import apps
+from django.test import Client
+from django.test.utils import override_settings
+from modelcluster.models import get_all_child_relations
+from wagtail.wagtailcore.models import Page, Site, get_page_models
+
+from monkeywagtail.core import dependencies
+from monkeywagtail.core.pagecache import normalise_path, purge_urls
+
+# STATIC EXPORT
+# Our content changes a few times a day, but every visit renders it again.
+# `./manage.py export_static_site` renders every live page, and the artist,
+# genre and author pages, to plain HTML files e.g.
+#
+#   /artists/fugazi/  ->  static_site/artists/fugazi/index.html
+#
+# which nginx (or any static file server) can serve as they are, and which
+# wsgi.py serves through WhiteNoise when SERVE_STATIC_SITE is switched on.
+#
+# Each page is rendered through the whole of Django (middleware, templates
+# and all) with Django's test client, so it's exactly what a visitor who
+# isn't logged in would get. The pages are shared out between several
+# processes to render them in parallel.
+#
+# EXPORTING ONLY WHAT'S CHANGED
+# As each page is rendered we note every page, artist, album, author and
+# genre it was made from, the same way the page cache does (see
+# core/dependencies.py). We also take a 'fingerprint' of each of those
+# objects: a hash of its fields along with the rows of its relationships
+# (an album's artists, say). Both are kept in a manifest file next to the
+# export folder (static_site-manifest.json for static_site/), not inside it,
+# so it's never served. It's written last, so a new manifest means an export
+# has finished (wsgi.py watches for that, see core/static_site.py).
+#
+# Next time, we take the fingerprints again and only render the pages made
+# from something whose fingerprint has changed (or that's been added or
+# deleted), along with pages that didn't exist last time. Changes to the
+# main menu, the site settings, or a page that's shown in the menus
+# re-render everything, as they appear on every page.
+#
+# Listings only export their first page: `?page=2` can't be a static file.
+
+# Where earlier exports kept the manifest. We tidy it away
+OLD_MANIFEST = 'export-manifest.json'
+
+# Page fields that change without the published page changing e.g. when a
+# draft is saved
+IGNORED_FIELDS = {
+    'has_unpublished_changes', 'latest_revision_created_at', 'locked'}
+
+# Things shown on every page. If any of these change we export everything
+GLOBAL_MODELS = ['core.MainMenu', 'wagtailcore.Site']
+
+
+# WHAT TO EXPORT
+
+def view_paths():
+    """
+    The pages served by our own Django views rather than by Wagtail
+    """
+    Artist = apps.get_model('artist.Artist')
+    Author = apps.get_model('author.Author')
+    GenreClass = apps.get_model('genre.GenreClass')
+
+    paths = ['/artists/', '/authors/', '/genres/']
+    paths += [artist.url + '/' for artist in Artist.objects.only('slug')]
+    paths += [author.url + '/' for author in Author.objects.only('slug')]
+    for genre in GenreClass.objects.only('slug'):
+        paths += [genre.url + '/', '/artists/genre/%s/' % genre.slug]
+    return paths
+
+
+def export_paths():
+    """
+    (site id, path) for everything to export. Our own views belong to the
+    default site
+    """
+    site_root_paths = Site.get_site_root_paths()
+    paths = []
+    for page in Page.objects.live().only('pk', 'url_path').order_by('path'):
+        for site_id, root_path, root_url in site_root_paths:
+            if page.url_path.startswith(root_path):
+                paths.append((site_id, page.get_url_parts()[2]))
+                break
+
+    default_site = Site.objects.filter(is_default_site=True).first()
+    if default_site is not None:
+        paths += [(default_site.pk, path) for path in view_paths()]
+    return paths
+
+
+# FINGERPRINTS
+
+def row_values(fields, row):
+    # get_prep_value turns StreamField and RichTextField values back in to
+    # plain data, so two loads of the same row always look the same
+    return [field.get_prep_value(value) for field, value in zip(fields, row)]
+
+
+def concrete_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in IGNORED_FIELDS
+    ]
+
+
+def model_rows(model):
+    """
+    pk -> list of values for every row of `model`, along with the rows of its
+    child relationships (e.g. an album's AlbumArtistRelationships)
+    """
+    rows = collections.defaultdict(list)
+    fields = concrete_fields(model)
+    for row in model._default_manager.order_by('pk').values_list(
+            'pk', *[field.attname for field in fields]):
+        rows[row[0]].append(row_values(fields, row[1:]))
+
+    for relation in get_all_child_relations(model):
+        related = relation.related_model
+        parent = relation.field.attname
+        related_fields = concrete_fields(related)
+        related_rows = related._default_manager.order_by(parent, 'pk')
+        for row in related_rows.values_list(
+                parent, *[field.attname for field in related_fields]):
+            if row[0] in rows:
+                rows[row[0]].append(row_values(related_fields, row[1:]))
+    return rows
+
+
+def fingerprint(values):
+    return hashlib.md5(
+        json.dumps(values, default=str, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def fingerprints():
+    """
+    A hash of every page, artist, album, author and genre, keyed the same way
+    as core/dependencies.py, plus one 'global' hash for GLOBAL_MODELS
+    """
+    rows = collections.defaultdict(list)
+    page_models = sorted(get_page_models(), key=lambda m: m._meta.label)
+    for model in page_models:
+        for pk, values in model_rows(model).items():
+            rows[dependencies.model_key('wagtailcore.page', pk)] += values
+    for model in dependencies.tracked_models():
+        for pk, values in model_rows(model).items():
+            rows[dependencies.model_key(model._meta.label, pk)] += values
+
+    prints = {key: fingerprint(values) for key, values in rows.items()}
+    prints['global'] = fingerprint([
+        sorted(model_rows(apps.get_model(label)).items())
+        for label in GLOBAL_MODELS])
+    return prints
+
+
+def changed_keys(old, new):
+    return {
+        key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+def changed_objects(keys):
+    """
+    The pages and snippets for `keys` that still exist
+    """
+    ids = collections.defaultdict(list)
+    for key in keys:
+        label, sep, pk = key.partition(':')
+        if sep:
+            ids[label].append(int(pk))
+
+    objects = list(Page.objects.filter(
+        pk__in=ids.pop('wagtailcore.page', [])).specific())
+    for model in dependencies.tracked_models():
+        objects += model._default_manager.filter(
+            pk__in=ids.get(model._meta.label_lower, []))
+    return objects
+
+
+def listing_paths(obj):
+    """
+    Paths that show `obj` but that it can't have been noted on, if it's new.
+    The same ones the page cache clears, see core/pagecache.py
+    """
+    if isinstance(obj, Page):
+        return purge_urls(obj)
+    dependents = getattr(obj, 'cache_dependents', None)
+    return dependents() if dependents else []
+
+
+def paths_to_export(manifest, paths, prints):
+    """
+    The (site id, path)s from `paths` that need rendering again, given the
+    manifest from the last export
+    """
+    if not manifest:
+        return list(paths)
+    changed = changed_keys(manifest['fingerprints'], prints)
+    if 'global' in changed:
+        return list(paths)
+
+    objects = changed_objects(changed)
+    if any(isinstance(obj, Page) and obj.show_in_menus for obj in objects):
+        return list(paths)
+    listings = set()
+    for obj in objects:
+        listings.update(normalise_path(path) for path in listing_paths(obj))
+
+    exported = {
+        (page['site'], page['path']): set(page['dependencies'])
+        for page in manifest['pages']}
+    return [
+        (site_id, path) for site_id, path in paths
+        if (site_id, path) not in exported or
+        exported[(site_id, path)] & changed or
+        path in listings
+    ]
+
+
+# RENDERING
+
+_clients = {}
+
+
+def output_file(output_dir, hostname, path):
+    parts = [output_dir]
+    if hostname:
+        parts.append(hostname)
+    parts += [part for part in path.split('/') if part]
+    return os.path.join(*(parts + ['index.html']))
+
+
+def write_file(filename, content):
+    # Write to a new file and swap it in, so the page is never half written
+    # for anyone reading it while we export
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(content)
+    os.replace(temp, filename)
+
+
+def export_page(job):
+    """
+    Render one page and write it to its file. Takes a single
+    (site id, hostname, port, path, output folder, folder per site) tuple so
+    it can be handed to a process pool. Returns the site id and path, the
+    status code, what the page was made from and an error message, if there
+    was one
+    """
+    site_id, hostname, port, path, output_dir, per_site = job
+    host = hostname if port == 80 else '%s:%d' % (hostname, port)
+    client = _clients.setdefault(host, Client(HTTP_HOST=host))
+
+    dependencies.start_recording()
+    try:
+        # We want the page as it's made, not a cached copy
+        with override_settings(PAGE_CACHE=False):
+            response = client.get(path)
+    except Exception as e:
+        # The test client passes on any error the page raises. We'd rather
+        # report it and carry on with the other pages
+        return site_id, path, 500, [], repr(e)
+    finally:
+        used = dependencies.stop_recording()
+
+    error = None
+    if response.status_code != 200:
+        error = "Status %d" % response.status_code
+    elif response.wsgi_request.META.get('CSRF_COOKIE_USED'):
+        # A page with a form needs a fresh CSRF token for every visitor
+        error = "Has a form, so can't be exported"
+    else:
+        filename = output_file(
+            output_dir, hostname if per_site else None, path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        write_file(filename, response.content)
+    return site_id, path, response.status_code, sorted(used), error
+
+
+def manifest_file(output_dir):
+    return os.path.abspath(output_dir).rstrip(os.sep) + '-manifest.json'
+
+
+def load_manifest(output_dir):
+    try:
+        with open(manifest_file(output_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def save_manifest(output_dir, prints, pages):
+    manifest = {
+        'fingerprints': prints,
+        'pages': [
+            {'site': site_id, 'path': path, 'dependencies': used}
+            for (site_id, path), used in sorted(pages.items())
+        ],
+    }
+    write_file(
+        manifest_file(output_dir),
+        json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+    old_manifest = os.path.join(output_dir, OLD_MANIFEST)
+    if os.path.exists(old_manifest):
+        os.remove(old_manifest)
+
+
+def remove_page(output_dir, hostname, path):
+    filename = output_file(output_dir, hostname, path)
+    if os.path.exists(filename):
+        os.remove(filename)
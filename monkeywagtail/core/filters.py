@@ -0,0 +1,145 @@
+import collections
+import hashlib
+
+from django.db.models import Q
+from django.utils.http import urlencode
+
+# LISTING FILTERS
+# The review and feature index pages can be filtered by the query string e.g.
+#
+#   /reviews/?genre=punk&genre=metal&rating=4
+#
+# Each index page lists what it can be filtered by as `Filter`s, e.g.
+#
+#   FILTERS = [
+#       Filter('rating', lookup='rating__gte', clean=whole_number(1, 5)),
+#       Filter('genre', multiple=True, subquery=genre_reviews),
+#   ]
+#
+# and the functions below read them from the request, apply them to a
+# queryset and make a cache key for the combination.
+#
+# * A filter with `multiple=True` takes every value given (checkboxes send
+#   `genre=punk&genre=metal`) and matches pages with any of them. Other
+#   filters take the last value, like `request.GET.get`.
+# * Values are tidied up by `clean` (anything it can't make sense of is
+#   dropped) and sorted, so `?genre=metal&genre=punk` and
+#   `?genre=punk&genre=metal` are the same filter with the same cache key.
+# * Filters across a relationship (an album's artists, say) use a
+#   `subquery`: a function that's given the values and returns a queryset of
+#   the matching page ids. The listing is then filtered with `pk__in`, which
+#   the database answers the same way as an EXISTS. Joining across the
+#   relationship instead would list a review once for each of its artists
+#   that matched, and fixing that with `distinct()` means sorting the whole
+#   list.
+#   https://docs.djangoproject.com/en/1.9/ref/models/querysets/#in
+
+
+class Filter(object):
+
+    def __init__(self, name, lookup=None, subquery=None, multiple=False,
+                 clean=None):
+        self.name = name
+        self.lookup = lookup
+        self.subquery = subquery
+        self.multiple = multiple
+        self.clean = clean or (lambda value: value)
+
+    def read(self, query_dict):
+        """
+        The cleaned values for this filter from a QueryDict, sorted and
+        without duplicates
+        """
+        values = query_dict.getlist(self.name)
+        if not self.multiple:
+            values = values[-1:]
+        cleaned = set()
+        for value in values:
+            value = self.clean(value.strip())
+            if value not in (None, ''):
+                cleaned.add(value)
+        return sorted(cleaned)
+
+    def apply(self, queryset, values):
+        if self.subquery is not None:
+            return queryset.filter(pk__in=self.subquery(values))
+        query = Q()
+        for value in values:
+            query |= Q(**{self.lookup: value})
+        return queryset.filter(query)
+
+
+# Cleaning values
+
+def whole_number(lowest=None, highest=None):
+    def clean(value):
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+        if lowest is not None and value < lowest:
+            return None
+        if highest is not None and value > highest:
+            return None
+        return value
+    return clean
+
+
+# Using filters
+
+def read_filters(filters, query_dict):
+    """
+    The values chosen for each of `filters`, e.g.
+    `{'genre': ['metal', 'punk'], 'rating': [4]}`. Filters without a value
+    are left out
+    """
+    selected = collections.OrderedDict()
+    for listing_filter in filters:
+        values = listing_filter.read(query_dict)
+        if values:
+            selected[listing_filter.name] = values
+    return selected
+
+
+def apply_filters(queryset, filters, selected, exclude=()):
+    """
+    Filter `queryset` by the `selected` values, except for the filters
+    named in `exclude` (handy for counting a filter's own options)
+    """
+    for listing_filter in filters:
+        values = selected.get(listing_filter.name)
+        if values and listing_filter.name not in exclude:
+            queryset = listing_filter.apply(queryset, values)
+    return queryset
+
+
+def query_string(selected):
+    return urlencode(sorted(selected.items()), doseq=True)
+
+
+def cache_key(selected, exclude=()):
+    """
+    A short key for a combination of filters, the same whatever order they
+    (and their values) came in
+    """
+    return hashlib.md5(query_string({
+        name: values for name, values in selected.items()
+        if name not in exclude
+    }).encode('utf-8')).hexdigest()
+
+
+def template_filters(filters, selected):
+    """
+    The selected values for templates and the `filters_query` tag: a list
+    for filters that take several values and a string for the rest, with ''
+    for those that aren't set
+    """
+    values = {}
+    for listing_filter in filters:
+        chosen = [
+            str(value) for value in selected.get(listing_filter.name, [])]
+        if listing_filter.multiple:
+            values[listing_filter.name] = chosen
+        else:
+            values[listing_filter.name] = chosen[0] if chosen else ''
+    return values
@@ -0,0 +1,42 @@
+from django.db.models import Func, IntegerField
+
+# DATABASE FUNCTIONS
+# Django 1.9 can't pull the year out of a date inside a query (Extract and
+# Trunc arrived in Django 1.10), so these small functions do it. Use them with
+# `annotate` to have the database work the value out for every row e.g.
+#
+#   Artist.objects.annotate(decade=Decade('date_formed'))
+#
+# rather than looping over the results in Python. PostgreSQL (which we run in
+# production) and SQLite spell it differently, hence the `as_sqlite` methods.
+# https://docs.djangoproject.com/en/1.9/ref/models/expressions/#func-expressions
+
+
+class Year(Func):
+    """
+    The year of a date e.g. 1977
+    """
+    template = 'EXTRACT(YEAR FROM %(expressions)s)::integer'
+
+    def __init__(self, expression, **extra):
+        super(Year, self).__init__(
+            expression, output_field=IntegerField(), **extra)
+
+    def as_sqlite(self, compiler, connection):
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(strftime('%%%%Y', %(expressions)s) AS integer)")
+
+
+class Decade(Year):
+    """
+    The decade a date falls in, as the first year of the decade e.g. 1970
+    """
+    template = '(EXTRACT(YEAR FROM %(expressions)s)::integer / 10 * 10)'
+
+    def as_sqlite(self, compiler, connection):
+        return self.as_sql(
+            compiler, connection,
+            template=(
+                "(CAST(strftime('%%%%Y', %(expressions)s) AS integer) "
+                "/ 10 * 10)"))
@@ -0,0 +1,209 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# REQUEST INSTRUMENTATION
+# For every request we note
+#
+# * the view that handled it: the type of page for Wagtail pages (e.g.
+#   'ReviewIndexPage') or the app and function for our own views (e.g.
+#   'artist.artist_detail')
+# * how many SQL queries it ran and how long they took
+# * how long its template took to render (see core/template_backends.py),
+#   along with any parts of templates wrapped in `{% timed %}` (see
+#   core/templatetags/instrumentation_tags.py)
+# * how many of the things it asked our caches for were there (see
+#   core/cache.py), and whether the whole page came from the page cache
+#
+# and log it as a line of JSON to the 'monkeywagtail.core.instrumentation'
+# logger, which production.py sends to monkeywagtail.log e.g.
+#
+#   {"cache_hits": 2, "cache_misses": 0, "path": "/reviews/",
+#    "queries": 14, "sql_ms": 9.2, "status": 200, "template_ms": 41.0,
+#    "templates": {"menu": 3.1}, "total_ms": 63.5, "view": "ReviewIndexPage"}
+#
+# The middleware that does this is in core/middleware.py.
+#
+# QUERY BUDGETS
+# QUERY_BUDGETS in settings sets the most queries each view should need e.g.
+# `{'ReviewIndexPage': 30}`, with QUERY_BUDGET_DEFAULT for views that aren't
+# listed. A request that goes over is logged as a warning or, with
+# QUERY_BUDGET_RAISE switched on (handy in tests), raises
+# QueryBudgetExceeded.
+#
+# We count queries by switching on the cursor Django uses to keep
+# `connection.queries` when DEBUG is on, which notes each query's SQL and
+# time, and looking at what was added during the request. We leave what was
+# there already alone, so `assertNumQueries` in tests still counts a request
+# made with the test client. The cursor is a little slower than the normal
+# one, which is why this is off unless REQUEST_INSTRUMENTATION is switched
+# on.
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def is_enabled():
+    return getattr(settings, 'REQUEST_INSTRUMENTATION', False)
+
+
+def current():
+    """
+    The stats for the request being handled, or None
+    """
+    return getattr(_local, 'stats', None)
+
+
+def last_query(connection):
+    return connection.queries_log[-1] if connection.queries_log else None
+
+
+def queries_since(connection, last):
+    """
+    The queries `connection` has run since `last` was its latest. The log
+    only keeps the last few thousand, so if `last` has dropped off the start
+    we get all of them
+    """
+    queries = []
+    for query in reversed(connection.queries_log):
+        if query is last:
+            break
+        queries.append(query)
+    return queries
+
+
+def start(request):
+    databases = {}
+    for connection in connections.all():
+        databases[connection.alias] = (
+            connection.force_debug_cursor, last_query(connection))
+        connection.force_debug_cursor = True
+
+    _local.stats = {
+        'path': request.path,
+        'view': None,
+        'started': time.time(),
+        'databases': databases,
+        'template_ms': 0.0,
+        'templates': {},
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'page_cache': None,
+    }
+    return _local.stats
+
+
+def stop():
+    """
+    Stop counting, and return the stats for the request with the queries
+    added up
+    """
+    stats = current()
+    _local.stats = None
+    if stats is None:
+        return None
+
+    queries = 0
+    sql_time = 0.0
+    for connection in connections.all():
+        force_debug_cursor, last = stats['databases'].get(
+            connection.alias, (False, None))
+        new_queries = queries_since(connection, last)
+        queries += len(new_queries)
+        sql_time += sum(float(query['time']) for query in new_queries)
+        connection.force_debug_cursor = force_debug_cursor
+
+    del stats['databases']
+    stats['queries'] = queries
+    stats['sql_ms'] = round(sql_time * 1000, 1)
+    stats['total_ms'] = round((time.time() - stats.pop('started')) * 1000, 1)
+    stats['template_ms'] = round(stats['template_ms'], 1)
+    return stats
+
+
+# NOTING
+
+def set_view(name):
+    stats = current()
+    if stats is not None:
+        stats['view'] = name
+
+
+def view_name(view_func):
+    """
+    e.g. 'artist.artist_detail' for monkeywagtail.artist.views.artist_detail
+    """
+    view_func = getattr(view_func, 'view_class', view_func)
+    module = view_func.__module__.split('.')
+    if module[0] == 'monkeywagtail' and len(module) > 1:
+        module = module[1:2]
+    return '%s.%s' % ('.'.join(module), view_func.__name__)
+
+
+def note_cache(hit):
+    stats = current()
+    if stats is not None:
+        stats['cache_hits' if hit else 'cache_misses'] += 1
+
+
+@contextlib.contextmanager
+def timed_render():
+    """
+    Add the time taken by the code inside to the request's template time.
+    Templates rendered by another template (e.g. StreamField blocks) are part
+    of its time already, so only the outermost is counted
+    """
+    if current() is None or getattr(_local, 'rendering', False):
+        yield
+        return
+    _local.rendering = True
+    started = time.time()
+    try:
+        yield
+    finally:
+        _local.rendering = False
+        note_template_time(None, time.time() - started)
+
+
+def note_template_time(name, seconds):
+    stats = current()
+    if stats is None:
+        return
+    ms = seconds * 1000
+    if name is None:
+        stats['template_ms'] += ms
+    else:
+        stats['templates'][name] = round(
+            stats['templates'].get(name, 0.0) + ms, 1)
+
+
+# BUDGETS
+
+def query_budget(view):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+def report(stats, status_code):
+    stats['status'] = status_code
+    budget = query_budget(stats['view'])
+    stats['query_budget'] = budget
+    message = json.dumps(stats, sort_keys=True)
+    if budget is None or stats['queries'] <= budget:
+        logger.info(message, extra={'instrumentation': stats})
+        return
+    logger.warning(message, extra={'instrumentation': stats})
+    if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+        raise QueryBudgetExceeded(
+            "%s ran %d queries for %s, its budget is %d" % (
+                stats['view'], stats['queries'], stats['path'], budget))
@@ -0,0 +1,103 @@
+import datetime
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from wagtail.wagtailcore.models import Site
+
+from monkeywagtail.core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the site's main pages through the test client and report "
+        "how long they take (median, 90th and 99th percentile) and how many "
+        "queries they run. Have a look at core/benchmark.py"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help="How many times to request each page")
+        parser.add_argument(
+            '--warmup', type=int, default=2,
+            help="How many requests to make before timing each page")
+        parser.add_argument(
+            '--samples', type=int, default=5,
+            help="How many artist, author and genre pages to request")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help="Empty the cache before every request")
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help="Leave the page cache on (see core/pagecache.py)")
+        parser.add_argument(
+            '--output', help="Save the results to this JSON file")
+        parser.add_argument(
+            '--compare', help="Compare with results saved by --output")
+        parser.add_argument(
+            '--tolerance', type=float, default=benchmark.DEFAULT_TOLERANCE,
+            help="How much slower (0.2 is 20%%) a page can get before it "
+                 "counts as a regression")
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help="Exit with an error if anything got slower or runs more "
+                 "queries than in --compare")
+
+    def handle(self, *args, **options):
+        site = Site.objects.filter(is_default_site=True).first()
+        if site is None:
+            raise CommandError("There's no default site to benchmark")
+
+        urls = benchmark.benchmark_urls(options['samples'], options['seed'])
+        with override_settings(
+                ALLOWED_HOSTS=['*'],
+                PAGE_CACHE=options['page_cache'],
+                # The instrumentation counts queries too, which would slow
+                # every request down a little
+                REQUEST_INSTRUMENTATION=False):
+            results = benchmark.run(
+                urls, options['repeat'], options['warmup'],
+                host=site.hostname if site.port == 80 else '%s:%d' % (
+                    site.hostname, site.port),
+                before_each=cache.clear if options['cold'] else None,
+                log=self.stdout.write if options['verbosity'] > 1 else None)
+
+        self.stdout.write(
+            "%-26s %8s %9s %9s %9s %9s %8s %8s" % (
+                'group', 'requests', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms',
+                'queries', 'max'))
+        for group, result in sorted(results.items()):
+            self.stdout.write(
+                "%-26s %8d %9.1f %9.1f %9.1f %9.1f %8.1f %8d%s" % (
+                    group, result['requests'], result['p50'], result['p90'],
+                    result['p99'], result['max'], result['mean_queries'],
+                    result['max_queries'],
+                    '' if result['statuses'] == [200] else
+                    '  status %s' % result['statuses']))
+
+        if options['output']:
+            options_used = {
+                key: options[key] for key in (
+                    'repeat', 'warmup', 'samples', 'seed', 'cold',
+                    'page_cache')
+            }
+            options_used['date'] = datetime.datetime.now().isoformat()
+            benchmark.save(options['output'], results, options_used)
+            self.stdout.write("Saved the results to %s" % options['output'])
+
+        if options['compare']:
+            regressions = benchmark.compare(
+                benchmark.load(options['compare']), results,
+                options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(regression)
+            if not regressions:
+                self.stdout.write(
+                    "Nothing's slower or running more queries than in %s" % (
+                        options['compare']))
+            elif options['fail_on_regression']:
+                raise CommandError(
+                    "%d regressions since %s" % (
+                        len(regressions), options['compare']))
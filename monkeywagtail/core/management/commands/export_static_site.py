@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from wagtail.wagtailcore.models import Site
+
+from monkeywagtail.core import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every live page, and the artist, genre and author pages, to "
+        "static HTML files. Only pages made from something that's changed "
+        "since the last export are rendered again, unless you pass --full. "
+        "Have a look at core/export.py"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.STATIC_SITE_ROOT,
+            help="Where to write the files (defaults to STATIC_SITE_ROOT)")
+        parser.add_argument(
+            '--processes', type=int, default=multiprocessing.cpu_count(),
+            help="How many pages to render at once (defaults to one per CPU)")
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Render every page, whether it's changed or not")
+
+    def handle(self, *args, **options):
+        output_dir = options['output']
+        os.makedirs(output_dir, exist_ok=True)
+
+        sites = {site.pk: site for site in Site.objects.all()}
+        # With more than one site each gets its own folder, named after its
+        # hostname
+        per_site = len(sites) > 1
+
+        manifest = None if options['full'] else export.load_manifest(
+            output_dir)
+        paths = export.export_paths()
+        prints = export.fingerprints()
+        todo = export.paths_to_export(manifest, paths, prints)
+        self.stdout.write("%d pages, %d to render" % (len(paths), len(todo)))
+
+        # Keep what we know about the pages we aren't rendering again, and
+        # remove the files of pages that have gone
+        pages = {}
+        current = set(paths)
+        for page in (manifest or {}).get('pages', []):
+            site_path = (page['site'], page['path'])
+            if site_path in current:
+                pages[site_path] = page['dependencies']
+            elif page['site'] in sites:
+                export.remove_page(
+                    output_dir,
+                    sites[page['site']].hostname if per_site else None,
+                    page['path'])
+
+        jobs = [
+            (site_id, sites[site_id].hostname, sites[site_id].port, path,
+             output_dir, per_site)
+            for site_id, path in todo
+        ]
+
+        started = time.time()
+        if jobs and options['processes'] > 1:
+            # Each process needs its own database connection. Closing ours
+            # before the pool starts means none of them inherit it
+            connections.close_all()
+            pool = multiprocessing.Pool(options['processes'])
+            results = pool.imap_unordered(
+                export.export_page, jobs,
+                max(len(jobs) // (options['processes'] * 4), 1))
+        else:
+            pool = None
+            results = map(export.export_page, jobs)
+
+        errors = 0
+        for site_id, path, status, used, error in results:
+            if error:
+                errors += 1
+                pages.pop((site_id, path), None)
+                self.stderr.write("%s: %s" % (path, error))
+            else:
+                pages[(site_id, path)] = used
+        elapsed = time.time() - started
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+        export.save_manifest(output_dir, prints, pages)
+
+        rendered = len(jobs) - errors
+        self.stdout.write(
+            "Rendered %d pages in %.1fs (%.1f pages/second), %d failed" % (
+                rendered, elapsed, rendered / elapsed if elapsed else 0,
+                errors))
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from monkeywagtail.core.catalogue import Catalogue, delete_catalogue
+
+
+class Command(BaseCommand):
+    help = (
+        "Make a synthetic catalogue of artists, albums, genres, authors, "
+        "images, reviews, features, news and tours to try the site out (and "
+        "benchmark it) at a realistic size. Have a look at core/catalogue.py"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artists', type=int, default=500)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument(
+            '--subgenres', type=int, default=3,
+            help="Roughly how many subgenres each genre has")
+        parser.add_argument('--authors', type=int, default=25)
+        parser.add_argument('--images', type=int, default=50)
+        parser.add_argument(
+            '--reviews', type=int, default=1000,
+            help="How many albums to review. Albums are made for each "
+                 "artist, a few each")
+        parser.add_argument('--features', type=int, default=300)
+        parser.add_argument('--news', type=int, default=300)
+        parser.add_argument('--tours', type=int, default=100)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="The same seed makes the same catalogue")
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help="What the slugs of everything made start with")
+        parser.add_argument(
+            '--delete', action='store_true',
+            help="Delete the catalogue made with --prefix instead")
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            with transaction.atomic():
+                deleted = delete_catalogue(options['prefix'])
+            self.stdout.write("Deleted %d objects" % deleted)
+            return
+
+        counts = {
+            kind: options[kind] for kind in (
+                'artists', 'genres', 'subgenres', 'authors', 'images',
+                'reviews', 'features', 'news', 'tours')
+        }
+        if counts['artists'] < 1 or counts['genres'] < 1 or (
+                counts['authors'] < 1):
+            raise CommandError(
+                "We need at least one artist, genre and author to relate "
+                "everything else to")
+
+        catalogue = Catalogue(
+            counts, prefix=options['prefix'], seed=options['seed'],
+            log=self.stdout.write)
+        start = time.time()
+        # Making every rendition of every image as it's saved would take
+        # longer than the rest put together. Run generate_renditions after
+        with override_settings(PREGENERATE_RENDITIONS=False):
+            try:
+                with transaction.atomic():
+                    catalogue.generate()
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        call_command('rebuild_review_facets', stdout=self.stdout)
+        self.stdout.write(
+            "Made the catalogue in %.1fs. Run `./manage.py "
+            "generate_renditions` to make the image renditions" % (
+                time.time() - start))
@@ -0,0 +1,72 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from wagtail.wagtailimages.models import get_image_model
+
+from monkeywagtail.core.renditions import (
+    discover_filter_specs, generate_rendition, missing_renditions)
+
+
+class Command(BaseCommand):
+    help = (
+        "Make every image rendition the site's templates ask for, so that "
+        "visitors don't have to wait for them. Renditions that already exist "
+        "are skipped. Have a look at core/renditions.py"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=multiprocessing.cpu_count(),
+            help="How many images to resize at once (defaults to one per CPU)")
+        parser.add_argument(
+            '--spec', action='append', dest='specs',
+            help="Only make renditions with this filter spec e.g. "
+                 "fill-400x400. Can be given more than once")
+        parser.add_argument(
+            '--image', action='append', type=int, dest='images',
+            help="Only make renditions of the image with this id")
+
+    def handle(self, *args, **options):
+        specs = options['specs'] or discover_filter_specs()
+        self.stdout.write("Filter specs: %s" % ', '.join(specs))
+
+        images = get_image_model().objects.only(
+            'pk', 'focal_point_x', 'focal_point_y',
+            'focal_point_width', 'focal_point_height')
+        if options['images']:
+            images = images.filter(pk__in=options['images'])
+
+        jobs = missing_renditions(list(images), specs)
+        total = len(jobs)
+        self.stdout.write("%d renditions to make" % total)
+        if not jobs:
+            return
+
+        if options['processes'] > 1:
+            # Each process needs its own database connection. Closing ours
+            # before the pool starts means none of them inherit it
+            connections.close_all()
+            pool = multiprocessing.Pool(options['processes'])
+            results = pool.imap_unordered(generate_rendition, jobs)
+        else:
+            pool = None
+            results = map(generate_rendition, jobs)
+
+        errors = 0
+        step = max(total // 20, 1)
+        for done, (image_id, spec, error) in enumerate(results, 1):
+            if error:
+                errors += 1
+                self.stderr.write(
+                    "Image %d, %s: %s" % (image_id, spec, error))
+            if done % step == 0 or done == total:
+                self.stdout.write("%d/%d (%d%%)" % (
+                    done, total, 100 * done // total))
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+        self.stdout.write("Made %d renditions, %d failed" % (
+            total - errors, errors))
@@ -0,0 +1,39 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from monkeywagtail.core import dependencies
+
+
+class Command(BaseCommand):
+    help = (
+        "List the cached pages that were made using an object, i.e. the pages "
+        "that are thrown away when it changes e.g. "
+        "`./manage.py page_cache_dependents artist.Artist 5`. "
+        "Have a look at core/dependencies.py"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model', help="e.g. artist.Artist or review.ReviewPage")
+        parser.add_argument('pk', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        try:
+            obj = model.objects.get(pk=options['pk'])
+        except model.DoesNotExist:
+            raise CommandError(
+                "There's no %s with id %d" % (options['model'], options['pk']))
+
+        paths = sorted(dependencies.dependent_paths(obj))
+        for site_id, path in paths:
+            self.stdout.write("site %d  %s" % (site_id, path))
+        dependents = getattr(obj, 'cache_dependents', None)
+        if dependents is not None:
+            self.stdout.write("Also cleared when it changes: %s" % ', '.join(
+                dependents()))
+        if not paths:
+            self.stdout.write("No cached pages were made using %s" % obj)
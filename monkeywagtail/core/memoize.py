@@ -0,0 +1,78 @@
+import functools
+
+# REMEMBERED RELATIONSHIPS
+# Our models have methods like `album.artists()` or `page.authors()` that walk
+# a ParentalKey relationship and hand back the things at the other end. A
+# template will often call them more than once (`Album.__str__` calls
+# `artist_name()`, which calls `artists()`...) and each call was a fresh query,
+# plus one more for every artist at the other end.
+#
+# `@cached_relation` remembers what the method returned the first time it's
+# called on that object, so later calls cost nothing. `related_objects` does
+# the fetching: it uses the rows `prefetch_related` has already fetched if
+# there are some (see core/prefetch.py), and otherwise fetches the rows along
+# with the objects at the other end in a single query.
+#
+# The remembered values belong to the object, so they go when the object does
+# (at the end of the request). They're also forgotten when the object is saved
+# or reloaded from the database. If you change a relationship in memory
+# without saving, e.g.
+#
+#   album.album_artist_relationship = [AlbumArtistRelationship(...)]
+#
+# call `album.clear_cached_relations()` before asking for `album.artists()`
+# again.
+
+CACHE_ATTRIBUTE = '_cached_relations'
+
+
+def related_objects(instance, relation, field):
+    """
+    The objects at the far end of a relationship, e.g.
+    `related_objects(album, 'album_artist_relationship', 'artist_name')` for
+    the album's artists
+    """
+    manager = getattr(instance, relation)
+    prefetched = getattr(instance, '_prefetched_objects_cache', {})
+    if relation in prefetched:
+        rows = manager.all()
+    else:
+        rows = manager.select_related(field)
+    return [getattr(row, field) for row in rows]
+
+
+def cached_relation(method):
+    """
+    Remember what `method` returns for each object. The method stays a method
+    so templates (`{% for artist in album.artists %}`) and code
+    (`album.artists()`) carry on calling it the same way
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+        cache = self.__dict__.setdefault(CACHE_ATTRIBUTE, {})
+        if name not in cache:
+            cache[name] = method(self)
+        return cache[name]
+    return wrapper
+
+
+class CachedRelationsMixin(object):
+    """
+    Forgets the values remembered by `@cached_relation` methods when the
+    object is saved or reloaded. Put it first in the list of classes a model
+    inherits from so its `save` runs
+    """
+
+    def clear_cached_relations(self):
+        self.__dict__.pop(CACHE_ATTRIBUTE, None)
+
+    def save(self, *args, **kwargs):
+        self.clear_cached_relations()
+        return super(CachedRelationsMixin, self).save(*args, **kwargs)
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.clear_cached_relations()
+        return super(CachedRelationsMixin, self).refresh_from_db(
+            *args, **kwargs)
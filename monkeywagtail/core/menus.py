@@ -0,0 +1,77 @@
+from django.conf import settings
+from wagtail.wagtailcore.models import Page
+
+# MENU TREE
+# `top_menu_children` in core/templatetags/navigation_tags.py asks the database
+# for the children of a page, then for each child asks whether it has children
+# of its own, then asks for those children. That's 1 + 2n queries for one level
+# of dropdowns, and it gets worse the deeper you go.
+#
+# Wagtail stores pages in a tree using Treebeard's 'materialised path' approach
+# https://django-treebeard.readthedocs.io/en/latest/mp_tree.html
+# Every page has a `path` made up of its parent's path plus four characters
+# e.g. the homepage might be `00010001` and its first child `000100010001`. So
+# "every page below the homepage" is simply every page whose path starts with
+# `00010001`, and ordering by path gives us the pages in tree order (each page
+# directly followed by its children).
+#
+# `build_menu_tree` uses that to fetch every live, in-menu page we need in one
+# query and then puts the tree together in Python.
+
+
+def get_menu_pages(root, depth=None):
+    """
+    All live, in-menu pages below `root`, down to `depth` levels, in tree order
+    """
+    depth = depth or settings.MENU_DEPTH
+    return Page.objects.live().in_menu().filter(
+        path__startswith=root.path,
+        depth__gt=root.depth,
+        depth__lte=root.depth + depth,
+    ).order_by('path')
+
+
+def build_menu_tree(root, depth=None):
+    """
+    Return the top level menu items below `root`. Each item has a
+    `menu_children` list of its own menu items (and so on down to `depth`) and
+    a `has_dropdown` flag, which is what `has_menu_children` gives you.
+
+    A page that is hidden from menus hides everything below it too, the same
+    as calling `get_children().live().in_menu()` level by level would.
+    """
+    steplen = Page.steplen
+    items = {root.path: root}
+    root.menu_children = []
+
+    for page in get_menu_pages(root, depth):
+        # Because the pages come back in path order a parent is always seen
+        # before its children. If the parent isn't here it was hidden, so we
+        # leave its children out as well
+        parent = items.get(page.path[:-steplen])
+        if parent is None:
+            continue
+        page.menu_children = []
+        parent.menu_children.append(page)
+        items[page.path] = page
+
+    for page in items.values():
+        page.has_dropdown = bool(page.menu_children)
+
+    return root.menu_children
+
+
+def set_active(menuitems, calling_page):
+    """
+    Mark the menu items that contain `calling_page` (or are it) as active.
+    We compare `url_path`s (rather than `url`, as `top_menu` does) so we don't
+    have to work out the full URL of every page in the tree
+    """
+    for menuitem in menuitems:
+        # We don't directly check if calling_page is None since the template
+        # engine can pass an empty string to calling_page
+        # if the variable passed as calling_page does not exist.
+        menuitem.active = (
+            calling_page.url_path.startswith(menuitem.url_path)
+            if calling_page else False)
+        set_active(menuitem.menu_children, calling_page)
@@ -0,0 +1,64 @@
+from monkeywagtail.core import dependencies, instrumentation, pagecache
+
+
+class InstrumentationMiddleware(object):
+    """
+    Count the queries, SQL time, template time and cache hits for each
+    request, and log them against the view or type of page that handled it.
+    Have a look at core/instrumentation.py.
+
+    It goes first in MIDDLEWARE_CLASSES so it counts everything the other
+    middleware does too (including serving pages from the page cache)
+    """
+
+    def process_request(self, request):
+        if instrumentation.is_enabled():
+            instrumentation.start(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Wagtail pages all go through the same view, so the type of page is
+        # noted later by a `before_serve_page` hook (see core/wagtail_hooks.py)
+        instrumentation.set_view(instrumentation.view_name(view_func))
+
+    def process_response(self, request, response):
+        stats = instrumentation.stop()
+        if stats is not None:
+            stats['page_cache'] = response.get('X-Page-Cache')
+            instrumentation.report(stats, response.status_code)
+        return response
+
+
+class PageCacheMiddleware(object):
+    """
+    Serve visitors who aren't logged in a copy of the page from the cache
+    when there is one, and keep a copy of the page when there isn't. Have a
+    look at core/pagecache.py. While a page is made for the cache we note
+    what it was made from (see core/dependencies.py).
+
+    It needs `request.user` and `request.site`, so it goes after
+    AuthenticationMiddleware and SiteMiddleware in MIDDLEWARE_CLASSES
+    """
+
+    def process_request(self, request):
+        if not pagecache.is_cacheable_request(request):
+            return None
+        response = pagecache.get_cached_response(request)
+        if response is not None:
+            request._page_cache_hit = True
+            response['X-Page-Cache'] = 'hit'
+        else:
+            dependencies.start_recording()
+            request._page_cache_recording = True
+        return response
+
+    def process_response(self, request, response):
+        if getattr(request, '_page_cache_hit', False):
+            return response
+        used = set()
+        if getattr(request, '_page_cache_recording', False):
+            used = dependencies.stop_recording()
+        if (pagecache.is_cacheable_request(request) and
+                pagecache.is_cacheable_response(request, response)):
+            pagecache.cache_response(request, response, used)
+            response['X-Page-Cache'] = 'miss'
+        return response
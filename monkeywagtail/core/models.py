@@ -73,3 +73,42 @@ class RelatedPage(Orderable, models.Model):
     panels = [
         PageChooserPanel('page'),
     ]
+
+
+# Relationships without repeats
+class DistinctRelationshipsMixin(object):
+    """
+    The relationship tables (e.g. an album's artists) can only link a page to
+    each artist, album etc once, see the `unique_together`s on them. If an
+    editor picks the same one twice we quietly keep the first rather than
+    fail on the unique index when the page is saved. Put it before
+    CachedRelationsMixin in the list of classes a model inherits from
+    """
+
+    def drop_repeated_children(self):
+        children = getattr(self, '_cluster_related_objects', {})
+        for relation_name, items in children.items():
+            relation = self._meta.get_field(relation_name)
+            unique_together = relation.related_model._meta.unique_together
+            if not unique_together:
+                continue
+            attnames = [
+                [relation.related_model._meta.get_field(name).attname
+                 for name in fields if name != relation.field.name]
+                for fields in unique_together
+            ]
+            seen = set()
+            kept = []
+            for item in items:
+                keys = [
+                    (i, tuple(getattr(item, attname) for attname in names))
+                    for i, names in enumerate(attnames)
+                ]
+                if not seen.intersection(keys):
+                    kept.append(item)
+                    seen.update(keys)
+            children[relation_name] = kept
+
+    def save(self, *args, **kwargs):
+        self.drop_repeated_children()
+        return super(DistinctRelationshipsMixin, self).save(*args, **kwargs)
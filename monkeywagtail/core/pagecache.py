@@ -0,0 +1,238 @@
+import hashlib
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+from wagtail.wagtailcore.models import Site
+
+from monkeywagtail.core import dependencies
+from monkeywagtail.core.cache import bump_generation, get_generation, make_key
+
+logger = logging.getLogger(__name__)
+
+# PAGE CACHE
+# Our pages only change when something is published, but every visit renders
+# them from scratch. The page cache keeps a copy of each page as it was sent
+# to a visitor who wasn't logged in, and hands that copy to the next visitor
+# who isn't logged in either. Editors (and anyone else logged in) always get a
+# freshly rendered page. The middleware that does this is in
+# core/middleware.py.
+#
+# Copies are kept per site, path and query string, so `/reviews/?page=2` is
+# kept separately from `/reviews/`. The query string is sorted first, so
+# `?a=1&b=2` and `?b=2&a=1` share a copy.
+#
+# Every path has its own generation (see core/cache.py), so when a review is
+# published we can throw away the copies of just the pages that show it: the
+# review, the reviews index, the home page, the artist pages for the album's
+# artists and any other page the review was used to make. Have a look at
+# `purge_urls` below, core/dependencies.py and core/signals.py.
+#
+# Changes that can show up on any page (a page appearing in the menu, a page
+# moving) bump the 'pagecache' generation instead, which throws every copy
+# away at once.
+
+EXCLUDED_PATHS = [
+    '/admin/',
+    '/django-admin/',
+    '/documents/',
+    # Search results are cached (and searches counted) by search/service.py
+    '/search/',
+]
+
+
+def normalise_path(path):
+    if not path.startswith('/'):
+        path = '/' + path
+    if not path.endswith('/'):
+        path += '/'
+    return path
+
+
+def normalise_query_string(query_dict):
+    return urlencode(sorted(query_dict.lists()), doseq=True)
+
+
+def hashed(value):
+    return hashlib.md5(value.encode('utf-8')).hexdigest()
+
+
+def path_generation_name(site_id, path):
+    # Paths can contain characters a cache key can't, so we hash them
+    return 'page:%s:%s' % (site_id, hashed(normalise_path(path)))
+
+
+def page_cache_key(request):
+    path_name = path_generation_name(request.site.pk, request.path)
+    return make_key(
+        'pagecache', path_name, get_generation(path_name),
+        hashed(normalise_query_string(request.GET)))
+
+
+def is_cacheable_request(request):
+    if not getattr(settings, 'PAGE_CACHE', False):
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if getattr(request, 'site', None) is None:
+        return False
+    user = getattr(request, 'user', None)
+    if user is None or user.is_authenticated():
+        return False
+    return not any(request.path.startswith(path) for path in getattr(
+        settings, 'PAGE_CACHE_EXCLUDED_PATHS', EXCLUDED_PATHS))
+
+
+def is_cacheable_response(request, response):
+    # Only keep ordinary, successful responses that are the same for everyone.
+    # A page with a form (e.g. a `{% csrf_token %}`) or that sets a cookie is
+    # particular to the visitor it was made for
+    return (
+        response.status_code == 200 and
+        not response.streaming and
+        not response.cookies and
+        not request.META.get('CSRF_COOKIE_USED') and
+        'no-cache' not in response.get('Cache-Control', '') and
+        not getattr(request, 'is_preview', False)
+    )
+
+
+def get_cached_response(request):
+    return cache.get(page_cache_key(request))
+
+
+def cache_response(request, response, used=None):
+    """
+    Keep `response` for the next visitor, and note that the page depends on
+    the objects in `used` (see core/dependencies.py)
+    """
+    timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60)
+    cache.set(page_cache_key(request), response, timeout)
+    dependencies.record(
+        request.site.pk, normalise_path(request.path), used, timeout)
+
+
+# PURGING
+
+def purge_paths(site_id, paths, root_url=None):
+    """
+    Throw away the cached copies of `paths` on one site, and pass them on to
+    the front end cache (e.g. Varnish) when it's set up in production.py
+    """
+    paths = sorted(set(normalise_path(path) for path in paths if path))
+    for path in paths:
+        bump_generation(path_generation_name(site_id, path))
+
+    if root_url and apps.is_installed('wagtail.contrib.wagtailfrontendcache'):
+        from wagtail.contrib.wagtailfrontendcache.utils import (
+            purge_url_from_cache)
+        for path in paths:
+            purge_url_from_cache(root_url + path)
+    return paths
+
+
+def purge_all():
+    bump_generation('pagecache')
+
+
+def dependent_paths_by_site(obj, paths=()):
+    """
+    {site id: (root url, paths)} for every cached page made using `obj`,
+    along with `paths` on every site
+    """
+    by_site = {}
+    for site_id, root_path, root_url in Site.get_site_root_paths():
+        by_site[site_id] = (root_url, set(paths))
+    for site_id, path in dependencies.dependent_paths(obj):
+        if site_id in by_site:
+            by_site[site_id][1].add(path)
+    return by_site
+
+
+def purge_paths_by_site(by_site):
+    purged = []
+    for site_id, (root_url, site_paths) in by_site.items():
+        purged += purge_paths(site_id, site_paths, root_url)
+    return purged
+
+
+def purge_dependent_paths(obj, paths=()):
+    """
+    Throw away every cached page made using `obj`, along with `paths` on
+    every site
+    """
+    by_site = dependent_paths_by_site(obj, paths)
+    dependencies.forget(obj)
+    return purge_paths_by_site(by_site)
+
+
+def object_dependents(obj):
+    dependents = getattr(obj, 'cache_dependents', None)
+    return dependents() if dependents else []
+
+
+def purge_object(obj):
+    """
+    Throw away everything cached that shows a snippet (an artist, album,
+    author or genre), and anything its `cache_dependents()` method adds
+    """
+    paths = purge_dependent_paths(obj, object_dependents(obj))
+    logger.info("Purged %d cached pages for %r", len(paths), obj)
+    return paths
+
+
+def deleted_object_purge(obj):
+    """
+    The same as `purge_object` for a snippet that's being deleted, in two
+    steps. The pages to throw away are worked out now, while the snippet
+    still has its id and relationships (Django forgets the id once it's
+    deleted it). What's returned throws them away when called, which we do
+    once the delete is committed
+    """
+    key = dependencies.object_key(obj)
+    by_site = dependent_paths_by_site(obj, object_dependents(obj))
+    name = repr(obj)
+
+    def purge():
+        dependencies.forget_key(key)
+        paths = purge_paths_by_site(by_site)
+        logger.info("Purged %d cached pages for %s", len(paths), name)
+        return paths
+    return purge
+
+
+def page_path(page):
+    # The path of a page within its site. `page.url` would include the
+    # domain if we ever ran more than one site
+    url_parts = page.get_url_parts() if page is not None else None
+    return url_parts[2] if url_parts else None
+
+
+def purge_urls(page):
+    """
+    The paths whose pages show `page`: the page itself, the index page it's
+    listed on, the home page, and anything the page type adds with a
+    `cache_dependents()` method (e.g. ReviewPage adds the album's artists)
+    """
+    paths = [page_path(page), page_path(page.get_parent()), '/']
+    dependents = getattr(page, 'cache_dependents', None)
+    if dependents is not None:
+        paths += dependents()
+    return [path for path in paths if path]
+
+
+def purge_page(page):
+    """
+    Throw away everything cached that shows `page`. Pages that appear in the
+    menu, or that have pages beneath them (and so appear in breadcrumbs),
+    can show up anywhere, so they throw away everything
+    """
+    page = page.specific
+    if page.show_in_menus or not page.is_leaf():
+        purge_all()
+
+    paths = purge_dependent_paths(page, purge_urls(page))
+    logger.info("Purged %d cached pages for %r", len(paths), page)
+    return paths
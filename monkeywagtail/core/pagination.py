@@ -0,0 +1,216 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db.models import Q
+from django.utils import six
+
+# PAGINATION
+# All of our listings (artists, authors, reviews and features) paginate through
+# the `paginate` function below so they behave the same way.
+#
+# By default we use Django's Paginator, which gives us `?page=3` URLs and a
+# "3/10" count. To get that count Django runs a `COUNT(*)` and to get to page
+# 3 it asks the database to skip (OFFSET) the first 2 pages worth of rows. The
+# deeper you go the more rows the database has to step over, so page 5,000 of
+# the artist list is a lot slower than page 1.
+#
+# Setting `CURSOR_PAGINATION = True` (see settings/base.py) switches to keyset
+# (or 'cursor') pagination instead. Rather than a page number each 'next' link
+# carries an opaque `?after=` token holding the sort values of the last item
+# on the page (e.g. its title and id). The next page is then "the first 20
+# items that sort after this one", which the database can answer straight
+# from an index however deep you are. The trade off is that you only get
+# 'next' and 'first' links, there's no total and no jumping to page 37.
+#
+# Good write up of the approach at https://use-the-index-luke.com/no-offset
+
+
+def paginate(request, objects, per_page=None):
+    """
+    Paginate a queryset using whichever pagination mode the site is set to use
+    """
+    per_page = per_page or settings.DEFAULT_PER_PAGE
+
+    # Cursors only work for orderings made of plain fields on the model (see
+    # `get_keyset`), anything else gets numbered pages
+    if getattr(settings, 'CURSOR_PAGINATION', False) and get_keyset(objects):
+        return cursor_paginate(objects, request.GET.get('after'), per_page)
+
+    paginator = Paginator(objects, per_page)
+    try:
+        pages = paginator.page(request.GET.get('page'))
+    except PageNotAnInteger:
+        # If page is not an integer, deliver first page.
+        pages = paginator.page(1)
+    except EmptyPage:
+        # If page is out of range (e.g. 9999), deliver last page of results.
+        pages = paginator.page(paginator.num_pages)
+    return pages
+
+
+class CursorPage(object):
+    """
+    A page of results from `cursor_paginate`. It quacks enough like Django's
+    Page that templates can loop over it and ask `has_other_pages`
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, cursor, next_cursor):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        # We can't step backwards, but anything other than the first page can
+        # link back to the start
+        return self.cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def get_model_field(model, name):
+    if name == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def get_keyset(objects):
+    """
+    Return the fields a queryset is ordered by, with the primary key added on
+    the end so that items with the same title (or date) have a stable order.
+
+    Returns None if the queryset is ordered by something we can't read back
+    off the last item on a page: a field on a related model (`album__title`),
+    an annotation, an expression or a random ('?') order
+    """
+    ordering = list(objects.query.order_by or objects.model._meta.ordering)
+    if not ordering:
+        return ['pk']
+
+    for field in ordering:
+        if not isinstance(field, six.string_types) or '__' in field:
+            return None
+        try:
+            get_model_field(objects.model, field.lstrip('-'))
+        except FieldDoesNotExist:
+            return None
+
+    if ordering[-1].lstrip('-') not in ('pk', 'id'):
+        ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+    return ordering
+
+
+def encode_cursor(values):
+    values = [
+        value.isoformat()
+        if isinstance(value, (datetime.date, datetime.datetime)) else value
+        for value in values
+    ]
+    # We use isoformat rather than DjangoJSONEncoder since the encoder drops
+    # microseconds, and we need the exact value to find our place again
+    data = json.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    padding = '=' * (-len(cursor) % 4)
+    data = base64.urlsafe_b64decode((cursor + padding).encode('ascii'))
+    return json.loads(data.decode('utf-8'))
+
+
+def check_value(field, value):
+    # to_python converts the value (and raises ValidationError if it can't)
+    # and the validators catch values the database would choke on, like a
+    # number too big for the column
+    value = field.to_python(value)
+    if value is not None:
+        field.run_validators(value)
+    return value
+
+
+def read_cursor(cursor, model, fields):
+    """
+    Turn an `?after=` token back into the values of `fields`, or None if it
+    isn't a token we could have made. Anyone can type a token into the URL so
+    every value is checked (and converted, e.g. dates) by its model field
+    before it goes near a query
+    """
+    try:
+        values = decode_cursor(cursor)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+
+    # Our cursors only ever hold strings, numbers and booleans. None can't be
+    # compared against (and to_python turns '' into None for some fields)
+    if not all(isinstance(value, (six.string_types, int, float, bool))
+               for value in values):
+        return None
+    try:
+        values = [
+            check_value(get_model_field(model, field), value)
+            for field, value in zip(fields, values)
+        ]
+    except (TypeError, ValueError, OverflowError, ValidationError):
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def cursor_paginate(objects, cursor, per_page):
+    keyset = get_keyset(objects)
+    fields = [field.lstrip('-') for field in keyset]
+    objects = objects.order_by(*keyset)
+
+    values = None
+    if cursor:
+        values = read_cursor(cursor, objects.model, fields)
+        if values is None:
+            # A mangled token is treated like a mangled page number, we
+            # deliver the first page
+            cursor = None
+
+    if values is not None:
+        # For an ordering of (title, id) "after" means
+        # title > x OR (title = x AND id > y)
+        # and we flip > to < for any field sorted in descending order
+        after = Q()
+        for i, field in enumerate(keyset):
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            clause = Q(**{fields[i] + lookup: values[i]})
+            for j in range(i):
+                clause &= Q(**{fields[j]: values[j]})
+            after |= clause
+        objects = objects.filter(after)
+
+    # Grab one more than we need so we know if there is a next page without
+    # having to count anything
+    object_list = list(objects[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        last = object_list[-1]
+        next_cursor = encode_cursor([
+            getattr(last, get_model_field(objects.model, field).attname)
+            for field in fields])
+
+    return CursorPage(object_list, cursor, next_cursor)
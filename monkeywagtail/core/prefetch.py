@@ -0,0 +1,157 @@
+from django.db.models import Prefetch
+
+# PREFETCH PLANS
+# Templates across the site walk the many-to-many relationships we define with
+# ParentalKeys (e.g. `album.artist_name`, `feature.genres`). Each of those
+# calls runs `{related_name}.all()` which, on its own, is a query per object.
+# Loop over 50 albums and that's 50+ queries before you've even got to the
+# genres.
+#
+# `prefetch_related` fixes that by grabbing every relationship row for every
+# object in a single query and stashing them on the instance. When the model
+# method later calls `.all()` Django hands back the stashed rows rather than
+# going to the database. modelcluster's ParentalKey manager supports this
+# out of the box.
+#
+# A `Prefetch` object lets us pass our own queryset for the relationship, which
+# is how we `select_related` the other end of the relationship (the artist,
+# genre or author) in the same query.
+# https://docs.djangoproject.com/en/1.9/ref/models/querysets/#prefetch-objects
+#
+# Each function returns a list of Prefetch objects. Pass a `prefix` to use the
+# plan from a different starting point e.g. `album_prefetches('album__')` when
+# you're prefetching from a review relationship rather than from an album.
+#
+# The models are imported within the functions since the apps import from core
+# and we don't want to end up with circular imports.
+
+
+def album_prefetches(prefix=''):
+    """
+    Artist and genre relationships for albums. Used by `Album.artists()`,
+    `Album.artist_name()`, `Album.genres()` and `Album.genre()`
+    """
+    from monkeywagtail.album.models import (
+        AlbumArtistRelationship, GenreClassAlbumRelationship)
+
+    return [
+        Prefetch(
+            prefix + 'album_artist_relationship',
+            queryset=AlbumArtistRelationship.objects.select_related(
+                'artist_name')
+        ),
+        Prefetch(
+            prefix + 'album_genre_relationship',
+            queryset=GenreClassAlbumRelationship.objects.select_related(
+                'genres')
+        ),
+    ]
+
+
+def artist_prefetches(prefix=''):
+    """
+    Genre relationships for artists. Used by `Artist.genres()` and
+    `Artist.genre()`
+    """
+    from monkeywagtail.artist.models import GenreArtistRelationship
+
+    return [
+        Prefetch(
+            prefix + 'artist_genre_relationship',
+            queryset=GenreArtistRelationship.objects.select_related('genres')
+        ),
+    ]
+
+
+def album_review_prefetches(prefix=''):
+    """
+    The reviews (and their pages) that have been written about albums
+    """
+    from monkeywagtail.review.models import ReviewAlbumRelationship
+
+    return [
+        Prefetch(
+            prefix + 'album_review_relationship',
+            queryset=ReviewAlbumRelationship.objects.select_related('page')
+        ),
+    ]
+
+
+def review_album_prefetches(prefix=''):
+    """
+    The albums (with their cover image, artists and genres) for reviews. Used
+    by `ReviewPage.albums`
+    """
+    from monkeywagtail.review.models import ReviewAlbumRelationship
+
+    return [
+        Prefetch(
+            prefix + 'review_album_relationship',
+            queryset=ReviewAlbumRelationship.objects.select_related(
+                'album__image').prefetch_related(
+                    *album_prefetches('album__'))
+        ),
+    ]
+
+
+def feature_prefetches(prefix=''):
+    """
+    Artist, author and genre relationships for feature content pages. Used by
+    `FeatureContentPage.artists()`, `.authors()` and `.genres()`
+    """
+    from monkeywagtail.feature_content_page.models import (
+        ArtistFeaturePageRelationship,
+        AuthorFeaturePageRelationship,
+        GenreFeaturePageRelationship)
+
+    return [
+        Prefetch(
+            prefix + 'feature_page_artist_relationship',
+            queryset=ArtistFeaturePageRelationship.objects.select_related(
+                'artist')
+        ),
+        Prefetch(
+            prefix + 'feature_page_author_relationship',
+            queryset=AuthorFeaturePageRelationship.objects.select_related(
+                'author')
+        ),
+        Prefetch(
+            prefix + 'feature_page_genre_relationship',
+            queryset=GenreFeaturePageRelationship.objects.select_related(
+                'genre')
+        ),
+    ]
+
+
+def artist_albums(artist):
+    """
+    All albums an artist has made, with everything the artist detail template
+    needs from them (artists, genres and reviews) fetched up front.
+
+    We filter on a subquery of the relationship table rather than across the
+    join so we don't get an album back twice (and don't need `distinct()`)
+    """
+    from monkeywagtail.album.models import Album, AlbumArtistRelationship
+
+    album_ids = AlbumArtistRelationship.objects.filter(
+        artist_name=artist).values('page_id')
+
+    return Album.objects.filter(pk__in=album_ids).select_related(
+        'image').prefetch_related(
+            *(album_prefetches() + album_review_prefetches()))
+
+
+def artist_feature_pages(artist):
+    """
+    Live feature pages that reference an artist, newest first, with their
+    genres, authors and artists fetched up front.
+    """
+    from monkeywagtail.feature_content_page.models import (
+        ArtistFeaturePageRelationship, FeatureContentPage)
+
+    feature_ids = ArtistFeaturePageRelationship.objects.filter(
+        artist=artist).values('page_id')
+
+    return FeatureContentPage.objects.live().filter(
+        pk__in=feature_ids).order_by('-date').select_related(
+            'image').prefetch_related(*feature_prefetches())
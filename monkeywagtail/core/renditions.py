@@ -0,0 +1,252 @@
+import logging
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection
+from wagtail.wagtailimages.exceptions import InvalidFilterSpecError
+from wagtail.wagtailimages.models import (
+    Filter, SourceImageIOError, get_image_model)
+
+logger = logging.getLogger(__name__)
+
+# RENDITIONS
+# When a template asks for `{% image page.image fill-400x400 %}` Wagtail looks
+# for a 'rendition' (a resized copy) of the image at that size, and if there
+# isn't one it makes it there and then. Making one means opening the original
+# with Pillow and resizing it, which can take a good second for a big photo,
+# so whoever is first to see a new image waits for it.
+#
+# Rather than wait for a visitor we make the renditions up front. We find
+# every filter spec the site uses by looking through our templates for
+# `{% image ... %}` and `{% rendition ... %}` tags and our Python for
+# `get_rendition('...')` calls and spec-like strings (e.g. 'fill-150x150' in
+# home/featured.py), then make any renditions that don't exist yet. That
+# happens
+#
+# * for every image with `./manage.py generate_renditions`
+# * for a single image after it's uploaded (or its focal point changes), see
+#   core/signals.py
+# http://docs.wagtail.io/en/v1.6/topics/images/index.html
+
+SPEC_PATTERNS = [
+    # {% image page.image fill-400x400 %} and {% image x width-600 as photo %}
+    re.compile(r'{%\s*image\s+\S+\s+([\w|-]+)'),
+    # image.get_rendition('fill-50x50')
+    re.compile(r'''get_rendition\(\s*['"]([\w|-]+)['"]'''),
+    # {% rendition album "image" "fill-400x400" as photo %}
+    re.compile(r'''{%\s*rendition\s+\S+\s+\S+\s+['"]([\w|-]+)['"]'''),
+    # SECTION_IMAGE = 'fill-150x150'
+    re.compile(r'''['"]((?:fill|width|height|max|min)-\d[\w|-]*)['"]'''),
+]
+
+_filter_specs = None
+
+
+def discover_filter_specs(path=None):
+    """
+    Return every filter spec used in the templates and Python within `path`
+    (the project folder by default), sorted
+    """
+    path = path or settings.PROJECT_DIR
+    specs = set()
+    for root, dirs, files in os.walk(path):
+        # Migrations never ask for a rendition, and can be big
+        dirs[:] = [d for d in dirs if d not in ('migrations', 'static')]
+        for filename in files:
+            if not filename.endswith(('.html', '.py')):
+                continue
+            with open(os.path.join(root, filename), encoding='utf-8') as f:
+                source = f.read()
+            for pattern in SPEC_PATTERNS:
+                specs.update(pattern.findall(source))
+
+    valid = []
+    for spec in sorted(specs):
+        try:
+            Filter(spec=spec).operations
+        except InvalidFilterSpecError:
+            logger.warning("Skipping unrecognised filter spec %r", spec)
+        else:
+            valid.append(spec)
+    return valid
+
+
+def get_filter_specs():
+    # Our templates don't change while the site is running, so we only need to
+    # look through them once
+    global _filter_specs
+    if _filter_specs is None:
+        _filter_specs = discover_filter_specs()
+    return _filter_specs
+
+
+def missing_renditions(images, specs):
+    """
+    Return (image id, spec) for every rendition of `images` that doesn't exist
+    yet. Renditions depend on the focal point as well as the spec, so we work
+    out the key Wagtail will look for for each image
+    """
+    Rendition = get_image_model().get_rendition_model()
+    missing = []
+    for spec in specs:
+        filter, created = Filter.objects.get_or_create(spec=spec)
+        existing = set(Rendition.objects.filter(filter=filter).values_list(
+            'image_id', 'focal_point_key'))
+        for image in images:
+            if (image.pk, filter.get_cache_key(image)) not in existing:
+                missing.append((image.pk, spec))
+    return missing
+
+
+def generate_rendition(job):
+    """
+    Make a single rendition. Takes one (image id, spec) tuple so it can be
+    handed to a process pool, and returns it along with any error
+    """
+    image_id, spec = job
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+        image.get_rendition(spec)
+    except (get_image_model().DoesNotExist, SourceImageIOError,
+            IOError) as e:
+        return image_id, spec, str(e) or e.__class__.__name__
+    return image_id, spec, None
+
+
+def generate_image_renditions(image_id):
+    """
+    Make any missing renditions for one image. Used by the post_save signal
+    in core/signals.py, where it runs in its own thread
+    """
+    try:
+        images = get_image_model().objects.filter(pk=image_id)
+        for job in missing_renditions(list(images), get_filter_specs()):
+            image_id, spec, error = generate_rendition(job)
+            if error:
+                logger.warning(
+                    "Couldn't make %s rendition of image %d: %s",
+                    spec, image_id, error)
+    finally:
+        # Threads get their own database connection, so tidy it up
+        connection.close()
+
+
+def generate_in_background(image_id):
+    thread = threading.Thread(
+        target=generate_image_renditions, args=(image_id,))
+    thread.daemon = True
+    thread.start()
+
+
+# BULK RENDITIONS
+# On a listing each `{% image %}` tag (or `get_rendition()` call) is a query
+# to find the rendition, so 20 albums is 20 queries. `attach_renditions` gets
+# the renditions for a whole list of objects in one query (making any that are
+# missing) and stores them on the objects. `get_rendition` and
+# `rendition_img_tag` then use the stored rendition when there is one.
+#
+# There's a template tag version in core/templatetags/rendition_tags.py and a
+# ModelAdmin index view that uses it in core/views.py
+
+_filters = {}
+
+
+def get_filter(spec):
+    # Filters are never deleted, so we only need to look each one up once
+    if spec not in _filters:
+        _filters[spec] = Filter.objects.get_or_create(spec=spec)[0]
+    return _filters[spec]
+
+
+def get_renditions(images, spec):
+    """
+    Return a dictionary of image id to rendition for `images` at `spec`, with
+    one query for those that exist. Missing renditions are made, and images
+    whose file can't be found are left out
+    """
+    images = {image.pk: image for image in images if image is not None}
+    if not images:
+        return {}
+
+    filter = get_filter(spec)
+    Rendition = get_image_model().get_rendition_model()
+    existing = {
+        (rendition.image_id, rendition.focal_point_key): rendition
+        for rendition in Rendition.objects.filter(
+            filter=filter, image_id__in=images)
+    }
+
+    renditions = {}
+    for pk, image in images.items():
+        rendition = existing.get((pk, filter.get_cache_key(image)))
+        if rendition is None:
+            try:
+                rendition = image.get_rendition(filter)
+            except (SourceImageIOError, IOError):
+                logger.warning(
+                    "Couldn't make %s rendition of image %d", spec, pk)
+                continue
+        # So the rendition doesn't look its image up again for the alt text
+        rendition.image = image
+        renditions[pk] = rendition
+    return renditions
+
+
+def attach_renditions(objects, field, spec):
+    """
+    Get the `spec` rendition of the image in `field` (e.g. 'profile_image')
+    for each of `objects`, and store it on the object for `get_rendition`
+    """
+    objects = list(objects)
+    cache_name = objects[0]._meta.get_field(field).get_cache_name() if (
+        objects) else None
+
+    # Use the images if they've been fetched already (select_related) and
+    # fetch the rest in one go
+    images = {}
+    to_fetch = set()
+    for obj in objects:
+        if hasattr(obj, cache_name):
+            image = getattr(obj, field)
+            if image is not None:
+                images[image.pk] = image
+        elif getattr(obj, field + '_id') is not None:
+            to_fetch.add(getattr(obj, field + '_id'))
+    if to_fetch:
+        images.update(get_image_model().objects.in_bulk(to_fetch))
+
+    renditions = get_renditions(images.values(), spec)
+    for obj in objects:
+        if not hasattr(obj, '_renditions'):
+            obj._renditions = {}
+        obj._renditions[(field, spec)] = renditions.get(
+            getattr(obj, field + '_id'))
+    return objects
+
+
+def get_rendition(obj, field, spec):
+    """
+    The `spec` rendition of the image in `field`, using the one stored by
+    `attach_renditions` if there is one. None if there's no image or its file
+    can't be found
+    """
+    attached = getattr(obj, '_renditions', {})
+    if (field, spec) in attached:
+        return attached[(field, spec)]
+
+    image = getattr(obj, field)
+    if image is None:
+        return None
+    try:
+        return image.get_rendition(spec)
+    except (SourceImageIOError, IOError):
+        logger.warning(
+            "Couldn't make %s rendition of image %d", spec, image.pk)
+        return None
+
+
+def rendition_img_tag(obj, field, spec):
+    rendition = get_rendition(obj, field, spec)
+    return rendition.img_tag() if rendition else ''
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete)
+from django.dispatch import receiver
+from wagtail.wagtailcore.models import Page
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+from wagtail.wagtailimages.models import get_image_model
+
+from monkeywagtail.album.models import Album
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.core import dependencies, pagecache
+from monkeywagtail.core.cache import bump_generation
+from monkeywagtail.core.renditions import generate_in_background
+from monkeywagtail.genre.models import GenreClass
+from .models import MainMenu
+
+# These signals clear cached content when the things it's built from change,
+# and make renditions of newly uploaded images. They're connected in
+# core/apps.py when Django starts.
+# https://docs.djangoproject.com/en/1.9/topics/signals/
+# http://docs.wagtail.io/en/v1.6/reference/signals.html
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def clear_navigation_on_publish(sender, instance, **kwargs):
+    bump_generation('navigation')
+
+
+@receiver(post_save, sender=Page)
+def clear_navigation_on_move(sender, instance, **kwargs):
+    # When a page is moved Wagtail saves it as a plain `Page` rather than its
+    # specific class (e.g. ReviewPage). Editing a page saves the specific
+    # class, so this only catches moves (and the odd save of a plain Page)
+    bump_generation('navigation')
+
+
+@receiver(post_save, sender=MainMenu)
+@receiver(post_delete, sender=MainMenu)
+def clear_navigation_on_menu_change(sender, instance, **kwargs):
+    bump_generation('navigation')
+
+
+# PAGE CACHE
+# Have a look at core/pagecache.py. We wait until the change is saved to the
+# database, otherwise a visitor could put the old page back in the cache
+# before the new one is there to be seen
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def clear_page_cache_on_publish(sender, instance, **kwargs):
+    transaction.on_commit(lambda: pagecache.purge_page(instance))
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=MainMenu)
+@receiver(post_delete, sender=MainMenu)
+def clear_page_cache_on_move(sender, instance, **kwargs):
+    # Moving or deleting a page changes the menus and the URLs of the pages
+    # beneath it, and the main menu is on every page
+    transaction.on_commit(pagecache.purge_all)
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=GenreClass)
+def clear_page_cache_on_snippet_change(sender, instance, **kwargs):
+    # Only the pages made using the snippet (see core/dependencies.py)
+    transaction.on_commit(lambda: pagecache.purge_object(instance))
+
+
+@receiver(pre_delete, sender=Artist)
+@receiver(pre_delete, sender=Album)
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=GenreClass)
+def clear_page_cache_on_snippet_delete(sender, instance, **kwargs):
+    # Django forgets a deleted object's id once it's finished deleting it,
+    # and deletes its relationships (an artist's genres, say) first, so we
+    # work out which pages to throw away before it starts. We still wait for
+    # the delete to be committed before throwing them away
+    transaction.on_commit(pagecache.deleted_object_purge(instance))
+
+
+@receiver(post_init)
+def note_page_cache_dependency(sender, instance, **kwargs):
+    # Sent for every model instance, but does nothing unless a page is being
+    # made for the page cache
+    dependencies.note_instance(instance)
+
+
+@receiver(post_save, sender=get_image_model())
+def generate_renditions_on_upload(sender, instance, update_fields=None,
+                                  **kwargs):
+    # Make the renditions for a new image (or one whose focal point has
+    # changed) rather than leaving it to the first visitor. Have a look at
+    # core/renditions.py. We wait until the image is definitely saved, and do
+    # it in the background so the upload doesn't have to wait
+    if update_fields and set(update_fields) <= {'file_size'}:
+        # Wagtail saving the file size it's just worked out
+        return
+    if getattr(settings, 'PREGENERATE_RENDITIONS', True):
+        transaction.on_commit(lambda: generate_in_background(instance.pk))
@@ -0,0 +1,80 @@
+import os
+
+from whitenoise.base import MissingFileError
+from whitenoise.django import DjangoWhiteNoise
+
+from monkeywagtail.core.export import manifest_file
+
+# SERVING THE STATIC EXPORT
+# wsgi.py serves the pages made by `./manage.py export_static_site` (see
+# core/export.py) straight from disk when SERVE_STATIC_SITE is on. If you
+# serve the site with nginx (or another static file server) in front of
+# Django you don't need this, point it at STATIC_SITE_ROOT instead.
+#
+# WhiteNoise on its own makes a list of its files, and works out their
+# headers (size, last modified and so on), once when the server starts. That's
+# right for our CSS and JS, which only change when we deploy, but exports run
+# while the site is up: new pages wouldn't be served, deleted ones would (or
+# error) and changed ones would go out with the old size and date.
+#
+# So for exported pages we
+#
+# - only serve index.html files, each at its folder's URL too
+#   (/artists/fugazi/ as well as /artists/fugazi/index.html)
+# - make the list again whenever the export's manifest changes. The export
+#   writes it last, so it changing means an export has finished. Checking
+#   costs one `stat` of the manifest per request
+# - work out each page's headers when it's asked for, from the file as it is
+#   now, and pass the request on to Django if the file's gone
+
+
+def manifest_version(root):
+    try:
+        manifest = os.stat(manifest_file(root))
+    except OSError:
+        return None
+    # The export swaps a new manifest in (see core/export.py `write_file`),
+    # so it's a different file as well as a newer one
+    return manifest.st_ino, manifest.st_mtime_ns, manifest.st_size
+
+
+class StaticSiteWhiteNoise(DjangoWhiteNoise):
+    """
+    DjangoWhiteNoise (our static files) plus the pages exported to
+    `site_root`
+    """
+
+    def __init__(self, application, site_root):
+        super(StaticSiteWhiteNoise, self).__init__(application)
+        self.site_root = site_root
+        self.load_site_pages(manifest_version(site_root))
+
+    def load_site_pages(self, version):
+        pages = {}
+        for directory, _, filenames in os.walk(self.site_root):
+            if 'index.html' in filenames:
+                url = '/' + os.path.relpath(directory, self.site_root)
+                url = '/' if url == '/.' else url.replace('\\', '/') + '/'
+                path = os.path.join(directory, 'index.html')
+                pages[url] = pages[url + 'index.html'] = path
+        # Swap the whole list in at once, other threads may be reading it
+        self.site_pages = pages
+        self.site_version = version
+
+    def __call__(self, environ, start_response):
+        version = manifest_version(self.site_root)
+        if version != self.site_version:
+            self.load_site_pages(version)
+
+        url = environ['PATH_INFO']
+        path = self.site_pages.get(url)
+        if path is not None:
+            try:
+                static_file = self.get_static_file(path, url)
+            except MissingFileError:
+                # Removed by an export that's still running
+                pass
+            else:
+                return self.serve(static_file, environ, start_response)
+        return super(StaticSiteWhiteNoise, self).__call__(
+            environ, start_response)
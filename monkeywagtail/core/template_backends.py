@@ -0,0 +1,31 @@
+from django.template.backends.django import DjangoTemplates, Template
+
+from monkeywagtail.core import instrumentation
+
+# TIMED TEMPLATES
+# The TEMPLATES backend in settings/base.py. It's Django's own, except that
+# each render is timed for the request instrumentation (see
+# core/instrumentation.py). Doing it here means we catch every template,
+# whether a view uses `render()`, hands back a TemplateResponse (as Wagtail
+# pages do) or calls `render_to_string`.
+# https://docs.djangoproject.com/en/1.9/topics/templates/#support-for-template-engines
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with instrumentation.timed_render():
+            return super(TimedTemplate, self).render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        template = super(TimedDjangoTemplates, self).from_string(
+            template_code)
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, *args, **kwargs):
+        template = super(TimedDjangoTemplates, self).get_template(
+            *args, **kwargs)
+        return TimedTemplate(template.template, self)
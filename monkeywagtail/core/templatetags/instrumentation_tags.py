@@ -0,0 +1,43 @@
+import time
+
+from django import template
+
+from monkeywagtail.core.instrumentation import note_template_time
+
+register = template.Library()
+# https://docs.djangoproject.com/en/1.9/howto/custom-template-tags/
+
+# Time how long part of a template takes to render e.g.
+#
+#   {% load instrumentation_tags %}
+#   {% timed "menu" %}
+#     {% main_menu %}
+#   {% endtimed %}
+#
+# The time is added to the request's instrumentation under "templates" (see
+# core/instrumentation.py). It doesn't change what's rendered at all.
+
+
+class TimedNode(template.Node):
+
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        started = time.time()
+        output = self.nodelist.render(context)
+        note_template_time(
+            self.name.resolve(context), time.time() - started)
+        return output
+
+
+@register.tag(name='timed')
+def timed(parser, token):
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            "'%s' takes a name e.g. {%% timed \"menu\" %%}" % bits[0])
+    nodelist = parser.parse(('endtimed',))
+    parser.delete_first_token()
+    return TimedNode(parser.compile_filter(bits[1]), nodelist)
@@ -1,12 +1,32 @@
 from django import template
 from django.template import Template
+from django.template.loader import render_to_string
 from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
 from wagtail.wagtailcore.models import Page
+from monkeywagtail.core.cache import cached
+from monkeywagtail.core.menus import build_menu_tree, set_active
 from monkeywagtail.core.models import MainMenu
 
 register = template.Library()
 # https://docs.djangoproject.com/en/1.9/howto/custom-template-tags/
 
+# CACHING
+# The menus and breadcrumbs are on every page but only change when a page is
+# published, unpublished or moved (or the main menu is edited). So we build
+# them once per site and keep them in the cache. core/signals.py bumps the
+# 'navigation' generation (see core/cache.py) when any of those things happen
+# which throws the whole lot away.
+#
+# The active state depends on the page you're looking at, so that's worked out
+# after we've got the menu from the cache. That way one cached menu does for
+# every page on the site.
+
+
+def navigation_cache(context, parts, build):
+    site = context['request'].site
+    return cached('navigation', [site.pk if site else None] + parts, build)
+
 
 @register.assignment_tag(takes_context=True)
 def get_site_root(context):
@@ -36,9 +56,14 @@ def is_active(page, current_page):
 # a dropdown class to be applied to a parent
 @register.inclusion_tag('tags/top_menu.html', takes_context=True)
 def top_menu(context, parent, calling_page=None):
-    menuitems = parent.get_children().live().in_menu()
+    def build():
+        menuitems = list(parent.get_children().live().in_menu())
+        for menuitem in menuitems:
+            menuitem.show_dropdown = has_menu_children(menuitem)
+        return menuitems
+
+    menuitems = navigation_cache(context, ['top_menu', parent.pk], build)
     for menuitem in menuitems:
-        menuitem.show_dropdown = has_menu_children(menuitem)
         # We don't directly check if calling_page is None since the template
         # engine can pass an empty string to calling_page
         # if the variable passed as calling_page does not exist.
@@ -55,16 +80,21 @@ def top_menu(context, parent, calling_page=None):
 # Retrieves the children of the top menu items for the drop downs
 @register.inclusion_tag('tags/top_menu_children.html', takes_context=True)
 def top_menu_children(context, parent, calling_page=None):
-    menuitems_children = parent.get_children()
-    menuitems_children = menuitems_children.live().in_menu()
+    def build():
+        menuitems_children = list(parent.get_children().live().in_menu())
+        for menuitem in menuitems_children:
+            menuitem.has_dropdown = has_menu_children(menuitem)
+            menuitem.children = list(menuitem.get_children().live().in_menu())
+        return menuitems_children
+
+    menuitems_children = navigation_cache(
+        context, ['top_menu_children', parent.pk], build)
     for menuitem in menuitems_children:
-        menuitem.has_dropdown = has_menu_children(menuitem)
         # We don't directly check if calling_page is None since the template
         # engine can pass an empty string to calling_page
         # if the variable passed as calling_page does not exist.
         menuitem.active = (calling_page.url.startswith(menuitem.url)
                            if calling_page else False)
-        menuitem.children = menuitem.get_children().live().in_menu()
     return {
         'parent': parent,
         'menuitems_children': menuitems_children,
@@ -80,14 +110,34 @@ def breadcrumbs(context):
         # When on the home page, displaying breadcrumbs is irrelevant.
         ancestors = ()
     else:
-        ancestors = Page.objects.ancestor_of(
-            self, inclusive=True).filter(depth__gt=1)
+        ancestors = navigation_cache(
+            context, ['breadcrumbs', self.pk],
+            lambda: list(Page.objects.ancestor_of(
+                self, inclusive=True).filter(depth__gt=1)))
     return {
         'ancestors': ancestors,
         'request': context['request'],
     }
 
 
+# The whole menu below `parent` (normally the site root) in one query, rather
+# than a query or two per menu item like top_menu_children. Have a look at
+# core/menus.py for how it works. `depth` defaults to settings.MENU_DEPTH
+# e.g. {% menu_tree site_root calling_page=self %}
+@register.inclusion_tag('tags/menu_tree.html', takes_context=True)
+def menu_tree(context, parent, calling_page=None, depth=None):
+    menuitems = navigation_cache(
+        context, ['menu_tree', parent.pk, depth],
+        lambda: build_menu_tree(parent, depth))
+    set_active(menuitems, calling_page)
+    return {
+        'calling_page': calling_page,
+        'menuitems': menuitems,
+        # required by the pageurl tag that we want to use within this template
+        'request': context['request'],
+    }
+
+
 # Retrieves all live pages which are children of the calling page
 # for standard index listing
 @register.inclusion_tag(
@@ -105,19 +155,29 @@ def standard_index_listing(context, calling_page):
 
 # Main menu model
 # @TODO find docs re: .inclusion_tag
-@register.inclusion_tag('tags/menu-wrap.html', takes_context=True)
+#
+# The main menu has no active state, so rather than caching the menu objects
+# we cache the rendered HTML. That saves looking up every page chosen in the
+# menu's PageChooserBlocks as well as the menu itself.
+@register.simple_tag(takes_context=True)
 def main_menu(context):
-    return {
-        'mainmenu': MainMenu.objects.all(),
-        'request': context['request'],
-    }
+    request = context['request']
+
+    def build():
+        return render_to_string('tags/menu-wrap.html', {
+            'mainmenu': MainMenu.objects.all(),
+            'request': request,
+        }, request=request)
+
+    return mark_safe(navigation_cache(context, ['main_menu'], build))
 
 
 @register.simple_tag
 def filters_query(filters):
     """
     Takes a dictionary of filters, remove unused ones and return as urlencoded
-    string.
+    string. Filters with several values (a list, like the genres ticked on
+    the review index) are repeated e.g. `&genre=metal&genre=punk`
     """
     new_filters = {}
 
@@ -126,6 +186,6 @@ def filters_query(filters):
             new_filters[k] = v
 
     if bool(new_filters):
-        return '&'+urlencode(new_filters)
+        return '&'+urlencode(sorted(new_filters.items()), doseq=True)
     else:
         return ''
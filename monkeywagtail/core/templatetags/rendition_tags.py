@@ -0,0 +1,30 @@
+from django import template
+
+from monkeywagtail.core.renditions import attach_renditions, get_rendition
+
+register = template.Library()
+# https://docs.djangoproject.com/en/1.9/howto/custom-template-tags/
+
+# Fetch the renditions for a list of objects before looping over them, rather
+# than one at a time with `{% image %}` inside the loop e.g.
+#
+#   {% load rendition_tags %}
+#   {% attach_renditions albums "image" "fill-400x400" %}
+#   {% for album in albums %}
+#     {% rendition album "image" "fill-400x400" as photo %}
+#     {% if photo %}<img src="{{ photo.url }}" alt="{{ photo.alt }}">{% endif %}
+#   {% endfor %}
+#
+# `rendition` works without `attach_renditions` too, it just fetches the
+# rendition on its own. Have a look at core/renditions.py
+
+
+@register.simple_tag(name='attach_renditions')
+def attach_renditions_tag(objects, field, spec):
+    attach_renditions(objects, field, spec)
+    return ''
+
+
+@register.assignment_tag(name='rendition')
+def rendition_tag(obj, field, spec):
+    return get_rendition(obj, field, spec)
@@ -0,0 +1,415 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from importlib import import_module
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import QueryDict
+from django.db.models.functions import Lower
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.wagtailcore.models import Site
+
+from monkeywagtail.album.models import (
+    Album, AlbumArtistRelationship, GenreClassAlbumRelationship)
+from monkeywagtail.artist.models import Artist, GenreArtistRelationship
+from monkeywagtail.core import explain, export
+from monkeywagtail.core import filters as listing_filters
+from monkeywagtail.core.catalogue import Catalogue
+from monkeywagtail.core.pagination import encode_cursor, paginate
+from monkeywagtail.core.static_site import StaticSiteWhiteNoise
+from monkeywagtail.feature_content_page.models import (
+    FeatureContentPage, FeatureIndexPage, GenreFeaturePageRelationship)
+from monkeywagtail.genre.models import GenreClass
+from monkeywagtail.home.models import HomePage
+from monkeywagtail.review.models import (
+    ReviewAlbumRelationship, ReviewIndexPage, ReviewPage)
+
+# Run with `./manage.py test monkeywagtail.core`
+# https://docs.djangoproject.com/en/1.9/topics/testing/overview/
+
+# The databases we check the filters' SQL for, whichever one the tests are
+# running on
+ENGINES = [
+    'django.db.backends.postgresql_psycopg2',
+    'django.db.backends.sqlite3',
+]
+
+
+def sql_for(queryset, engine):
+    """
+    The SQL `queryset` would run on a database using `engine`. It's only
+    compiled, so there doesn't need to be a database there
+    """
+    settings_dict = dict(connections.databases['default'], ENGINE=engine)
+    connection = import_module(engine + '.base').DatabaseWrapper(
+        settings_dict, alias=engine)
+    sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+    return sql
+
+
+class FilterTest(TestCase):
+
+    def test_read_sorts_cleans_and_drops_repeats(self):
+        genre = listing_filters.Filter('genre', multiple=True)
+        self.assertEqual(
+            genre.read(QueryDict('genre=punk&genre=metal&genre=punk&genre=')),
+            ['metal', 'punk'])
+
+    def test_read_takes_the_last_value_of_single_filters(self):
+        rating = listing_filters.Filter(
+            'rating', lookup='rating__gte',
+            clean=listing_filters.whole_number(1, 5))
+        self.assertEqual(rating.read(QueryDict('rating=2&rating=4')), [4])
+        self.assertEqual(rating.read(QueryDict('rating=9')), [])
+        self.assertEqual(rating.read(QueryDict('rating=loud')), [])
+
+    def test_cache_key_ignores_order(self):
+        filters = ReviewIndexPage.FILTERS
+        first = listing_filters.read_filters(
+            filters, QueryDict('genre=punk&genre=metal&rating=4'))
+        second = listing_filters.read_filters(
+            filters, QueryDict('rating=4&genre=metal&genre=punk'))
+        self.assertEqual(
+            listing_filters.cache_key(first),
+            listing_filters.cache_key(second))
+
+
+class FilterSQLTest(TestCase):
+    """
+    Filters across a relationship should be a `pk__in` subquery, with no
+    joins in the outer query and no DISTINCT, on each database we run on
+    """
+
+    def assertFiltersWithSubqueries(self, queryset, subqueries):
+        for engine in ENGINES:
+            sql = sql_for(queryset, engine)
+            self.assertNotIn('DISTINCT', sql, engine)
+            self.assertEqual(sql.count(' IN (SELECT '), subqueries, engine)
+            # Everything up to the WHERE is the listing itself. The only
+            # join there should be from the page to Wagtail's page table
+            outer = sql.split(' WHERE ')[0]
+            self.assertEqual(outer.count(' JOIN '), 1, engine)
+            self.assertIn('"wagtailcore_page"', outer, engine)
+
+    def test_review_filters(self):
+        selected = {
+            'rating': [4], 'artist_name': ['b'], 'genre': ['metal', 'punk']}
+        queryset = listing_filters.apply_filters(
+            ReviewPage.objects.live(), ReviewIndexPage.FILTERS, selected)
+        self.assertFiltersWithSubqueries(queryset, 2)
+
+    def test_feature_filters(self):
+        selected = {'year': [2016], 'genre': ['metal', 'punk']}
+        queryset = listing_filters.apply_filters(
+            FeatureContentPage.objects.live(), FeatureIndexPage.FILTERS,
+            selected)
+        self.assertFiltersWithSubqueries(queryset, 1)
+
+
+class FilterDuplicatesTest(TestCase):
+    """
+    A page that matches a filter more than once (an album in both of the
+    genres chosen, or by two artists starting with the same letter) should
+    still only be listed once
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        home = Site.objects.get(is_default_site=True).root_page
+        cls.reviews = home.add_child(instance=ReviewIndexPage(
+            title='Reviews', slug='test-reviews'))
+        cls.features = home.add_child(instance=FeatureIndexPage(
+            title='Features', slug='test-features'))
+        punk, metal, jazz = [
+            GenreClass.objects.create(title=title, slug=title)
+            for title in ('punk', 'metal', 'jazz')]
+        bands = [
+            Artist.objects.create(title=title, slug=title.lower())
+            for title in ('Bad Brains', 'Black Flag')]
+
+        for i, genres in enumerate([[punk, metal], [punk], [jazz]]):
+            album = Album(
+                title='Album %d' % i, release_date=datetime.date(2016, 1, 1))
+            album.album_artist_relationship = [
+                AlbumArtistRelationship(artist_name=artist)
+                for artist in bands]
+            album.album_genre_relationship = [
+                GenreClassAlbumRelationship(genres=genre) for genre in genres]
+            album.save()
+            review = ReviewPage(
+                title='Review %d' % i, slug='test-review-%d' % i, rating=4)
+            review.review_album_relationship = [
+                ReviewAlbumRelationship(album=album)]
+            cls.reviews.add_child(instance=review)
+
+            feature = FeatureContentPage(
+                title='Feature %d' % i, slug='test-feature-%d' % i,
+                date=datetime.date(2016, 1, 1), image_choices='fit')
+            feature.feature_page_genre_relationship = [
+                GenreFeaturePageRelationship(genre=genre) for genre in genres]
+            cls.features.add_child(instance=feature)
+
+    def filter_reviews(self, query):
+        request = RequestFactory().get('/', QueryDict(query))
+        reviews = self.reviews.get_filtered_review_pages(request)[0]
+        return [review.title for review in reviews]
+
+    def filter_features(self, query):
+        request = RequestFactory().get('/', QueryDict(query))
+        features = self.features.get_filtered_feature_pages(request)[0]
+        return [feature.title for feature in features]
+
+    def test_reviews_by_several_genres(self):
+        self.assertEqual(
+            sorted(self.filter_reviews('genre=punk&genre=metal')),
+            ['Review 0', 'Review 1'])
+
+    def test_reviews_by_artist_letter(self):
+        # Both artists start with a B
+        self.assertEqual(
+            sorted(self.filter_reviews('artist_name=b')),
+            ['Review 0', 'Review 1', 'Review 2'])
+
+    def test_features_by_several_genres(self):
+        self.assertEqual(
+            sorted(self.filter_features('genre=punk&genre=metal')),
+            ['Feature 0', 'Feature 1'])
+
+
+@override_settings(CURSOR_PAGINATION=True, PAGE_CACHE=False)
+class CursorPaginationTest(TestCase):
+    """
+    `?after=` tokens come straight from the URL, so one we didn't make should
+    get the first page rather than an error
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        home = Site.objects.get(is_default_site=True).root_page
+        cls.reviews = home.add_child(instance=ReviewIndexPage(
+            title='Reviews', slug='test-reviews'))
+        for i in range(3):
+            cls.reviews.add_child(instance=ReviewPage(
+                title='Review %d' % i, slug='test-review-%d' % i, rating=4))
+        for title in ('Bad Brains', 'Black Flag', 'Crass', 'Dead Kennedys'):
+            Artist.objects.create(title=title, slug=title.lower())
+
+    def paginate(self, objects, after=None):
+        request = RequestFactory().get('/', {'after': after} if after else {})
+        return paginate(request, objects, per_page=2)
+
+    def test_pages_follow_on(self):
+        artists = Artist.objects.order_by('sort_name')
+        first = self.paginate(artists)
+        second = self.paginate(artists, first.next_cursor)
+        self.assertEqual(
+            [artist.title for artist in list(first) + list(second)],
+            ['Bad Brains', 'Black Flag', 'Crass', 'Dead Kennedys'])
+        self.assertFalse(second.has_next())
+
+    def test_bad_tokens_deliver_the_first_page(self):
+        artists = Artist.objects.order_by('sort_name')
+        first = [artist.pk for artist in self.paginate(artists)]
+        for token in ('not-a-token', encode_cursor(['b', 'x']),
+                      encode_cursor(['b', {'a': 1}]), encode_cursor(['b']),
+                      encode_cursor(['b', None]),
+                      encode_cursor(['b', float('inf')])):
+            page = self.paginate(artists, token)
+            self.assertIsNone(page.cursor, token)
+            self.assertEqual([artist.pk for artist in page], first, token)
+
+    @override_settings(DEFAULT_PER_PAGE=2)
+    def test_bad_date_token(self):
+        response = self.client.get(
+            self.reviews.url, {'after': encode_cursor(['2016-13-45', 1])})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['reviews'].cursor)
+        self.assertEqual(
+            [review.title for review in response.context['reviews']],
+            ['Review 2', 'Review 1'])
+
+    def test_orderings_we_cant_follow_get_numbered_pages(self):
+        for artists in (Artist.objects.order_by(
+                            'artist_genre_relationship__genres__title'),
+                        Artist.objects.order_by(Lower('title')),
+                        Artist.objects.order_by('?')):
+            page = self.paginate(artists, encode_cursor(['b', 1]))
+            self.assertFalse(getattr(page, 'is_cursor', False))
+            self.assertEqual(page.number, 1)
+
+
+class StaticSiteTest(TestCase):
+    """
+    wsgi.py should pick up the pages an export adds, changes and removes
+    without a restart, and never serve the export's manifest
+    """
+
+    def setUp(self):
+        # The manifest goes next to the export folder, so we make that in a
+        # temporary folder of its own
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        self.root = os.path.join(folder, 'static_site')
+        self.write_page('/', b'Home')
+        self.write_page('/artists/fugazi/', b'Fugazi')
+        export.save_manifest(self.root, {}, {})
+        self.application = StaticSiteWhiteNoise(self.django, self.root)
+
+    def django(self, environ, start_response):
+        start_response('200 OK', [])
+        return [b'From Django']
+
+    def write_page(self, path, content):
+        filename = export.output_file(self.root, None, path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        export.write_file(filename, content)
+
+    def get(self, path):
+        response = {}
+
+        def start_response(status, headers):
+            response['headers'] = dict(headers)
+        content = b''.join(self.application(
+            {'REQUEST_METHOD': 'GET', 'PATH_INFO': path}, start_response))
+        return content, response['headers']
+
+    def test_serves_exported_pages(self):
+        self.assertEqual(self.get('/')[0], b'Home')
+        self.assertEqual(self.get('/artists/fugazi/')[0], b'Fugazi')
+        self.assertEqual(
+            self.get('/artists/fugazi/index.html')[0], b'Fugazi')
+        self.assertEqual(self.get('/authors/')[0], b'From Django')
+
+    def test_manifest_isnt_served(self):
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, export.OLD_MANIFEST)))
+        self.assertEqual(
+            self.get('/' + export.OLD_MANIFEST)[0], b'From Django')
+        self.assertEqual(
+            os.path.dirname(export.manifest_file(self.root)),
+            os.path.dirname(self.root))
+
+    def test_picks_up_a_new_export(self):
+        self.write_page('/artists/fugazi/', b'Fugazi, again')
+        self.write_page('/authors/ann/', b'Ann')
+        export.remove_page(self.root, None, '/')
+
+        # While the export is running, changed pages go out as they are now
+        # and removed ones go to Django
+        content, headers = self.get('/artists/fugazi/')
+        self.assertEqual(content, b'Fugazi, again')
+        self.assertEqual(headers['Content-Length'], str(len(content)))
+        self.assertEqual(self.get('/')[0], b'From Django')
+
+        # New pages are served once it's finished
+        self.assertEqual(self.get('/authors/ann/')[0], b'From Django')
+        export.save_manifest(self.root, {}, {})
+        self.assertEqual(self.get('/authors/ann/')[0], b'Ann')
+        self.assertEqual(self.get('/')[0], b'From Django')
+
+
+@skipUnless(connection.vendor == 'postgresql', "Reads PostgreSQL's plans")
+class ListingQueryPlanTest(TestCase):
+    """
+    On a catalogue of a realistic size the main listing queries should use an
+    index rather than read whole tables. Have a look at core/explain.py
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        root = Site.objects.get(is_default_site=True).root_page
+        root.add_child(instance=HomePage(
+            title='Home', slug='test-home', site_description_title='Home',
+            site_description='Home'))
+        # Big enough that reading a whole table of artists, albums or pages
+        # is slower than using an index. Making it takes most of a minute
+        counts = {
+            'artists': 500, 'genres': 20, 'subgenres': 3, 'authors': 25,
+            'images': 0, 'reviews': 600, 'features': 200, 'news': 0,
+            'tours': 0}
+        with override_settings(PREGENERATE_RENDITIONS=False):
+            Catalogue(counts).generate()
+        call_command('rebuild_review_facets', stdout=io.StringIO())
+        # Tell PostgreSQL how big the tables are now, it plans by them
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_listings_use_indexes(self):
+        queries = explain.listing_queries()
+        self.assertTrue(queries)
+        seq_scans = {
+            name: explain.seq_scans(queryset) for name, queryset in queries}
+        self.assertEqual(
+            {name: tables for name, tables in seq_scans.items() if tables},
+            {})
+
+
+def run_commit_hooks():
+    # TestCase runs each test in a transaction that's never committed, so
+    # what's passed to `transaction.on_commit` would never run. We run it
+    # ourselves, as if the change had been committed
+    connection = connections['default']
+    hooks, connection.run_on_commit = connection.run_on_commit, []
+    for savepoints, hook in hooks:
+        hook()
+
+
+@override_settings(
+    PAGE_CACHE=True,
+    CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'page-cache-tests'}})
+class PageCachePurgeTest(TestCase):
+    """
+    Changing or deleting an artist should throw away the cached pages made
+    using it, and only those, once the change is committed
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        punk = GenreClass.objects.create(title='Punk', slug='punk')
+        fugazi = Artist(title='Fugazi', slug='fugazi')
+        fugazi.artist_genre_relationship = [
+            GenreArtistRelationship(genres=punk)]
+        fugazi.save()
+        Artist.objects.create(title='Crass', slug='crass')
+
+    def setUp(self):
+        self.fugazi = Artist.objects.get(slug='fugazi')
+        # Saving the artists in setUpTestData left hooks to run
+        run_commit_hooks()
+        cache.clear()
+        self.paths = [
+            '/artists/', '/artists/fugazi/', '/artists/crass/',
+            '/artists/genre/punk/', '/authors/']
+        for path in self.paths:
+            self.assertEqual(self.client.get(path)['X-Page-Cache'], 'miss')
+
+    def missed(self):
+        return [
+            path for path in self.paths
+            if self.client.get(path).get('X-Page-Cache') != 'hit']
+
+    def test_rename(self):
+        self.fugazi.title = 'Fugazi!'
+        self.fugazi.save()
+        self.assertEqual(self.missed(), [])
+        run_commit_hooks()
+        self.assertEqual(
+            self.missed(),
+            ['/artists/', '/artists/fugazi/', '/artists/genre/punk/'])
+        self.assertContains(self.client.get('/artists/fugazi/'), 'Fugazi!')
+
+    def test_delete(self):
+        self.fugazi.delete()
+        self.assertEqual(self.missed(), [])
+        run_commit_hooks()
+        self.assertEqual(
+            self.missed(),
+            ['/artists/', '/artists/fugazi/', '/artists/genre/punk/'])
+        self.assertEqual(self.client.get('/artists/fugazi/').status_code, 404)
@@ -0,0 +1,25 @@
+from wagtail.contrib.modeladmin.views import IndexView
+
+from monkeywagtail.core.renditions import attach_renditions
+
+
+class RenditionIndexView(IndexView):
+    """
+    A ModelAdmin listing that fetches the images for each row in one go
+    rather than row by row. List the renditions your `list_display` methods
+    use on the ModelAdmin e.g.
+
+        index_view_class = RenditionIndexView
+        list_renditions = [('profile_image', 'fill-50x50')]
+
+    and have the methods use `rendition_img_tag` from core/renditions.py
+    """
+
+    def get_context_data(self, *args, **kwargs):
+        context = super(RenditionIndexView, self).get_context_data(
+            *args, **kwargs)
+        object_list = list(context['object_list'])
+        for field, spec in getattr(self.model_admin, 'list_renditions', []):
+            attach_renditions(object_list, field, spec)
+        context['object_list'] = object_list
+        return context
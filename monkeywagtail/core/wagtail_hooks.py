@@ -1,5 +1,8 @@
 from wagtail.contrib.modeladmin.options import (
     ModelAdmin, ModelAdminGroup, modeladmin_register)
+from wagtail.wagtailcore import hooks
+
+from monkeywagtail.core import instrumentation
 from .models import MainMenu
 
 
@@ -18,3 +21,12 @@ modeladmin_register(MenuAdmin)
 
 # Note Andy Babic has now added exceptional documentation about ModelAdmin
 # at http://docs.wagtail.io/en/latest/reference/contrib/modeladmin/index.html
+
+
+# Every Wagtail page is served by the same view, so for the request
+# instrumentation (see core/instrumentation.py) we note the type of page
+# instead e.g. 'ReviewIndexPage'
+# http://docs.wagtail.io/en/v1.6/reference/hooks.html#before-serve-page
+@hooks.register('before_serve_page')
+def note_page_type(page, request, serve_args, serve_kwargs):
+    instrumentation.set_view(type(page).__name__)
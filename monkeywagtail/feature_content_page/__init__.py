@@ -0,0 +1 @@
+default_app_config = 'monkeywagtail.feature_content_page.apps.FeatureContentPageConfig'
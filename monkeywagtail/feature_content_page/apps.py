@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FeatureContentPageConfig(AppConfig):
+    name = 'monkeywagtail.feature_content_page'
+    label = 'feature_content_page'
+
+    def ready(self):
+        # Connect the signals that clear the cached filter counts
+        from . import signals  # noqa
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:04
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+# A copy of `delete_duplicate_rows` from core/duplicates.py as it was when
+# this migration was written. Migrations keep their own copy of any code they
+# need, so they still do the same thing if the original changes later
+def delete_duplicate_rows(model, fields):
+    seen = set()
+    duplicates = []
+    for row in model.objects.order_by('pk').values_list('pk', *fields):
+        if row[1:] in seen:
+            duplicates.append(row[0])
+        seen.add(row[1:])
+    model.objects.filter(pk__in=duplicates).delete()
+    return len(duplicates)
+
+
+def delete_duplicate_relationships(apps, schema_editor):
+    # Each page can only be linked to an artist, album etc once from now on,
+    # so repeats are removed first (see core/duplicates.py)
+    delete_duplicate_rows(
+        apps.get_model('feature_content_page', 'ArtistFeaturePageRelationship'),
+        ['page', 'artist'])
+    delete_duplicate_rows(
+        apps.get_model('feature_content_page', 'AuthorFeaturePageRelationship'),
+        ['page', 'author'])
+    delete_duplicate_rows(
+        apps.get_model('feature_content_page', 'GenreFeaturePageRelationship'),
+        ['page', 'genre'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feature_content_page', '0015_auto_20170127_1642'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_relationships, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='featurecontentpage',
+            name='date',
+            field=models.DateField(db_index=True, help_text='blah', verbose_name='Post date'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='artistfeaturepagerelationship',
+            unique_together=set([('page', 'artist')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='authorfeaturepagerelationship',
+            unique_together=set([('page', 'author')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='genrefeaturepagerelationship',
+            unique_together=set([('page', 'genre')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='artistfeaturepagerelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='authorfeaturepagerelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='genrefeaturepagerelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+    ]
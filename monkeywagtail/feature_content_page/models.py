@@ -2,8 +2,6 @@ import collections
 
 from django.db import models
 from django.db.models import Count
-from django.conf import settings
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django import forms
 from wagtail.wagtailcore.models import Orderable, Page
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
@@ -16,10 +14,20 @@ from wagtail.wagtailadmin.edit_handlers import (
     InlinePanel,
     MultiFieldPanel)
 from wagtail.wagtailsnippets.edit_handlers import SnippetChooserPanel
+from monkeywagtail.core import dependencies
+from monkeywagtail.core import filters as listing_filters
 from monkeywagtail.core.blocks import StandardBlock
+from monkeywagtail.core.cache import cached
+from monkeywagtail.core.functions import Year
+from monkeywagtail.core.memoize import (
+    CachedRelationsMixin, cached_relation, related_objects)
+from monkeywagtail.core.models import DistinctRelationshipsMixin
+from monkeywagtail.core.pagination import paginate
 from monkeywagtail.author.models import Author
 
 FilterObject = collections.namedtuple('FilterObject', 'id, name, slug')
+# A year or genre to filter by, with how many features it would show
+FacetObject = collections.namedtuple('FacetObject', 'id, name, slug, count')
 
 
 class ArtistFeaturePageRelationship(Orderable, models.Model):
@@ -43,6 +51,10 @@ class ArtistFeaturePageRelationship(Orderable, models.Model):
         SnippetChooserPanel('artist')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'artist')]
+        index_together = [('page', 'sort_order')]
+
 
 class AuthorFeaturePageRelationship(Orderable, models.Model):
     # We get to define another m2m for authors since a page can have many authors
@@ -60,6 +72,10 @@ class AuthorFeaturePageRelationship(Orderable, models.Model):
         SnippetChooserPanel('author')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'author')]
+        index_together = [('page', 'sort_order')]
+
 
 class GenreFeaturePageRelationship(Orderable, models.Model):
     page = ParentalKey(
@@ -73,8 +89,13 @@ class GenreFeaturePageRelationship(Orderable, models.Model):
         FieldPanel('genre')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'genre')]
+        index_together = [('page', 'sort_order')]
+
 
-class FeatureContentPage(Page):
+class FeatureContentPage(
+        DistinctRelationshipsMixin, CachedRelationsMixin, Page):
     """
     This is a feature content page for all of your interviews, news etc.
     """
@@ -88,7 +109,8 @@ class FeatureContentPage(Page):
         index.SearchField('body'),
     ]
 
-    date = models.DateField("Post date", help_text='blah')
+    date = models.DateField("Post date", help_text='blah', db_index=True)
+    # Indexed for the feature index's year filter and counts
 
     image = models.ForeignKey(
         'wagtailimages.Image',
@@ -213,23 +235,29 @@ class FeatureContentPage(Page):
     #
     # You don't need to place this at the end of the model, but conventionally
     # it makes sense to put it here
+    #
+    # @cached_relation means each is only fetched once per page however many
+    # times the template asks for it. Have a look at core/memoize.py
+    @cached_relation
     def artists(self):
-        artists = [
-            n.artist for n in self.feature_page_artist_relationship.all()
-        ]
-        return artists
+        return related_objects(
+            self, 'feature_page_artist_relationship', 'artist')
 
+    @cached_relation
     def authors(self):
-        authors = [
-            n.author for n in self.feature_page_author_relationship.all()
-        ]
-        return authors
+        return related_objects(
+            self, 'feature_page_author_relationship', 'author')
 
+    @cached_relation
     def genres(self):
-        genres = [
-            n.genre for n in self.feature_page_genre_relationship.all()
-        ]
-        return genres
+        return related_objects(
+            self, 'feature_page_genre_relationship', 'genre')
+
+    def cache_dependents(self):
+        # The artist and author pages that list this feature, so they're
+        # cleared from the page cache when it's published. Have a look at
+        # core/pagecache.py
+        return [obj.url for obj in self.artists() + self.authors()]
 
     def subgenres(self):
         subgenres = [
@@ -238,6 +266,17 @@ class FeatureContentPage(Page):
         return subgenres
 
 
+# Features in any of the genres chosen on the feature index, as a subquery of
+# page ids so a feature in two of them is still listed once. Have a look at
+# core/filters.py
+def genre_features(slugs):
+    # We filter on genre__slug so that we can guarantee a response
+    # that doesn't include spaces e.g. 'heavy-metal' rather than 'heavy
+    #  metal' but it gives more useful information than genre__id
+    return GenreFeaturePageRelationship.objects.filter(
+        genre__slug__in=slugs).values('page_id')
+
+
 class FeatureIndexPage(Page):
     listing_introduction = models.TextField(
         help_text='Text to describe this section. Will appear on other pages that reference this feature section',
@@ -274,6 +313,14 @@ class FeatureIndexPage(Page):
         'FeatureContentPage'
     ]
 
+    FILTERS = [
+        listing_filters.Filter(
+            'year', lookup='date__year',
+            clean=listing_filters.whole_number(1, 9999)),
+        listing_filters.Filter(
+            'genre', multiple=True, subquery=genre_features),
+    ]
+
     # @property
     # def features(self):
     #     """
@@ -283,57 +330,102 @@ class FeatureIndexPage(Page):
     #     """
     #     return FeatureContentPage.objects.live().descendant_of(self).order_by('-date')
 
+    def live_features(self):
+        return FeatureContentPage.objects.live().descendant_of(self)
+
+    def filter_features(self, features, selected, exclude=()):
+        """
+        Narrow `features` down to the years and genres chosen (see
+        core/filters.py). Used for the listing and for the filter counts so
+        the two always agree
+        """
+        return listing_filters.apply_filters(
+            features, self.FILTERS, selected, exclude)
+
+    def year_counts(self, selected):
+        """
+        Each year with features beneath this page (in the chosen genres, if
+        there are any) and how many, newest first. One query, grouped by year
+        """
+        features = self.filter_features(
+            self.live_features(), selected, exclude=['year'])
+        rows = features.annotate(year=Year('date')).values('year').annotate(
+            count=Count('pk', distinct=True)).order_by('-year')
+        return [
+            FacetObject(
+                id=row['year'], name=str(row['year']),
+                slug=str(row['year']), count=row['count'])
+            for row in rows
+        ]
+
+    def genre_counts(self, selected):
+        """
+        Each genre of the features beneath this page (from the chosen year,
+        if there is one) and how many features, in alphabetical order. One
+        query, grouped by genre
+        """
+        features = self.filter_features(
+            self.live_features(), selected, exclude=['genre'])
+        rows = GenreFeaturePageRelationship.objects.filter(
+            page__in=features.values('pk')
+        ).values('genre_id', 'genre__title', 'genre__slug').annotate(
+            count=Count('page', distinct=True)).order_by('genre__title')
+        return [
+            FacetObject(
+                id=row['genre_id'], name=row['genre__title'],
+                slug=row['genre__slug'], count=row['count'])
+            for row in rows
+        ]
+
+    def facet_counts(self, selected):
+        """
+        The years and genres to filter by, with how many features each
+        would show. Each is counted with the other filter applied, so the
+        counts match what you'd get from choosing it. Cached until a feature
+        is published, see feature_content_page/signals.py
+        """
+        def build():
+            return {
+                'years': self.year_counts(selected),
+                'genres': self.genre_counts(selected),
+            }
+
+        facets = cached('features', [
+            self.pk, listing_filters.cache_key(selected)], build)
+        # The genre names come from the cache rather than the genres
+        # themselves, so we tell the page cache which ones we've shown (see
+        # core/dependencies.py)
+        for facet in facets['genres']:
+            dependencies.note('genre.GenreClass', facet.id)
+        return facets
+
     def filter_years(self):
         """
         Return a collection of years from the date field of feature pages beneath
         this page.
         """
-        years = set()
-        features = FeatureContentPage.objects.live().descendant_of(self)
-        year_dates = features.dates('date', 'year', order='DESC')
-        for date in year_dates:
-            years.add(date.year)
-        return sorted(years, reverse=True)
+        return [facet.id for facet in self.facet_counts({})['years']]
 
     def genres(self):
         """
         Return a list of genres from pages that have a relationship defined
         with a genre and are living beneath this page.
         """
-        genres = set()
-
-        for feature_content_page in FeatureContentPage.objects.live().descendant_of(self):
-            feature_genres = [
-                d.genre for d in
-                feature_content_page.feature_page_genre_relationship.all()
-            ]
-
-            for genre in feature_genres:
-                genres.add(FilterObject(
-                    id=genre.id,
-                    name=genre.title,
-                    slug=genre.slug
-                ))
-
-        return sorted(genres, key=lambda d: d.name)
+        return [
+            FilterObject(id=facet.id, name=facet.name, slug=facet.slug)
+            for facet in self.facet_counts({})['genres']
+        ]
 
     def paginate(self, request, objects):
-        page = request.GET.get('page')
-        paginator = Paginator(objects, settings.DEFAULT_PER_PAGE)
-        try:
-            pages = paginator.page(page)
-        except PageNotAnInteger:
-            pages = paginator.page(1)
-        except EmptyPage:
-            pages = paginator.page(paginator.num_pages)
-        return pages
+        # Shows DEFAULT_PER_PAGE objects per page. See core/pagination.py
+        return paginate(request, objects)
 
     def get_filtered_feature_pages(self, request={}):
         """
         Return a filtered queryset of live feature pages that are decendants of
         this page.
         """
-        features = FeatureContentPage.objects.live().descendant_of(self)
+        features = self.live_features()
         # The first step is to create a `features` variable that we populate
         # with a query. This will return all feature_content_pages that are
         # live (e.g. not draft) and a descendant of this index page
@@ -341,33 +433,17 @@ class FeatureIndexPage(Page):
         is_filtering = False
         # Second is to create a filter variable. By default it is set to false
 
-        request_filters = {}
-        for k, v in request.GET.items():
-            request_filters[k] = (v)
-        # Here the `=(v)` will accept any value and will trigger `is_filtering`
-        # to be True in year and genre below if populated
+        selected = listing_filters.read_filters(self.FILTERS, request.GET)
+        # Here we read the year and genres (several can be chosen) from the
+        # query string. Anything that isn't a year or a genre slug is
+        # ignored, see core/filters.py
 
-        # filter by year
-        year = request_filters.get('year', '')
-        if year:
+        # filter by year and genre
+        if selected:
             is_filtering = True
-            features = features.filter(date__year=year)
-        # This appends the `features` variable with a filter. The filter in this
-        # case being a the 'year', which we access via the double underscore
-        # ('__') reverse lookup from the 'date' field.
-
-        # filter by genre
-        genre = request_filters.get('genre', '')
-        if genre:
-            is_filtering = True
-            features = features.filter(
-                feature_page_genre_relationship__genre__slug=genre
-            )
-        # We filter on genre__slug so that we can guarantee a response
-        # that doesn't include spaces e.g. 'heavy-metal' rather than 'heavy
-        #  metal' but it gives more useful information than genre__id
-
-        sort_by = request_filters.get('sort_by', 'modified')
+            features = self.filter_features(features, selected)
+
+        sort_by = request.GET.get('sort_by', 'modified')
         if sort_by == 'date-asc':
             features = features.order_by('first_published_at')
         if sort_by == 'date-desc':
@@ -376,11 +452,8 @@ class FeatureIndexPage(Page):
         if not is_filtering:
             pass
 
-        filters = {
-            'year': year,
-            'genre': genre,
-            'sort_by': sort_by
-        }
+        filters = listing_filters.template_filters(self.FILTERS, selected)
+        filters['sort_by'] = sort_by
 
         return features, filters, is_filtering
 
@@ -403,6 +476,8 @@ class FeatureIndexPage(Page):
 
         context['filters'] = filters
         context['is_filtering'] = is_filtering
+        context['facets'] = self.facet_counts(
+            listing_filters.read_filters(self.FILTERS, request.GET))
 
         return context
 
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.wagtailcore.models import Page
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+
+from monkeywagtail.core.cache import bump_generation
+from monkeywagtail.genre.models import GenreClass
+from .models import FeatureContentPage
+
+# These signals clear the feature index pages' cached filter counts (see
+# FeatureIndexPage.facet_counts in feature_content_page/models.py). They're
+# connected in feature_content_page/apps.py when Django starts.
+# https://docs.djangoproject.com/en/1.9/topics/signals/
+# http://docs.wagtail.io/en/v1.6/reference/signals.html
+
+
+@receiver(page_published, sender=FeatureContentPage)
+@receiver(page_unpublished, sender=FeatureContentPage)
+def clear_feature_facets_on_publish(sender, instance, **kwargs):
+    bump_generation('features')
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def clear_feature_facets_on_move(sender, instance, **kwargs):
+    # When a page is moved (or deleted) Wagtail saves it as a plain `Page`
+    # rather than its specific class
+    if instance.specific_class is FeatureContentPage:
+        bump_generation('features')
+
+
+@receiver(post_save, sender=GenreClass)
+@receiver(post_delete, sender=GenreClass)
+def clear_feature_facets_on_genre_change(sender, instance, **kwargs):
+    # The counts show each genre's name
+    bump_generation('features')
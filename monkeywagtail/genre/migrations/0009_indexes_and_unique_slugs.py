@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:04
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+# Copies of `unique_slug` and `fix_duplicate_slugs` from core/duplicates.py as
+# they were when this migration was written. Migrations keep their own copy of
+# any code they need, so they still do the same thing if the original changes
+# later
+def unique_slug(queryset, value, max_length=255):
+    base = slugify(value, allow_unicode=True)[:max_length] or 'untitled'
+    slug = base
+    number = 2
+    while queryset.filter(slug=slug).exists():
+        suffix = '-%d' % number
+        slug = base[:max_length - len(suffix)] + suffix
+        number += 1
+    return slug
+
+
+def fix_duplicate_slugs(model, max_length=255):
+    changed = 0
+    seen = set()
+    for pk, title, slug in model.objects.order_by('pk').values_list(
+            'pk', 'title', 'slug'):
+        if slug and slug not in seen:
+            seen.add(slug)
+            continue
+        slug = unique_slug(
+            model.objects.exclude(pk=pk), slug or title, max_length)
+        model.objects.filter(pk=pk).update(slug=slug)
+        seen.add(slug)
+        changed += 1
+    return changed
+
+
+def fix_slugs(apps, schema_editor):
+    # Slugs are about to become unique. Blank and repeated slugs get a new
+    # one (see core/duplicates.py)
+    fix_duplicate_slugs(apps.get_model('genre', 'GenreClass'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genre', '0008_genreclass_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='genreclass',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, help_text='The name of the page as it will appear in URLs e.g http://domain.com/blog/[my-slug]/', max_length=255, unique=True),
+        ),
+    ]
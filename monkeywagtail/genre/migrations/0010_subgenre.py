@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:09
+from __future__ import unicode_literals
+
+from django.core.management.color import no_style
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.text import slugify
+import modelcluster.fields
+
+
+# A copy of `unique_slug` from core/duplicates.py as it was when this
+# migration was written. Migrations keep their own copy of any code they
+# need, so they still do the same thing if the original changes later
+def unique_slug(queryset, value, max_length=255):
+    base = slugify(value, allow_unicode=True)[:max_length] or 'untitled'
+    slug = base
+    number = 2
+    while queryset.filter(slug=slug).exists():
+        suffix = '-%d' % number
+        slug = base[:max_length - len(suffix)] + suffix
+        number += 1
+    return slug
+
+
+# Subgenres move from SubgenreClass and SubGenreRelationship (two tables,
+# see genre/models.py) to the one Subgenre table. They keep their ids, order
+# and titles, and get a slug made from the title
+def copy_subgenres(apps, schema_editor):
+    SubGenreRelationship = apps.get_model('genre', 'SubGenreRelationship')
+    Subgenre = apps.get_model('genre', 'Subgenre')
+    for old in SubGenreRelationship.objects.order_by('pk'):
+        Subgenre.objects.create(
+            id=old.pk,
+            genre_id=old.subgenre_in_editor_id,
+            sort_order=old.sort_order,
+            title=old.title,
+            slug=unique_slug(
+                Subgenre.objects.filter(genre_id=old.subgenre_in_editor_id),
+                old.title))
+    # We gave the ids ourselves, so the database's counter for the next id
+    # needs moving on past them
+    connection = schema_editor.connection
+    for sql in connection.ops.sequence_reset_sql(no_style(), [Subgenre]):
+        schema_editor.execute(sql)
+
+
+def copy_subgenres_back(apps, schema_editor):
+    SubGenreRelationship = apps.get_model('genre', 'SubGenreRelationship')
+    Subgenre = apps.get_model('genre', 'Subgenre')
+    for subgenre in Subgenre.objects.order_by('pk'):
+        SubGenreRelationship.objects.create(
+            subgenre_in_editor_id=subgenre.genre_id,
+            sort_order=subgenre.sort_order,
+            title=subgenre.title)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genre', '0009_indexes_and_unique_slugs'),
+    ]
+
+    operations = [
+        # The new model's ParentalKey only gets the old one's related_name
+        # (sub_genre_relationship) once the old one's gone, in 0011
+        migrations.CreateModel(
+            name='Subgenre',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sort_order', models.IntegerField(blank=True, editable=False, null=True)),
+                ('title', models.CharField(help_text="Be as esoteric as you'd like. This displays on the genre page as a list to end users", max_length=255)),
+                ('slug', models.SlugField(allow_unicode=True, blank=True, max_length=255)),
+                ('genre', modelcluster.fields.ParentalKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='genre.GenreClass')),
+            ],
+            options={
+                'verbose_name': 'Subgenre',
+                'verbose_name_plural': 'Subgenres',
+                'ordering': ['sort_order'],
+                'abstract': False,
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='subgenre',
+            unique_together=set([('genre', 'slug')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='subgenre',
+            index_together=set([('genre', 'sort_order')]),
+        ),
+        migrations.RunPython(copy_subgenres, copy_subgenres_back),
+        migrations.DeleteModel(
+            name='SubGenreRelationship',
+        ),
+        migrations.DeleteModel(
+            name='SubgenreClass',
+        ),
+    ]
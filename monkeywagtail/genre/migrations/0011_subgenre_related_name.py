@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:09
+from __future__ import unicode_literals
+
+from django.db import migrations
+import django.db.models.deletion
+import modelcluster.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genre', '0010_subgenre'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subgenre',
+            name='genre',
+            field=modelcluster.fields.ParentalKey(on_delete=django.db.models.deletion.CASCADE, related_name='sub_genre_relationship', to='genre.GenreClass'),
+        ),
+    ]
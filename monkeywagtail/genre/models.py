@@ -7,39 +7,64 @@ from wagtail.wagtailadmin.edit_handlers import FieldPanel, InlinePanel, MultiFie
 from wagtail.wagtailsnippets.models import register_snippet
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
+from monkeywagtail.core.duplicates import unique_slug
 
 
-class SubgenreClass(ClusterableModel):
+# Subgenres
+# A genre's subgenres are edited in an InlinePanel on the genre (see
+# GenreClass.panels below). They used to be a `SubgenreClass` model with a
+# `SubGenreRelationship(Orderable, SubgenreClass)` on top, which is Django's
+# multi-table inheritance: two tables, so every read joined them and every
+# save wrote to both. Now a subgenre is one row in one table.
+# https://docs.djangoproject.com/en/1.9/topics/db/models/#multi-table-inheritance
+class Subgenre(Orderable, models.Model):
+    genre = ParentalKey('GenreClass', related_name='sub_genre_relationship')
 
     title = models.CharField(
         max_length=255,
         help_text="Be as esoteric as you'd like. This displays on the genre "
         "page as a list to end users")
 
-    @property
-    def subgenre_url(self):
-        return self.slug
+    slug = models.SlugField(allow_unicode=True, max_length=255, blank=True)
+    # Made from the title when the subgenre is first saved, unique within
+    # its genre
 
     panels = [
         FieldPanel('title')
     ]
 
+    class Meta(Orderable.Meta):
+        verbose_name = "Subgenre"
+        verbose_name_plural = "Subgenres"
+        unique_together = [('genre', 'slug')]
+        index_together = [('genre', 'sort_order')]
+
     # Even though there's no admin screen for subgenres we still need to return
     # the title for it to populate the inlinepanel on the album screen
     def __str__(self):
         return self.title
 
-        class Meta:
-            verbose_name = "Subgenre"
-            verbose_name_plural = "Subgenres"
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(
+                Subgenre.objects.filter(genre_id=self.genre_id).exclude(
+                    pk=self.pk), self.title)
+        return super(Subgenre, self).save(*args, **kwargs)
 
+    @property
+    def subgenre_url(self):
+        return self.slug
+
+    @property
+    def subgenre_in_editor(self):
+        # What the genre was called on the old SubGenreRelationship model
+        return self.genre
 
-# This, calls _all_ of the fields from the model above and builds a one way
-# relationship. The inline panel that's placed within the genre class will
-# populate the SubgenreClass fields
-class SubGenreRelationship(Orderable, SubgenreClass):
-        subgenre_in_editor = ParentalKey(
-            'GenreClass', related_name='sub_genre_relationship')
+
+# The old names, so code that still uses them carries on working. Both are
+# the one table model above now
+SubgenreClass = Subgenre
+SubGenreRelationship = Subgenre
 
 
 class GenreClass(ClusterableModel):
@@ -56,6 +81,7 @@ class GenreClass(ClusterableModel):
     slug = models.SlugField(
         allow_unicode=True,
         max_length=255,
+        unique=True,
         help_text="The name of the page as it will appear in URLs e.g http://domain.com/blog/[my-slug]/",
     )
     # Title
@@ -109,6 +135,12 @@ class GenreClass(ClusterableModel):
         # Use __unicode__ if you're still using Python 2.7
         return self.title
 
+    def cache_dependents(self):
+        # The listings to clear from the page cache when the genre changes,
+        # as well as the pages made using it. Have a look at
+        # core/pagecache.py
+        return ['/genres/', self.url, '/artists/genre/' + self.slug]
+
     @property
     def description(self):
         # Descriptions aren't mandatory so make if fail silently
@@ -133,13 +165,12 @@ class GenreClass(ClusterableModel):
 
     # This is for the model admin view
     def subgenre_list(obj):
+        # The title is on the Subgenre itself, so this doesn't need to join
+        # another table (have a look at Subgenre above)
         subgenres = ', '.join([
             n.title for n in obj.sub_genre_relationship.all()
         ])
         return subgenres
-        # We can get to title of the SubgenreClass clusterable model through the
-        # parental key of SubGenreRelationship because we're passing through
-        # SubgenreClass as a parameter to that model (I think...)
 
     def get_context(self, request):
         context = super(GenreClass, self).get_context(request)
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from monkeywagtail.genre.models import GenreClass, Subgenre
+
+# Run with `./manage.py test monkeywagtail.genre`
+# https://docs.djangoproject.com/en/1.9/topics/testing/overview/
+
+
+class GenreAdminQueriesTest(TestCase):
+    """
+    The genres listing in the admin fetches every row's subgenres up front,
+    so it should take the same number of queries however many rows there
+    are. Have a look at genre/wagtail_hooks.py
+    """
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+
+    def add_genres(self, count):
+        start = GenreClass.objects.count()
+        for i in range(start, start + count):
+            genre = GenreClass(title='Genre %d' % i, slug='test-genre-%d' % i)
+            genre.sub_genre_relationship = [
+                Subgenre(title='Sub %d' % j) for j in range(3)]
+            genre.save()
+
+    def test_queries_dont_grow_with_rows(self):
+        path = '/admin/genre/genreclass/'
+        self.add_genres(1)
+        self.client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(path)
+        expected = len(queries)
+
+        for total in (10, 50):
+            self.add_genres(total - GenreClass.objects.count())
+            with self.assertNumQueries(expected):
+                response = self.client.get(path)
+            self.assertEqual(len(response.context['object_list']), total)
@@ -12,6 +12,12 @@ class GenreAdmin(ModelAdmin):
     list_display = ('title', 'subgenre_list')
     search_fields = ('title',)
 
+    def get_queryset(self, request):
+        # Fetch every row's subgenres in one query, rather than a query a row
+        # for `subgenre_list`
+        qs = super(GenreAdmin, self).get_queryset(request)
+        return qs.prefetch_related('sub_genre_relationship')
+
 
 # class GenreAdminGroup(ModelAdminGroup):
 #     menu_label = 'Genres'
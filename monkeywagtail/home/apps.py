@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class HomeConfig(AppConfig):
+    name = 'monkeywagtail.home'
+    label = 'home'
+
+    def ready(self):
+        # Connect the signals that clear the cached featured content
+        from . import signals  # noqa
@@ -0,0 +1,195 @@
+from django.db.models import Prefetch
+from django.db.models.query import prefetch_related_objects
+from wagtail.wagtailcore.models import Page
+
+from monkeywagtail.core import dependencies
+from monkeywagtail.core.cache import cached
+from monkeywagtail.core.prefetch import (
+    feature_prefetches, review_album_prefetches)
+from monkeywagtail.core.renditions import attach_renditions, get_rendition
+
+# HOME PAGE FEATURED CONTENT
+# The home page shows three featured pages and the four most recently
+# published pages from each of three featured sections. Asking for those in
+# the template (`page.featured_page_1.specific.albums`...) fetches each page
+# again every time it's mentioned, and each page's albums, artists and image
+# one page at a time.
+#
+# `featured_content` fetches the lot up front:
+#
+# * the featured pages and sections in one query
+# * the four latest pages in each section, a query per section
+# * the specific pages (ReviewPage, FeatureContentPage...) with a query per
+#   type of page rather than per page
+# * each type's albums, artists, genres and authors with a query per
+#   relationship (see core/prefetch.py)
+# * the images, a couple of queries per size (see core/renditions.py)
+#
+# and then caches the result. It's cleared when the home page, a featured page
+# or a page in a featured section is published (see home/signals.py).
+#
+# Pages with a StreamField can't be pickled (and so can't be cached), so what
+# we cache is a summary of each page: just the bits the template shows, as
+# plain data. Have a look at `summarise` below.
+
+
+def review_prefetches():
+    from monkeywagtail.review.models import ReviewAuthorRelationship
+
+    return review_album_prefetches() + [
+        Prefetch(
+            'review_author_relationship',
+            queryset=ReviewAuthorRelationship.objects.select_related('author')
+        ),
+    ]
+
+
+# What to prefetch for each type of page, by model name
+PREFETCHES = {
+    'reviewpage': review_prefetches,
+    'featurecontentpage': feature_prefetches,
+}
+
+FEATURED_PAGES = ['featured_page_1', 'featured_page_2', 'featured_page_3']
+FEATURED_SECTIONS = [
+    'featured_section_1', 'featured_section_2', 'featured_section_3']
+
+# The image size each part of the template shows
+FEATURED_PAGE_IMAGE = 'width-750'
+SECTION_IMAGES = {
+    'featured_section_1': 'fill-150x150',
+    'featured_section_2': 'fill-350x150',
+}
+SECTION_SIZE = 4
+
+
+def specific_pages(page_ids):
+    """
+    The live specific pages for `page_ids` by id, with their relationships
+    fetched
+    """
+    pages = list(Page.objects.live().filter(pk__in=page_ids).specific())
+    by_type = {}
+    for page in pages:
+        by_type.setdefault(type(page), []).append(page)
+    for model, typed_pages in by_type.items():
+        prefetches = PREFETCHES.get(model._meta.model_name)
+        if prefetches:
+            prefetch_related_objects(typed_pages, prefetches())
+    return {page.pk: page for page in pages}
+
+
+def attach_images(pages, spec):
+    # Not every type of page has an `image` (tour pages have `tour_image`)
+    with_image = [page for page in pages if hasattr(page, 'image_id')]
+    for model in set(type(page) for page in with_image):
+        attach_renditions(
+            [page for page in with_image if type(page) is model],
+            'image', spec)
+
+
+def related(page, name):
+    # `albums` is a method on some types of page and a property on others,
+    # and some types of page don't have it at all
+    value = getattr(page, name, None)
+    if callable(value):
+        value = value()
+    return value or []
+
+
+def summarise(page, spec=None):
+    """
+    What home_page.html shows of `page`, along with the `spec` rendition of
+    its image
+    """
+    return {
+        'title': page.title,
+        'url': page.url,
+        'date': getattr(page, 'date', ''),
+        'rating': getattr(page, 'rating', None),
+        'listing_introduction': getattr(page, 'listing_introduction', ''),
+        'authors': [
+            {'title': author.title, 'url': author.url}
+            for author in related(page, 'authors')
+        ],
+        'albums': [
+            {
+                'title': album.title,
+                'artists': [str(artist) for artist in album.artists()],
+                'genres': [str(genre) for genre in album.genres()],
+            }
+            for album in related(page, 'albums')
+        ],
+        'photo': get_rendition(page, 'image', spec) if (
+            spec and hasattr(page, 'image_id')) else None,
+    }
+
+
+def build_featured_content(home):
+    featured_ids = {
+        name: getattr(home, name + '_id')
+        for name in FEATURED_PAGES + FEATURED_SECTIONS
+    }
+    sections = {
+        section.pk: section for section in Page.objects.live().filter(
+            pk__in=[featured_ids[name] for name in FEATURED_SECTIONS])
+    }
+
+    section_item_ids = {}
+    for name in FEATURED_SECTIONS:
+        section = sections.get(featured_ids[name])
+        if section is not None:
+            section_item_ids[name] = list(
+                section.get_children().live().order_by(
+                    '-first_published_at').values_list(
+                        'pk', flat=True)[:SECTION_SIZE])
+
+    pages = specific_pages(
+        [featured_ids[name] for name in FEATURED_PAGES] +
+        [pk for ids in section_item_ids.values() for pk in ids])
+
+    content = {}
+    featured_pages = [
+        pages[featured_ids[name]] for name in FEATURED_PAGES
+        if featured_ids[name] in pages]
+    attach_images(featured_pages, FEATURED_PAGE_IMAGE)
+    for name in FEATURED_PAGES:
+        page = pages.get(featured_ids[name])
+        content[name] = summarise(page, FEATURED_PAGE_IMAGE) if (
+            page is not None) else None
+
+    for name in FEATURED_SECTIONS:
+        section = sections.get(featured_ids[name])
+        if section is None:
+            content[name] = None
+            continue
+        items = [
+            pages[pk] for pk in section_item_ids[name] if pk in pages]
+        spec = SECTION_IMAGES.get(name)
+        if spec:
+            attach_images(items, spec)
+        content[name] = {
+            'title': section.title,
+            'items': [summarise(page, spec) for page in items],
+        }
+    return content
+
+
+def featured_content(home, use_cache=True):
+    """
+    The featured pages and sections for the home page. Cached, along with
+    what it was made from so the page cache still knows (see
+    core/dependencies.py)
+    """
+    if not use_cache:
+        return build_featured_content(home)
+
+    def build():
+        with dependencies.recording() as used:
+            content = build_featured_content(home)
+        return {'content': content, 'dependencies': used}
+
+    payload = cached('home', [home.pk], build)
+    for key in payload['dependencies']:
+        dependencies.note_key(key)
+    return payload['content']
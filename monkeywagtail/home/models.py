@@ -84,9 +84,15 @@ class HomePage(Page):
     )
 
     def get_context(self, request):
+        # The featured pages and sections, fetched (and cached) all in one go
+        # rather than by the template. Have a look at home/featured.py
+        from .featured import featured_content
+
         context = super(HomePage, self).get_context(request)
-        context['children'] = Page.objects.live().in_menu().descendant_of(self)
-        all_entries = Page.objects.all()
+        # Previews show the featured pages the editor has just picked, not
+        # the cached ones
+        context['featured'] = featured_content(
+            self, use_cache=not getattr(request, 'is_preview', False))
         return context
 
     content_panels = Page.content_panels + [
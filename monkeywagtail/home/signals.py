@@ -0,0 +1,62 @@
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.wagtailcore.models import Page
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+
+from monkeywagtail.album.models import Album
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.core.cache import bump_generation
+from monkeywagtail.genre.models import GenreClass
+from .featured import FEATURED_PAGES, FEATURED_SECTIONS
+from .models import HomePage
+
+# These signals clear the home page's cached featured content (see
+# home/featured.py). They're connected in home/apps.py when Django starts.
+# https://docs.djangoproject.com/en/1.9/topics/signals/
+# http://docs.wagtail.io/en/v1.6/reference/signals.html
+
+
+def is_featured(page):
+    """
+    Whether `page` is a home page, one of its featured pages or a page in one
+    of its featured sections
+    """
+    if isinstance(page, HomePage):
+        return True
+    query = Q()
+    for name in FEATURED_PAGES:
+        query |= Q(**{name: page.pk})
+    parent = page.get_parent()
+    if parent is not None:
+        for name in FEATURED_SECTIONS:
+            query |= Q(**{name: parent.pk})
+    return HomePage.objects.filter(query).exists()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def clear_featured_content_on_publish(sender, instance, **kwargs):
+    if is_featured(instance):
+        bump_generation('home')
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def clear_featured_content_on_move(sender, instance, **kwargs):
+    # A page moving in to (or out of) a featured section
+    bump_generation('home')
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Artist)
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=GenreClass)
+@receiver(post_delete, sender=GenreClass)
+def clear_featured_content_on_snippet_change(sender, instance, **kwargs):
+    # The featured pages show their albums' artists and genres, and authors
+    bump_generation('home')
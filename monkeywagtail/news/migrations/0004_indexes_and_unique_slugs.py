@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:05
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# A copy of `delete_duplicate_rows` from core/duplicates.py as it was when
+# this migration was written. Migrations keep their own copy of any code they
+# need, so they still do the same thing if the original changes later
+def delete_duplicate_rows(model, fields):
+    seen = set()
+    duplicates = []
+    for row in model.objects.order_by('pk').values_list('pk', *fields):
+        if row[1:] in seen:
+            duplicates.append(row[0])
+        seen.add(row[1:])
+    model.objects.filter(pk__in=duplicates).delete()
+    return len(duplicates)
+
+
+def delete_duplicate_relationships(apps, schema_editor):
+    # Each page can only be linked to an artist, album etc once from now on,
+    # so repeats are removed first (see core/duplicates.py)
+    delete_duplicate_rows(
+        apps.get_model('news', 'AuthorFeaturePageRelationship'),
+        ['page', 'author'])
+    delete_duplicate_rows(
+        apps.get_model('news', 'NewsAlbumRelationship'), ['page', 'albums'])
+    delete_duplicate_rows(
+        apps.get_model('news', 'NewsArtistRelationship'), ['page', 'artists'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_auto_20170203_1755'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_relationships, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='authorfeaturepagerelationship',
+            unique_together=set([('page', 'author')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='newsalbumrelationship',
+            unique_together=set([('page', 'albums')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='newsartistrelationship',
+            unique_together=set([('page', 'artists')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='authorfeaturepagerelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='newsalbumrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='newsartistrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+    ]
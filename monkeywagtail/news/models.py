@@ -9,8 +9,12 @@ from wagtail.wagtailadmin.edit_handlers import (
         StreamFieldPanel,)
 from wagtail.wagtailsnippets.edit_handlers import SnippetChooserPanel
 from monkeywagtail.core.blocks import SimplifiedBlock
+from monkeywagtail.core.memoize import (
+    CachedRelationsMixin, cached_relation, related_objects)
+from monkeywagtail.core.renditions import rendition_img_tag
 from modelcluster.fields import ParentalKey
-from monkeywagtail.core.models import RelatedPage
+from monkeywagtail.core.models import (
+    DistinctRelationshipsMixin, RelatedPage)
 
 
 # Related page relationship
@@ -43,6 +47,10 @@ class NewsAlbumRelationship(Orderable, models.Model):
         SnippetChooserPanel('albums')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'albums')]
+        index_together = [('page', 'sort_order')]
+
 
 class NewsArtistRelationship(Orderable, models.Model):
     page = ParentalKey(
@@ -59,6 +67,10 @@ class NewsArtistRelationship(Orderable, models.Model):
         SnippetChooserPanel('artists')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'artists')]
+        index_together = [('page', 'sort_order')]
+
 
 class AuthorFeaturePageRelationship(Orderable, models.Model):
     # We get to define another m2m for authors since a page can have many authors
@@ -76,8 +88,12 @@ class AuthorFeaturePageRelationship(Orderable, models.Model):
         SnippetChooserPanel('author')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'author')]
+        index_together = [('page', 'sort_order')]
 
-class NewsPage(Page):
+
+class NewsPage(DistinctRelationshipsMixin, CachedRelationsMixin, Page):
 
     search_fields = Page.search_fields + [
         index.SearchField('title'),
@@ -122,40 +138,29 @@ class NewsPage(Page):
     ]
 
     # We iterate within the model over the artists, genres and subgenres
-    # so they can be accessible to the template via a for loop
+    # so they can be accessible to the template via a for loop.
+    # Each is only fetched once per page, have a look at core/memoize.py
+    @cached_relation
     def artists(self):
-        artists = [
-            n.artists for n in self.news_artist_relationship.all()
-        ]
-        return artists
+        return related_objects(self, 'news_artist_relationship', 'artists')
 
+    @cached_relation
     def authors(self):
-        authors = [
-            n.author for n in self.news_author_relationship.all()
-        ]
-        return authors
+        return related_objects(self, 'news_author_relationship', 'author')
 
+    @cached_relation
     def albums(self):
-        albums = [
-             n.albums for n in self.news_album_relationship.all()
-        ]
-
-        return albums
+        return related_objects(self, 'news_album_relationship', 'albums')
 
+    @cached_relation
     def relatedpages(self):
-        relatedpages = [
-            n.page for n in self.related_pages.all()
-        ]
-        return relatedpages
+        return related_objects(self, 'related_pages', 'page')
 
     @property
     def album_image(self):
-        # fail silently if there is no profile pic or the rendition file can't
-        # be found. Note @richbrennan worked out how to do this...
-        try:
-            return self.image.get_rendition('fill-400x400').img_tag()
-        except:
-            return ''
+        # Returns '' if there is no image or the rendition file can't be
+        # found. Have a look at core/renditions.py
+        return rendition_img_tag(self, 'image', 'fill-400x400')
 
     parent_page_types = [
         'news.NewsIndexPage'
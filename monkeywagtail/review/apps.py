@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ReviewConfig(AppConfig):
+    name = 'monkeywagtail.review'
+    label = 'review'
+
+    def ready(self):
+        # Connect the signals that keep the ReviewFacet table up to date
+        from . import signals  # noqa
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from monkeywagtail.review.models import ReviewFacet, ReviewPage
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the ReviewFacet table used by the review index page filters "
+        "from scratch. Run this after the migration that adds the table, or "
+        "if the filters ever look out of step with the reviews."
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        with transaction.atomic():
+            ReviewFacet.objects.all().delete()
+            for review in ReviewPage.objects.live().iterator():
+                ReviewFacet.objects.bulk_create(
+                    ReviewFacet.facet_rows(review))
+                count += 1
+
+        self.stdout.write("Rebuilt facets for %d reviews" % count)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 08:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0029_unicode_slugfield_dj19'),
+        ('review', '0025_auto_20161211_1856'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('artist', 'Artist'), ('genre', 'Genre'), ('author', 'Author')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('letter', models.CharField(blank=True, max_length=1)),
+                ('index_page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='review.ReviewPage')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='reviewfacet',
+            index_together=set([('facet', 'object_id'), ('index_page', 'facet', 'name')]),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:04
+from __future__ import unicode_literals
+
+import django.core.validators
+from django.db import migrations, models
+
+
+# A copy of `delete_duplicate_rows` from core/duplicates.py as it was when
+# this migration was written. Migrations keep their own copy of any code they
+# need, so they still do the same thing if the original changes later
+def delete_duplicate_rows(model, fields):
+    seen = set()
+    duplicates = []
+    for row in model.objects.order_by('pk').values_list('pk', *fields):
+        if row[1:] in seen:
+            duplicates.append(row[0])
+        seen.add(row[1:])
+    model.objects.filter(pk__in=duplicates).delete()
+    return len(duplicates)
+
+
+def delete_duplicate_relationships(apps, schema_editor):
+    # Each page can only be linked to an artist, album etc once from now on,
+    # so repeats are removed first (see core/duplicates.py)
+    delete_duplicate_rows(
+        apps.get_model('review', 'ReviewAlbumRelationship'), ['page', 'album'])
+    delete_duplicate_rows(
+        apps.get_model('review', 'ReviewAuthorRelationship'),
+        ['page', 'author'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('review', '0026_reviewfacet'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_relationships, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reviewpage',
+            name='rating',
+            field=models.IntegerField(db_index=True, help_text='Your rating needs to be between 0 - 5', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)], verbose_name='Album rating'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reviewalbumrelationship',
+            unique_together=set([('page', 'album')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reviewauthorrelationship',
+            unique_together=set([('page', 'author')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='reviewauthorrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+    ]
@@ -3,7 +3,6 @@ import collections
 
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from wagtail.wagtailcore.models import Orderable, Page
 from wagtail.wagtailcore.fields import StreamField
 from wagtail.wagtailsearch import index
@@ -13,8 +12,16 @@ from wagtail.wagtailadmin.edit_handlers import (
     MultiFieldPanel)
 from wagtail.wagtailsnippets.edit_handlers import SnippetChooserPanel
 from modelcluster.fields import ParentalKey
+from monkeywagtail.artist.models import make_sort_name
+from monkeywagtail.core import dependencies
+from monkeywagtail.core import filters as listing_filters
 from monkeywagtail.core.blocks import SimplifiedBlock
-from monkeywagtail.core.models import RelatedPage
+from monkeywagtail.core.memoize import (
+    CachedRelationsMixin, cached_relation, related_objects)
+from monkeywagtail.core.models import (
+    DistinctRelationshipsMixin, RelatedPage)
+from monkeywagtail.core.pagination import paginate
+from monkeywagtail.core.renditions import attach_renditions
 
 FilterObject = collections.namedtuple('FilterObject', 'id, name, slug')
 # https://docs.python.org/2/library/collections.html#collections.namedtuple
@@ -43,6 +50,9 @@ class ReviewAlbumRelationship(models.Model):
         SnippetChooserPanel('album')
     ]
 
+    class Meta:
+        unique_together = [('page', 'album')]
+
 
 # And the authors
 class ReviewAuthorRelationship(Orderable, models.Model):
@@ -60,8 +70,117 @@ class ReviewAuthorRelationship(Orderable, models.Model):
         SnippetChooserPanel('author')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'author')]
+        index_together = [('page', 'sort_order')]
+
+
+# Review facets
+# The filters on the review index page (artist A-Z, "Reviews by" and the genre
+# checkboxes) need every artist, genre and author across every live review.
+# Getting those by looping over reviews -> albums -> relationships is a lot of
+# queries, and the template asks for them more than once.
+#
+# Instead we keep a flat table with a row per review for each artist, genre and
+# author it relates to. It's kept up to date by the signals in review/signals.py
+# whenever a review is published or unpublished (rows are deleted along with the
+# review) and can be rebuilt from scratch with
+# `./manage.py rebuild_review_facets`
+#
+# The filters can then be answered with a single query against this table
+class ReviewFacet(models.Model):
+    ARTIST = 'artist'
+    GENRE = 'genre'
+    AUTHOR = 'author'
+    FACET_CHOICES = (
+        (ARTIST, 'Artist'),
+        (GENRE, 'Genre'),
+        (AUTHOR, 'Author'),
+    )
+    FACET_MODELS = {
+        ARTIST: 'artist.Artist',
+        GENRE: 'genre.GenreClass',
+        AUTHOR: 'author.Author',
+    }
+
+    review = models.ForeignKey(
+        'ReviewPage', related_name='facets', on_delete=models.CASCADE)
+    # The page the review sits beneath, so an index page can grab its own
+    # facets without having to look at the page tree
+    index_page = models.ForeignKey(
+        'wagtailcore.Page', related_name='+', on_delete=models.CASCADE)
+    facet = models.CharField(max_length=10, choices=FACET_CHOICES)
+    # The id, name and slug of the artist, genre or author
+    object_id = models.PositiveIntegerField()
+    name = models.CharField(max_length=255)
+    slug = models.CharField(max_length=255, blank=True)
+    # First letter of artist names for the A-Z list (Artist.letter)
+    letter = models.CharField(max_length=1, blank=True)
+
+    class Meta:
+        index_together = [
+            ('index_page', 'facet', 'name'),
+            ('facet', 'object_id'),
+        ]
+
+    @classmethod
+    def facet_rows(cls, review):
+        """
+        Return the (unsaved) facet rows for a review
+        """
+        from monkeywagtail.core.prefetch import album_prefetches
+
+        facets = []
+
+        def add(facet, obj, letter=''):
+            facets.append(cls(
+                review=review,
+                index_page_id=review.get_parent().pk,
+                facet=facet,
+                object_id=obj.pk,
+                name=obj.title,
+                slug=obj.slug,
+                letter=letter,
+            ))
+
+        album_relationships = ReviewAlbumRelationship.objects.filter(
+            page=review).select_related('album').prefetch_related(
+                *album_prefetches('album__'))
+        for relationship in album_relationships:
+            album = relationship.album
+            for artist in album.artists():
+                add(cls.ARTIST, artist, artist.letter)
+            for genre in album.genres():
+                add(cls.GENRE, genre)
+
+        author_relationships = ReviewAuthorRelationship.objects.filter(
+            page=review).select_related('author')
+        for relationship in author_relationships:
+            add(cls.AUTHOR, relationship.author)
+
+        return facets
+
+    @classmethod
+    def rebuild_for_review(cls, review):
+        """
+        Replace the facet rows for a review. Reviews that aren't live don't
+        appear in the filters, so they just get their rows removed
+        """
+        cls.objects.filter(review_id=review.pk).delete()
+        if review.live:
+            cls.objects.bulk_create(cls.facet_rows(review))
+
+    @classmethod
+    def update_object(cls, facet, obj, letter=''):
+        """
+        Keep the name, slug and letter in step when an artist, genre or
+        author is edited
+        """
+        cls.objects.filter(facet=facet, object_id=obj.pk).update(
+            name=obj.title, slug=obj.slug, letter=letter)
+
 
-class ReviewPage(Page):
+class ReviewPage(DistinctRelationshipsMixin, CachedRelationsMixin, Page):
     """
     This is a page for an album review
     """
@@ -86,7 +205,8 @@ class ReviewPage(Page):
     # do that, but that's what you have to do!
     rating = models.IntegerField("Album rating", validators=[
         MinValueValidator(0), MaxValueValidator(5)],
-        help_text="Your rating needs to be between 0 - 5")
+        help_text="Your rating needs to be between 0 - 5", db_index=True)
+    # Indexed for the review index's rating filter
 
     # Note below that standard blocks use 'help_text' for supplementary text
     # rather than 'label' as with StreamField
@@ -156,18 +276,44 @@ class ReviewPage(Page):
     ]
 
     @property
+    @cached_relation
     def albums(self):
-        albums = [
-            n.album for n in self.review_album_relationship.all()
-        ]
-        return albums
+        return related_objects(self, 'review_album_relationship', 'album')
 
     @property
+    @cached_relation
     def authors(self):
-        authors = [
-            n.author for n in self.review_author_relationship.all()
+        return related_objects(self, 'review_author_relationship', 'author')
+
+    def cache_dependents(self):
+        # The artist and author pages that list this review, so they're
+        # cleared from the page cache when it's published. Have a look at
+        # core/pagecache.py
+        artists = [
+            artist for album in self.albums for artist in album.artists()
         ]
-        return authors
+        return [obj.url for obj in artists + self.authors]
+
+
+# Reviews matching the review index's filters, as subqueries of page ids so
+# a review with two matching artists (or genres) is still listed once. Have
+# a look at core/filters.py
+def artist_reviews(letters):
+    # Artists' sort names are lower case without accents or a leading 'The'
+    # (see artist/models.py), so this is a plain `startswith` that can use
+    # the index on sort_name, rather than `istartswith` on the title
+    lookup = (
+        'album__album_artist_relationship__artist_name__sort_name__startswith')
+    query = models.Q()
+    for letter in letters:
+        query |= models.Q(**{lookup: letter})
+    return ReviewAlbumRelationship.objects.filter(query).values('page_id')
+
+
+def genre_reviews(slugs):
+    return ReviewAlbumRelationship.objects.filter(
+        album__album_genre_relationship__genres__slug__in=slugs
+    ).values('page_id')
 
 
 class ReviewIndexPage(Page):
@@ -197,92 +343,67 @@ class ReviewIndexPage(Page):
         'ReviewPage'
     ]
 
-    def authors(self):
+    FILTERS = [
+        listing_filters.Filter(
+            'rating', lookup='rating__gte',
+            clean=listing_filters.whole_number(1, 5)),
+        listing_filters.Filter(
+            'artist_name', subquery=artist_reviews, clean=make_sort_name),
+        listing_filters.Filter('genre', multiple=True, subquery=genre_reviews),
+    ]
+
+    def facets(self, facet):
         """
-        Return a list of genres from pages that have a relationship defined
-        with a genre and are living beneath this page.
+        Return the distinct artists, genres or authors from live reviews
+        beneath this page, in alphabetical order. This reads from the
+        ReviewFacet table above rather than looping through every review.
         """
-        authors = set()
-
-        for review_page in ReviewPage.objects.live().descendant_of(self):
-            # import pdb; pdb.set_trace()
-            review_authors = [
-                d.author for d in review_page.review_author_relationship.all()
-            ]
-
-            for author in review_authors:
-                authors.add(FilterObject(
-                    id=author.id,
-                    name=author.title,
-                    slug=author.slug
-                ))
+        rows = ReviewFacet.objects.filter(
+            index_page=self, facet=facet
+        ).values_list('object_id', 'name', 'slug').order_by('name').distinct()
+        # The names come straight from the table rather than from the
+        # artists, genres and authors themselves, so we tell the page cache
+        # which ones we've shown (see core/dependencies.py)
+        for pk, name, slug in rows:
+            dependencies.note(ReviewFacet.FACET_MODELS[facet], pk)
+        return [
+            FilterObject(id=pk, name=name, slug=slug) for pk, name, slug in rows
+        ]
 
-        return authors
+    def authors(self):
+        """
+        Return a list of authors who have written reviews living beneath this
+        page.
+        """
+        return self.facets(ReviewFacet.AUTHOR)
 
     def artists(self):
         """
         Return a list of artists from reviews that have a relationship defined
         with an album and are living beneath this page.
-
-        Note it will return 'a' and 'A' as different strings
         """
-        artists = set()
-        # Don't duplicate
-        for review_page in ReviewPage.objects.live().descendant_of(self):
-            # import pdb; pdb.set_trace()
-            review_page_albums = [
-                n.album for n in review_page.review_album_relationship.all()
-                ]
-            for album in review_page_albums:
-                album_artists = [
-                    n.artist_name for n in album.album_artist_relationship.all()
-                ]
-                for artist in album_artists:
-                    artists.add(FilterObject(
-                        id=artist.id,
-                        name=artist.title,
-                        slug=artist.slug
-                        )
-                    )
-        return sorted(artists, key=lambda d: d.name)
+        return self.facets(ReviewFacet.ARTIST)
 
     def genres(self):
         """
         Return a list of genres from reviews that have a relationship defined
         with an album and are living beneath this page.
+        """
+        return self.facets(ReviewFacet.GENRE)
 
-        Note it will return 'a' and 'A' as different strings
+    def artist_letters(self):
+        """
+        Return the first letters of the artists reviewed beneath this page
+        for the A-Z list. Upper-cased, so 'a' and 'A' are the same letter
         """
-        genres = set()
-        # Don't duplicate
-        for review_page in ReviewPage.objects.live().descendant_of(self):
-            # import pdb; pdb.set_trace()
-            review_page_albums = [
-                n.album for n in review_page.review_album_relationship.all()
-                ]
-            for album in review_page_albums:
-                album_genres = [
-                    n.genres for n in album.album_genre_relationship.all()
-                ]
-                for genre in album_genres:
-                    genres.add(FilterObject(
-                        id=genre.id,
-                        name=genre.title,
-                        slug=genre.slug
-                        )
-                    )
-        return sorted(genres, key=lambda d: d.name)
+        return ReviewFacet.objects.filter(
+            index_page=self, facet=ReviewFacet.ARTIST
+        ).exclude(letter='').values_list(
+            'letter', flat=True).order_by('letter').distinct()
 
     def paginate(self, request, objects):
-        page = request.GET.get('page')
-        paginator = Paginator(objects, 2)  # Show 20 objects per page
-        try:
-            pages = paginator.page(page)
-        except PageNotAnInteger:
-            pages = paginator.page(1)
-        except EmptyPage:
-            pages = paginator.page(paginator.num_pages)
-        return pages
+        # Shows DEFAULT_PER_PAGE objects per page. See core/pagination.py
+        return paginate(request, objects)
 
     def get_filtered_review_pages(self, request={}):
         # useful primer about defining python functions
@@ -294,35 +415,15 @@ class ReviewIndexPage(Page):
         is_filtering = False
         # By default we return an unfiltered list
 
-        request_filters = {}
-        for k, v in request.GET.items():
-            request_filters[k] = (v)
-
-        # filter on rating
-        rating = request_filters.get('rating', '')
-        if rating:
-            is_filtering = True
-            reviews = reviews.filter(
-                rating__gte=rating
-            )
-
-        # filter on first letter of review page album
-        artist_name = request_filters.get('artist_name', '')
-        if artist_name:
-            is_filtering = True
-            reviews = reviews.filter(
-                review_album_relationship__album__album_artist_relationship__artist_name__title__istartswith=artist_name
-            )
-
-        # filter by genre
-        genre = request_filters.get('genre', '')
-        if genre:
+        # filter on rating, first letter of the album's artist and genre
+        # (several genres can be ticked). See core/filters.py
+        selected = listing_filters.read_filters(self.FILTERS, request.GET)
+        if selected:
             is_filtering = True
-            reviews = reviews.filter(
-                review_album_relationship__album__album_genre_relationship__genres__slug=genre
-            )
+            reviews = listing_filters.apply_filters(
+                reviews, self.FILTERS, selected)
 
-        sort_by = request_filters.get('sort_by', 'modified')
+        sort_by = request.GET.get('sort_by', 'modified')
         if sort_by == 'rating-asc':
             reviews = reviews.order_by('-rating', '-first_published_at')
         if sort_by == 'rating-desc':
@@ -335,12 +436,8 @@ class ReviewIndexPage(Page):
             # https://docs.djangoproject.com/en/1.10/ref/models/querysets/#order-by
 
         # Defining the filter
-        filters = {
-            'rating': rating,
-            'artist_name': artist_name,
-            'genre': genre,
-            'sort_by': sort_by,
-        }
+        filters = listing_filters.template_filters(self.FILTERS, selected)
+        filters['sort_by'] = sort_by
 
         return reviews, filters, is_filtering
 
@@ -353,9 +450,20 @@ class ReviewIndexPage(Page):
         # Running that dict() through my page models get_filtered_review_pages function
         reviews, filters, is_filtering = self.get_filtered_review_pages(request)
 
+        # Fetch each review's albums, artists and genres up front (have a look
+        # at core/prefetch.py)
+        from monkeywagtail.core.prefetch import review_album_prefetches
+        reviews = reviews.prefetch_related(*review_album_prefetches())
+
         # Pagination. Has to be after reviews is defined
         reviews = self.paginate(request, reviews)
 
+        # Fetch the album covers for the whole page at once, rather than one
+        # `{% image %}` at a time (have a look at core/renditions.py)
+        attach_renditions(
+            [album for review in reviews for album in review.albums],
+            'image', 'fill-400x400-c100')
+
         context['reviews'] = reviews
         context['filters'] = filters
         context['is_filtering'] = is_filtering
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.wagtailcore.models import Page
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+
+from monkeywagtail.album.models import (
+    AlbumArtistRelationship, GenreClassAlbumRelationship)
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.genre.models import GenreClass
+from .models import ReviewFacet, ReviewPage
+
+# These signals keep the ReviewFacet table (see review/models.py) in step with
+# the reviews. They're connected in review/apps.py when Django starts.
+# https://docs.djangoproject.com/en/1.9/topics/signals/
+# http://docs.wagtail.io/en/v1.6/reference/signals.html
+
+
+@receiver(page_published, sender=ReviewPage)
+@receiver(page_unpublished, sender=ReviewPage)
+def update_review_facets(sender, instance, **kwargs):
+    ReviewFacet.rebuild_for_review(instance)
+    # Rows for a deleted review go with it, since ReviewFacet.review is a
+    # ForeignKey with on_delete=CASCADE
+
+
+@receiver(post_save, sender=Page)
+def update_moved_review_facets(sender, instance, **kwargs):
+    # When a page is moved Wagtail saves it as a plain `Page` rather than its
+    # specific class, so this is how we catch a review moving to a different
+    # index page. The facet rows point at the ReviewPage, so we rebuild them
+    # from `instance.specific` rather than the plain Page
+    if instance.specific_class is ReviewPage:
+        ReviewFacet.rebuild_for_review(instance.specific)
+
+
+@receiver(post_save, sender=AlbumArtistRelationship)
+@receiver(post_delete, sender=AlbumArtistRelationship)
+@receiver(post_save, sender=GenreClassAlbumRelationship)
+@receiver(post_delete, sender=GenreClassAlbumRelationship)
+def update_album_review_facets(sender, instance, **kwargs):
+    # An album's artists or genres have changed, so every live review of the
+    # album needs its rows rebuilt
+    reviews = ReviewPage.objects.live().filter(
+        review_album_relationship__album_id=instance.page_id)
+    for review in reviews:
+        ReviewFacet.rebuild_for_review(review)
+
+
+@receiver(post_save, sender=Artist)
+def update_artist_facets(sender, instance, **kwargs):
+    ReviewFacet.update_object(ReviewFacet.ARTIST, instance, instance.letter)
+
+
+@receiver(post_save, sender=GenreClass)
+def update_genre_facets(sender, instance, **kwargs):
+    ReviewFacet.update_object(ReviewFacet.GENRE, instance)
+
+
+@receiver(post_save, sender=Author)
+def update_author_facets(sender, instance, **kwargs):
+    ReviewFacet.update_object(ReviewFacet.AUTHOR, instance)
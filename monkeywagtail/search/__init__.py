@@ -0,0 +1 @@
+default_app_config = 'monkeywagtail.search.apps.SearchConfig'
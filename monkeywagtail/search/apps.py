@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    name = 'monkeywagtail.search'
+    label = 'search'
+
+    def ready(self):
+        # Connect the signals that clear the cached search results
+        from . import signals  # noqa
@@ -0,0 +1,243 @@
+import atexit
+import collections
+import contextlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from wagtail.wagtailsearch.models import Query, QueryDailyHits
+from wagtail.wagtailsearch.utils import normalise_query_string
+
+logger = logging.getLogger(__name__)
+
+# SEARCH HITS
+# Wagtail keeps a count of how often each search is made (it's what the
+# 'Promoted search results' admin and `Query.get_most_popular` use). The usual
+# way to record one is
+#
+#   Query.get(search_query).add_hit()
+#
+# which is a read and a couple of writes while the visitor waits for their
+# results. Worse, when lots of people search for the same band at once they
+# all queue up to update the same row.
+#
+# Instead `record_hit` adds one to a counter held in memory and returns
+# straight away. Every SEARCH_HITS_FLUSH_INTERVAL seconds (a background
+# thread keeps time, so this happens even if nobody searches again), or once
+# SEARCH_HITS_FLUSH_SIZE different searches have been counted, the counts are
+# written to the database in a handful of queries from a background thread.
+#
+# If a write fails the counts are put in the cache (Redis in production) and
+# added by whichever worker flushes next. If the cache is failing too they go
+# back in to this worker's counter for its next flush, and whatever is left in
+# memory is written when the worker shuts down. Workers only read or change the counts
+# in the cache while holding a lock (see `pending_lock`), so two of them can't
+# both take the same counts or overwrite each other's. Set
+# SEARCH_HITS_BUFFERED = False to go back to writing each hit as it happens.
+
+PENDING_KEY = 'search:hits:pending'
+PENDING_LOCK_KEY = 'search:hits:pending:lock'
+# How long a worker can hold the lock for. It's only held for a couple of
+# cache calls, so this only matters if a worker dies while holding it
+PENDING_LOCK_TIMEOUT = 10
+
+
+@contextlib.contextmanager
+def pending_lock():
+    # `cache.add` only sets a key that isn't there already, and does it in one
+    # step, so only one worker at a time gets True back
+    # https://docs.djangoproject.com/en/1.9/topics/cache/#basic-usage
+    give_up = time.time() + PENDING_LOCK_TIMEOUT
+    while not cache.add(PENDING_LOCK_KEY, 1, PENDING_LOCK_TIMEOUT):
+        # The lock expires after PENDING_LOCK_TIMEOUT, so if we've waited
+        # that long the cache isn't working
+        if time.time() > give_up:
+            raise RuntimeError("Couldn't lock the pending search hits")
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        cache.delete(PENDING_LOCK_KEY)
+
+
+def take_pending():
+    """
+    Remove and return the counts an earlier flush couldn't write
+    """
+    # Nearly always there's nothing there, which we can check without the lock
+    if not cache.get(PENDING_KEY):
+        return collections.Counter()
+    with pending_lock():
+        pending = cache.get(PENDING_KEY)
+        cache.delete(PENDING_KEY)
+    return collections.Counter(pending or {})
+
+
+def write_hits(counts):
+    """
+    Add `counts`, a mapping of (query string, date) to hits, to Wagtail's
+    QueryDailyHits table
+    """
+    query_strings = set(query_string for query_string, date in counts)
+    queries = dict(Query.objects.filter(
+        query_string__in=query_strings).values_list('query_string', 'id'))
+    for query_string in query_strings - set(queries):
+        # New searches are rare once the site has been running a while, so we
+        # don't mind creating them one at a time
+        queries[query_string] = Query.get(query_string).pk
+
+    with transaction.atomic():
+        # Group the rows by how many hits they're getting so we can update
+        # every row getting (say) 1 more hit with a single query
+        by_hits = collections.defaultdict(list)
+        for (query_string, date), hits in counts.items():
+            by_hits[(hits, date)].append(queries[query_string])
+
+        missing = []
+        for (hits, date), query_ids in by_hits.items():
+            existing = set(QueryDailyHits.objects.filter(
+                query_id__in=query_ids, date=date).values_list(
+                    'query_id', flat=True))
+            QueryDailyHits.objects.filter(
+                query_id__in=existing, date=date).update(hits=F('hits') + hits)
+            missing += [
+                QueryDailyHits(query_id=query_id, date=date, hits=hits)
+                for query_id in query_ids if query_id not in existing]
+
+        try:
+            with transaction.atomic():
+                QueryDailyHits.objects.bulk_create(missing)
+        except IntegrityError:
+            # Another worker added some of the same rows since we looked, so
+            # fall back to adding them one at a time
+            for daily_hits in missing:
+                row, created = QueryDailyHits.objects.get_or_create(
+                    query_id=daily_hits.query_id, date=daily_hits.date,
+                    defaults={'hits': daily_hits.hits})
+                if not created:
+                    QueryDailyHits.objects.filter(pk=row.pk).update(
+                        hits=F('hits') + daily_hits.hits)
+
+
+class HitBuffer(object):
+    def __init__(self, flush_interval=None, flush_size=None, background=True):
+        self.flush_interval = (
+            flush_interval or settings.SEARCH_HITS_FLUSH_INTERVAL)
+        self.flush_size = flush_size or settings.SEARCH_HITS_FLUSH_SIZE
+        self.background = background
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+        self.last_flush = time.time()
+        self.flushing = False
+        self.timer = None
+
+    def add(self, query_string, date=None):
+        if date is None:
+            date = timezone.now().date()
+        key = (normalise_query_string(query_string), date)
+
+        with self.lock:
+            self.counts[key] += 1
+            if self.background and self.timer is None:
+                self.start_timer()
+            due = not self.flushing and (
+                len(self.counts) >= self.flush_size or
+                time.time() - self.last_flush >= self.flush_interval)
+            if due:
+                self.flushing = True
+
+        if due:
+            if self.background:
+                thread = threading.Thread(target=self.flush)
+                thread.daemon = True
+                thread.start()
+            else:
+                self.flush()
+
+    def start_timer(self):
+        # Started by the first search a worker counts, rather than when this
+        # file is imported, so management commands don't get one
+        self.timer = threading.Thread(target=self.flush_regularly)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush_regularly(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                with self.lock:
+                    if self.flushing:
+                        continue
+                    self.flushing = True
+                self.flush()
+            except Exception:
+                # Keep the timer going whatever happens, or the counts would
+                # only be written when someone searches
+                logger.exception("Couldn't flush search hits")
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, collections.Counter()
+            self.last_flush = time.time()
+
+        try:
+            try:
+                # Pick up anything an earlier flush (in any worker) couldn't
+                # write
+                counts.update(take_pending())
+            except Exception:
+                # They stay in the cache for the next flush
+                logger.exception("Couldn't read the pending search hits")
+            if counts:
+                write_hits(counts)
+        except Exception:
+            logger.exception("Couldn't record search hits, trying later")
+            try:
+                self.spill(counts)
+            except Exception:
+                logger.exception(
+                    "Couldn't keep search hits in the cache, keeping them "
+                    "in memory")
+                self.restore(counts)
+        finally:
+            with self.lock:
+                self.flushing = False
+            if self.background:
+                # Threads get their own database connection, so tidy it up
+                connection.close()
+
+    def restore(self, counts):
+        # Put counts we couldn't write or spill back with the ones counted
+        # since, for the next flush
+        with self.lock:
+            self.counts.update(counts)
+
+    def spill(self, counts):
+        with pending_lock():
+            pending = collections.Counter(cache.get(PENDING_KEY) or {})
+            pending.update(counts)
+            cache.set(PENDING_KEY, dict(pending), None)
+
+
+buffer = HitBuffer()
+
+
+@atexit.register
+def flush_on_exit():
+    # Write whatever we've counted when the worker shuts down. This runs in
+    # the main thread, so no need to close the connection
+    if buffer.counts:
+        buffer.background = False
+        buffer.flush()
+
+
+def record_hit(query_string):
+    if getattr(settings, 'SEARCH_HITS_BUFFERED', True):
+        buffer.add(query_string)
+    else:
+        Query.get(query_string).add_hit()
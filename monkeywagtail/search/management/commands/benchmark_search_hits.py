@@ -0,0 +1,81 @@
+import bisect
+import itertools
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from wagtail.wagtailcore.models import Site
+from wagtail.wagtailsearch.models import Query
+
+from monkeywagtail.core.benchmark import percentile
+from monkeywagtail.search import hits
+
+PREFIX = 'benchmark query'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how long the search view takes when hits are written as they "
+        "happen and when they're buffered (see search/hits.py). The searches "
+        "made don't match anything so the timings are mostly the hit "
+        "recording. The Query rows made are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help="How many searches to make at once")
+        parser.add_argument(
+            '--queries', type=int, default=20,
+            help="How many different search terms to use. A few get most "
+                 "of the searches, like on the real site")
+
+    def handle(self, *args, **options):
+        site = Site.objects.get(is_default_site=True)
+        terms = ['%s %d' % (PREFIX, i) for i in range(options['queries'])]
+        # Weight the terms so the first few are searched for far more often
+        weights = list(itertools.accumulate(
+            1.0 / (i + 1) for i in range(len(terms))))
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for name, buffered in (('synchronous', False), ('buffered', True)):
+                with override_settings(SEARCH_HITS_BUFFERED=buffered):
+                    timings = self.run(
+                        site, terms, weights, options['requests'],
+                        options['threads'])
+                self.stdout.write(
+                    "%-12s %5d requests  p50 %7.2fms  p99 %7.2fms" % (
+                        name, len(timings),
+                        percentile(timings, 50) * 1000,
+                        percentile(timings, 99) * 1000))
+
+        hits.buffer.background = False
+        hits.buffer.flush()
+        Query.objects.filter(query_string__startswith=PREFIX).delete()
+
+    def run(self, site, terms, weights, count, threads):
+        timings = []
+
+        def search(requests):
+            client = Client(HTTP_HOST=site.hostname)
+            for i in range(requests):
+                term = terms[bisect.bisect(
+                    weights, random.random() * weights[-1])]
+                start = time.time()
+                client.get('/search/', {'query': term})
+                timings.append(time.time() - start)
+            connection.close()
+
+        workers = [
+            threading.Thread(target=search, args=(count // threads,))
+            for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return timings
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from monkeywagtail.search.service import cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show how often the search page has found its results in the cache. "
+        "The counts are kept in the cache, so they start again if it's cleared."
+    )
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        total = stats['hits'] + stats['misses']
+        self.stdout.write("Hits:     %d" % stats['hits'])
+        self.stdout.write("Misses:   %d" % stats['misses'])
+        if total:
+            self.stdout.write(
+                "Hit rate: %.1f%%" % (100.0 * stats['hits'] / total))
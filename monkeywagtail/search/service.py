@@ -0,0 +1,252 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.paginator import (
+    EmptyPage, Page as PaginatorPage, PageNotAnInteger, Paginator)
+from wagtail.wagtailcore.models import Page
+from wagtail.wagtailsearch.backends import get_search_backend
+
+from monkeywagtail.album.models import Album, album_links
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.core.cache import make_key
+
+# SEARCH SERVICE
+# The search page looks through pages (reviews, features etc) and the
+# artist, album and author snippets, and shows them as one list of results.
+#
+# Searching pages gives us back plain `Page` objects rather than ReviewPages or
+# FeatureContentPages. Asking each one for `.specific` would be a query per
+# result, so once we know which results are on the page we're showing we
+# fetch them by type instead: one query for all the ReviewPages, one for all
+# the FeatureContentPages and so on.
+#
+# Neither Wagtail's database backend nor (in this version) the Elasticsearch
+# backend tells us how well a result scored, only the order. So we give each
+# result a score from its position in its own list, weight it by what kind of
+# thing it is and give a bonus where the title matches what was searched for.
+# That's enough to interleave the lists sensibly. It also means the database
+# backend, which returns results in tree or id order, still puts an artist
+# called "Motörhead" above a review that mentions them.
+#
+# Everything goes through whichever backend is set in WAGTAILSEARCH_BACKENDS,
+# so this works the same with the database backend locally (see
+# settings/dev.py) as with Elasticsearch in production.
+# http://docs.wagtail.io/en/v1.6/topics/search/backends.html
+#
+# Most searches are for the same few hundred band names, so `search_page`
+# keeps the results for each page of each search in the cache. We only store
+# what the results are (their type, id and score) and how many there were,
+# then fetch the objects themselves (one query per type) when we need them.
+# The cache is cleared whenever a page is published or unpublished, or a
+# snippet is saved, by bumping the 'search' generation (see core/cache.py and
+# search/signals.py).
+
+# The snippets we search alongside pages, and how much weight each kind of
+# result carries when we put the lists together
+SNIPPET_MODELS = [Artist, Album, Author]
+
+WEIGHTS = {
+    Page: 1.0,
+    Artist: 1.2,
+    Album: 1.1,
+    Author: 0.8,
+}
+
+
+class SearchResult(object):
+    """
+    One result on the search page, whatever kind of thing it is
+    """
+
+    def __init__(self, obj, score):
+        self.object = obj
+        self.score = score
+        # Set by `link_albums`, since an album's url takes a query to find
+        self.link = None
+
+    @property
+    def title(self):
+        return self.object.title
+
+    @property
+    def url(self):
+        return self.link or self.object.url
+
+    @property
+    def kind(self):
+        return self.object._meta.verbose_name
+
+    @property
+    def description(self):
+        return getattr(self.object, 'search_description', '')
+
+    def __str__(self):
+        return self.title
+
+
+def score(rank, obj, model, query_string):
+    # The first result in a list scores 1, the second 0.5, the third 0.33...
+    value = WEIGHTS.get(model, 1.0) / (rank + 1)
+    title = obj.title.lower()
+    query = query_string.lower()
+    if title == query:
+        value += 2
+    elif query in title:
+        value += 1
+    return value
+
+
+def search(query_string, limit=None):
+    """
+    Search pages and snippets, returning SearchResults best first. Page
+    results are still plain `Page`s at this point, use `hydrate` on the ones
+    you're going to show
+    """
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    backend = get_search_backend()
+
+    sources = [(Page, Page.objects.live())]
+    sources += [(model, model.objects.all()) for model in SNIPPET_MODELS]
+
+    results = []
+    for model, queryset in sources:
+        hits = backend.search(query_string, queryset)[:limit]
+        for rank, obj in enumerate(hits):
+            results.append(
+                SearchResult(obj, score(rank, obj, model, query_string)))
+
+    results.sort(key=lambda result: result.score, reverse=True)
+    return results
+
+
+def hydrate(results):
+    """
+    Swap the plain `Page` objects in `results` for their specific pages (e.g.
+    ReviewPage) with one query per type of page
+    """
+    by_type = {}
+    for result in results:
+        if type(result.object) is Page:
+            by_type.setdefault(
+                result.object.content_type_id, []).append(result)
+
+    for content_type_id, type_results in by_type.items():
+        model = ContentType.objects.get_for_id(
+            content_type_id).model_class()
+        if model is None or model is Page:
+            continue
+        pages = model.objects.in_bulk(
+            [result.object.pk for result in type_results])
+        for result in type_results:
+            result.object = pages.get(result.object.pk, result.object)
+
+    return results
+
+
+def get_results(ids):
+    """
+    Turn a list of (content type id, object id, score) back into SearchResults,
+    fetching each type of object with one query
+    """
+    by_type = {}
+    for content_type_id, pk, score in ids:
+        by_type.setdefault(content_type_id, []).append(pk)
+
+    objects = {}
+    for content_type_id, pks in by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None:
+            for pk, obj in model.objects.in_bulk(pks).items():
+                objects[(content_type_id, pk)] = obj
+
+    # Anything deleted since the results were cached is simply left out
+    return [
+        SearchResult(objects[(content_type_id, pk)], score)
+        for content_type_id, pk, score in ids
+        if (content_type_id, pk) in objects
+    ]
+
+
+def link_albums(results):
+    """
+    Albums link to their review or artist (see `album_links` in
+    album/models.py), which we look up for all the albums in `results` at once
+    """
+    albums = [
+        result.object for result in results
+        if isinstance(result.object, Album)]
+    if albums:
+        links = album_links(albums)
+        for result in results:
+            if isinstance(result.object, Album):
+                result.link = links[result.object.pk]
+    return results
+
+
+def count(name):
+    key = 'search:cache:%s' % name
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def cache_stats():
+    """
+    How often `search_page` found results in the cache, for monitoring
+    """
+    return {
+        name: cache.get('search:cache:%s' % name, 0)
+        for name in ('hits', 'misses')
+    }
+
+
+def search_page(query_string, page_number, per_page=10):
+    """
+    Return a Django paginator Page of SearchResults for one page of a search,
+    from the cache if we can
+    """
+    try:
+        page_number = int(page_number)
+    except (TypeError, ValueError):
+        page_number = 1
+
+    # Both backends ignore case and extra spaces, so "Motörhead" and
+    # " motörhead" can share a cache entry. What's searched for can be any
+    # length and have spaces in, neither of which memcached allows in a key,
+    # so the key has a hash of it instead
+    query = ' '.join(query_string.lower().split())
+    key = make_key(
+        'search', settings.WAGTAILSEARCH_BACKENDS['default']['BACKEND'],
+        hashlib.md5(query.encode('utf-8')).hexdigest(), per_page, page_number)
+    cached = cache.get(key)
+
+    if cached is not None:
+        count('hits')
+        total, page_number, ids = cached
+        results = get_results(ids)
+    else:
+        count('misses')
+        all_results = search(query_string)
+        total = len(all_results)
+        paginator = Paginator(all_results, per_page)
+        try:
+            page = paginator.page(page_number)
+        except (EmptyPage, PageNotAnInteger):
+            page = paginator.page(paginator.num_pages)
+        page_number = page.number
+        results = hydrate(page.object_list)
+        ids = [
+            (ContentType.objects.get_for_model(result.object).pk,
+             result.object.pk, result.score)
+            for result in results
+        ]
+        cache.set(key, (total, page_number, ids))
+
+    link_albums(results)
+
+    # The paginator only needs to know how many results there are to work out
+    # the previous and next pages, so we give it a range rather than results
+    return PaginatorPage(
+        results, page_number, Paginator(range(total), per_page))
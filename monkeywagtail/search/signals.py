@@ -0,0 +1,80 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+
+from monkeywagtail.album.models import Album
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.core.cache import bump_generation
+from monkeywagtail.genre.models import GenreClass
+from monkeywagtail.review.models import ReviewPage
+from monkeywagtail.search import suggest
+
+# These signals clear the cached search results (see search/service.py) and
+# keep the search suggestions (see search/suggest.py) up to date when
+# anything that can be searched for changes. They're connected in
+# search/apps.py when Django starts.
+# https://docs.djangoproject.com/en/1.9/topics/signals/
+# http://docs.wagtail.io/en/v1.6/reference/signals.html
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def clear_search_on_publish(sender, instance, **kwargs):
+    bump_generation('search')
+
+
+@receiver(page_published, sender=ReviewPage)
+@receiver(page_unpublished, sender=ReviewPage)
+def clear_suggestions_on_review_publish(sender, instance, **kwargs):
+    # Album suggestions link to the album's review (see `album_links` in
+    # album/models.py), so every worker rebuilds its list
+    bump_generation('suggest')
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Artist)
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def clear_search_on_snippet_change(sender, instance, **kwargs):
+    bump_generation('search')
+
+
+def update_suggestions(kind, instance, deleted=False):
+    # Update this worker's suggestions straight away, then let the other
+    # workers know they need to rebuild theirs
+    if suggest.index.generation is None:
+        # This worker hasn't built its list yet. Adding to it now would leave
+        # it with just this object and, since we'd then set the generation,
+        # it would never be built. `refresh` will build the whole thing the
+        # first time it's needed
+        bump_generation('suggest')
+        return
+    if deleted:
+        suggest.index.remove(kind, instance.pk)
+    else:
+        suggest.index.update(kind, instance)
+    generation = bump_generation('suggest')
+    # If ours was the only change since this worker's list was last up to
+    # date, it's up to date again. Otherwise something else changed (maybe in
+    # another worker) and it needs a rebuild, so we leave the generation be
+    if generation == suggest.index.generation + 1:
+        suggest.index.generation = generation
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=GenreClass)
+def update_suggestions_on_save(sender, instance, **kwargs):
+    update_suggestions(sender._meta.model_name, instance)
+
+
+@receiver(post_delete, sender=Artist)
+@receiver(post_delete, sender=Album)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=GenreClass)
+def update_suggestions_on_delete(sender, instance, **kwargs):
+    update_suggestions(sender._meta.model_name, instance, deleted=True)
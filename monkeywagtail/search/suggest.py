@@ -0,0 +1,230 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from wagtail.wagtailsearch.models import Query
+from wagtail.wagtailsearch.utils import normalise_query_string
+
+from monkeywagtail.album.models import Album, album_links
+from monkeywagtail.artist.models import Artist
+from monkeywagtail.author.models import Author
+from monkeywagtail.core.cache import get_generation
+from monkeywagtail.genre.models import GenreClass
+
+logger = logging.getLogger(__name__)
+
+# SEARCH SUGGESTIONS
+# As someone types in the search box we suggest artists, albums, genres and
+# authors whose names start with what they've typed so far.
+#
+# Asking the database for `title__istartswith` on every key press would be
+# slow, so each worker keeps every title in memory in a sorted list. Because
+# the list is sorted, everything starting with "mot" sits together and
+# `bisect` can find where that run starts (and ends) without looking at the
+# rest of the list.
+# https://docs.python.org/3/library/bisect.html
+#
+# Titles are normalised the same way Wagtail normalises searches (lower case,
+# no punctuation) so "AC/DC" is found by "acdc" and we can weight each title
+# by how often it has been searched for (Wagtail's Query hit counts).
+#
+# The list is built the first time a worker is asked for suggestions. When an
+# artist, album, genre or author is saved or deleted search/signals.py updates
+# the list in that worker (if it has built one yet) and bumps the 'suggest'
+# generation (see core/cache.py). Every other worker checks the generation
+# every SEARCH_SUGGEST_CHECK_INTERVAL seconds and rebuilds its list if it's
+# changed. Publishing a review bumps it too, since albums link to their
+# review.
+#
+# Building the list reads every artist, album, genre and author, so it's done
+# in a background thread rather than while a visitor waits. Until the first
+# build finishes a worker has no suggestions to give, and while a rebuild
+# runs it carries on using the list it has.
+
+# How many albums to work out the links for at a time (see `album_links` in
+# album/models.py), so we don't send the database a list of every album id
+ALBUM_LINKS_CHUNK_SIZE = 500
+
+MODELS = [
+    ('artist', Artist),
+    ('album', Album),
+    ('genre', GenreClass),
+    ('author', Author),
+]
+
+
+def normalise(title):
+    return normalise_query_string(title)
+
+
+def search_hits():
+    """
+    How many times each query has been searched for, for every query that has
+    been searched for at least once
+    """
+    return dict(
+        Query.objects.annotate(total=Sum('daily_hits__hits')).filter(
+            total__gt=0).values_list('query_string', 'total'))
+
+
+class Suggestion(object):
+    def __init__(self, kind, obj, hits, url=None):
+        self.kind = kind
+        self.pk = obj.pk
+        self.title = obj.title
+        # Albums link to their review or artist, which takes a query to work
+        # out, so `build` passes in the urls for all of them at once
+        self.url = url or obj.url
+        self.hits = hits
+
+    def as_dict(self):
+        return {'title': self.title, 'kind': self.kind, 'url': self.url}
+
+
+class SuggestionIndex(object):
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        self.by_object = {}
+        self.lock = threading.Lock()
+        self.generation = None
+        self.checked = 0
+        self.building = False
+
+    def index_keys(self, title):
+        key = normalise(title)
+        keys = [key]
+        # Let "beatles" find "The Beatles"
+        if key.startswith('the '):
+            keys.append(key[4:])
+        return keys
+
+    def build(self):
+        hits = search_hits()
+        rows = []
+        by_object = {}
+        for kind, model in MODELS:
+            objects = list(model.objects.only('pk', 'title', 'slug'))
+            links = {}
+            if model is Album:
+                for start in range(0, len(objects), ALBUM_LINKS_CHUNK_SIZE):
+                    links.update(album_links(
+                        objects[start:start + ALBUM_LINKS_CHUNK_SIZE]))
+            for obj in objects:
+                if not obj.title:
+                    continue
+                suggestion = Suggestion(
+                    kind, obj, hits.get(normalise(obj.title), 0),
+                    links.get(obj.pk))
+                by_object[(kind, obj.pk)] = suggestion
+                rows += [(key, suggestion) for key in self.index_keys(
+                    obj.title)]
+
+        rows.sort(key=lambda row: row[0])
+        with self.lock:
+            self.keys = [key for key, suggestion in rows]
+            self.entries = [suggestion for key, suggestion in rows]
+            self.by_object = by_object
+
+    def refresh(self):
+        # Rebuild if anything has changed in another worker since we last
+        # looked. We only check every few seconds so it costs next to nothing
+        now = time.time()
+        if now - self.checked < settings.SEARCH_SUGGEST_CHECK_INTERVAL:
+            return
+        self.checked = now
+        generation = get_generation('suggest')
+        if generation != self.generation:
+            self.start_build(generation)
+
+    def start_build(self, generation):
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        thread = threading.Thread(
+            target=self.build_in_background, args=(generation,))
+        thread.daemon = True
+        thread.start()
+
+    def build_in_background(self, generation):
+        try:
+            self.build()
+        except Exception:
+            # We'll try again next time we check
+            logger.exception("Couldn't build the search suggestions")
+        else:
+            # Only once we've built the list is it up to date with
+            # `generation`. If anything changed while we were building, the
+            # generation has moved on and we'll build again next check
+            self.generation = generation
+        finally:
+            with self.lock:
+                self.building = False
+            # Threads get their own database connection, so tidy it up
+            connection.close()
+
+    def remove(self, kind, pk):
+        with self.lock:
+            suggestion = self.by_object.pop((kind, pk), None)
+            if suggestion is None:
+                return
+            for key in self.index_keys(suggestion.title):
+                start = bisect.bisect_left(self.keys, key)
+                end = bisect.bisect_right(self.keys, key)
+                for i in range(start, end):
+                    if self.entries[i] is suggestion:
+                        del self.keys[i]
+                        del self.entries[i]
+                        break
+
+    def update(self, kind, obj):
+        """
+        Add (or re-add) a single object to the index, e.g. when it's saved
+        """
+        self.remove(kind, obj.pk)
+        if not obj.title:
+            return
+        hits = Query.objects.filter(
+            query_string=normalise(obj.title)).aggregate(
+                total=Sum('daily_hits__hits'))['total'] or 0
+        suggestion = Suggestion(kind, obj, hits)
+        with self.lock:
+            self.by_object[(kind, obj.pk)] = suggestion
+            for key in self.index_keys(obj.title):
+                i = bisect.bisect_right(self.keys, key)
+                self.keys.insert(i, key)
+                self.entries.insert(i, suggestion)
+
+    def suggest(self, prefix, limit=None):
+        limit = limit or settings.SEARCH_SUGGEST_LIMIT
+        prefix = normalise(prefix)
+        if not prefix:
+            return []
+
+        with self.lock:
+            # Every key starting with `prefix` sorts between `prefix` itself
+            # and `prefix` followed by the highest possible character
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_right(self.keys, prefix + '\U0010ffff')
+            matches = self.entries[start:end]
+
+        # An object can match more than once (e.g. "the beatles" and
+        # "beatles") so we only keep each one once
+        unique = {(s.kind, s.pk): s for s in matches}.values()
+        # Most searched for first, then shortest (closest to what's typed)
+        return heapq.nsmallest(
+            limit, unique, key=lambda s: (-s.hits, len(s.title), s.title))
+
+
+index = SuggestionIndex()
+
+
+def suggest(prefix, limit=None):
+    index.refresh()
+    return index.suggest(prefix, limit)
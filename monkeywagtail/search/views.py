@@ -1,8 +1,9 @@
+from django.http import JsonResponse
 from django.shortcuts import render
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
-from wagtail.wagtailcore.models import Page
-from wagtail.wagtailsearch.models import Query
+from monkeywagtail.search.hits import record_hit
+from monkeywagtail.search.service import search_page
+from monkeywagtail.search.suggest import suggest as get_suggestions
 
 
 def search(request):
@@ -10,25 +11,29 @@ def search(request):
     page = request.GET.get('page', 1)
 
     # Search
+    # Pages and snippets are searched together, and each page of results is
+    # cached. Have a look at search/service.py
     if search_query:
-        search_results = Page.objects.live().search(search_query)
-        query = Query.get(search_query)
+        search_results = search_page(search_query, page)
 
-        # Record hit
-        query.add_hit()
+        # Record hit. This is counted in memory and written to the database
+        # later, have a look at search/hits.py
+        record_hit(search_query)
     else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        search_results = []
 
     return render(request, 'search/search.html', {
         'search_query': search_query,
         'search_results': search_results,
     })
+
+
+def suggest(request):
+    # Search as you type. Returns artists, albums, genres and authors whose
+    # names start with `?q=` as JSON e.g.
+    # {"suggestions": [{"title": "Motörhead", "kind": "artist", "url": ...}]}
+    # Have a look at search/suggest.py
+    suggestions = get_suggestions(request.GET.get('q', ''))
+    return JsonResponse({
+        'suggestions': [suggestion.as_dict() for suggestion in suggestions],
+    })
@@ -72,6 +72,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE_CLASSES = [
+    # Counts queries and times each request. Have a look at
+    # core/instrumentation.py
+    'monkeywagtail.core.middleware.InstrumentationMiddleware',
+
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,13 +86,19 @@ MIDDLEWARE_CLASSES = [
 
     'wagtail.wagtailcore.middleware.SiteMiddleware',
     'wagtail.wagtailredirects.middleware.RedirectMiddleware',
+
+    # Serves cached copies of pages to visitors who aren't logged in. Have a
+    # look at core/pagecache.py
+    'monkeywagtail.core.middleware.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'monkeywagtail.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's template backend, plus timing for the request
+        # instrumentation. Have a look at core/template_backends.py
+        'BACKEND': 'monkeywagtail.core.template_backends.TimedDjangoTemplates',
         'DIRS': [
             os.path.join(PROJECT_DIR, 'templates'),
         ],
@@ -202,11 +212,83 @@ WAGTAILSEARCH_BACKENDS = {
     },
 }
 
+# The most results we take from each of pages, artists, albums and authors
+# before merging them on the search page. Have a look at search/service.py
+
+SEARCH_RESULTS_LIMIT = 100
+
+# Searches are counted in memory and written to the database in batches.
+# Counts are written every SEARCH_HITS_FLUSH_INTERVAL seconds or once
+# SEARCH_HITS_FLUSH_SIZE different searches have been counted, whichever comes
+# first. Have a look at search/hits.py
+
+SEARCH_HITS_BUFFERED = True
+SEARCH_HITS_FLUSH_INTERVAL = 30
+SEARCH_HITS_FLUSH_SIZE = 100
+
+# Search suggestions (search/suggest.py). How many to return, and how often
+# (in seconds) each worker checks whether it needs to rebuild its list
+
+SEARCH_SUGGEST_LIMIT = 8
+SEARCH_SUGGEST_CHECK_INTERVAL = 10
+
 
 # Wagtail settings
 
 WAGTAIL_SITE_NAME = "monkey"
 
 # Pagination
+# The number of items to show per page on listings. Have a look at
+# core/pagination.py for how this is used
 
 DEFAULT_PER_PAGE = 2
+
+# Set to True to use keyset (`?after=`) pagination rather than page numbers.
+# Deep pages cost the same as the first page but there's no "page 3 of 10"
+
+CURSOR_PAGINATION = False
+
+# How many levels of pages below the site root the `menu_tree` template tag
+# includes. Have a look at core/menus.py
+
+MENU_DEPTH = 2
+
+# Make the renditions an image needs as soon as it's uploaded, rather than
+# when it's first shown. Have a look at core/renditions.py
+
+PREGENERATE_RENDITIONS = True
+
+# Keep a copy of every page sent to visitors who aren't logged in, for
+# PAGE_CACHE_TIMEOUT seconds or until something on it is published. Have a
+# look at core/pagecache.py
+
+PAGE_CACHE = True
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Where `./manage.py export_static_site` writes the static copy of the site,
+# and whether wsgi.py serves pages from it. Have a look at core/export.py
+
+STATIC_SITE_ROOT = os.path.join(BASE_DIR, 'static_site')
+SERVE_STATIC_SITE = False
+
+# Log the queries, SQL time, template time and cache hits for each request,
+# and warn about views that run more queries than their budget (or raise
+# QueryBudgetExceeded with QUERY_BUDGET_RAISE). Views are Wagtail page types
+# or '<app>.<view function>'. Have a look at core/instrumentation.py. It
+# counts queries with the slower cursor Django uses when DEBUG is on, so it's
+# off unless you switch it on (production.py reads it from the environment)
+
+REQUEST_INSTRUMENTATION = False
+QUERY_BUDGET_DEFAULT = 50
+QUERY_BUDGETS = {
+    'HomePage': 30,
+    'ReviewIndexPage': 30,
+    'ReviewPage': 30,
+    'FeatureIndexPage': 30,
+    'FeatureContentPage': 30,
+    'artist.artist_detail': 30,
+    'artist.artist_list': 10,
+    'author.author_detail': 15,
+    'genre.genre_detail': 10,
+}
+QUERY_BUDGET_RAISE = False
@@ -14,6 +14,19 @@ BASE_URL = 'http://localhost:8000'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Search with the database rather than Elasticsearch, so search works (and
+# can be tried out) without having to run Elasticsearch locally
+
+WAGTAILSEARCH_BACKENDS = {
+    'default': {
+        'BACKEND': 'wagtail.wagtailsearch.backends.db',
+    },
+}
+
+# Always render pages afresh while we're working on them
+
+PAGE_CACHE = False
+
 
 try:
     from .local import *
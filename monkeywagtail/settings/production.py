@@ -57,6 +57,12 @@ if 'CACHE_PURGE_URL' in env:
         },
     }
 
+if 'DEFAULT_PER_PAGE' in env:
+    DEFAULT_PER_PAGE = int(env['DEFAULT_PER_PAGE'])
+
+if 'CURSOR_PAGINATION' in env:
+    CURSOR_PAGINATION = env['CURSOR_PAGINATION'].lower() in ('1', 'true', 'yes')
+
 if 'STATIC_URL' in env:
     STATIC_URL = env['STATIC_URL']
 
@@ -69,6 +75,15 @@ if 'MEDIA_URL' in env:
 if 'MEDIA_DIR' in env:
     MEDIA_ROOT = env['MEDIA_DIR']
 
+if 'STATIC_SITE_DIR' in env:
+    STATIC_SITE_ROOT = env['STATIC_SITE_DIR']
+
+if 'REQUEST_INSTRUMENTATION' in env:
+    REQUEST_INSTRUMENTATION = env['REQUEST_INSTRUMENTATION'].lower() in ('1', 'true', 'yes')
+
+if 'SERVE_STATIC_SITE' in env:
+    SERVE_STATIC_SITE = env['SERVE_STATIC_SITE'].lower() in ('1', 'true', 'yes')
+
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto.S3BotoStorage'
 AWS_ACCESS_KEY_ID = env['BUCKETEER_AWS_ACCESS_KEY_ID']
 AWS_SECRET_ACCESS_KEY = env['BUCKETEER_AWS_SECRET_ACCESS_KEY']
@@ -150,8 +165,8 @@ LOGGING = {
         },
     },
     'formatters': {
-        'default': {
-            'verbose': '[%(asctime)s] (%(process)d/%(thread)d) %(name)s %(levelname)s: %(message)s'
+        'verbose': {
+            'format': '[%(asctime)s] (%(process)d/%(thread)d) %(name)s %(levelname)s: %(message)s'
         }
     },
     'loggers': {
@@ -190,9 +205,12 @@ if 'LOG_DIR' in env:
         'class':        'cloghandler.ConcurrentRotatingFileHandler',
         'filename':     os.path.join(env['LOG_DIR'], 'monkeywagtail.log'),
         'maxBytes':     5242880,  # 5MB
-        'backupCount':  5
+        'backupCount':  5,
+        'formatter':    'verbose',
     }
-    LOGGING['loggers']['wagtail']['handlers'].append('monkeywagtail_file')
+    # Including the request instrumentation (see core/instrumentation.py),
+    # one line of JSON per request
+    LOGGING['loggers']['monkeywagtail']['handlers'].append('monkeywagtail_file')
 
     # Wagtail log
     LOGGING['handlers']['wagtail_file'] = {
@@ -200,7 +218,8 @@ if 'LOG_DIR' in env:
         'class':        'cloghandler.ConcurrentRotatingFileHandler',
         'filename':     os.path.join(env['LOG_DIR'], 'wagtail.log'),
         'maxBytes':     5242880,  # 5MB
-        'backupCount':  5
+        'backupCount':  5,
+        'formatter':    'verbose',
     }
     LOGGING['loggers']['wagtail']['handlers'].append('wagtail_file')
 
@@ -210,7 +229,8 @@ if 'LOG_DIR' in env:
         'class':        'cloghandler.ConcurrentRotatingFileHandler',
         'filename':     os.path.join(env['LOG_DIR'], 'error.log'),
         'maxBytes':     5242880,  # 5MB
-        'backupCount':  5
+        'backupCount':  5,
+        'formatter':    'verbose',
     }
     LOGGING['loggers']['django.request']['handlers'].append('errors_file')
     LOGGING['loggers']['django.security']['handlers'].append('errors_file')
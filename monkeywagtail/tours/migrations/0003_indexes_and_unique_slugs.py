@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 09:05
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# A copy of `delete_duplicate_rows` from core/duplicates.py as it was when
+# this migration was written. Migrations keep their own copy of any code they
+# need, so they still do the same thing if the original changes later
+def delete_duplicate_rows(model, fields):
+    seen = set()
+    duplicates = []
+    for row in model.objects.order_by('pk').values_list('pk', *fields):
+        if row[1:] in seen:
+            duplicates.append(row[0])
+        seen.add(row[1:])
+    model.objects.filter(pk__in=duplicates).delete()
+    return len(duplicates)
+
+
+def delete_duplicate_relationships(apps, schema_editor):
+    # Each page can only be linked to an artist, album etc once from now on,
+    # so repeats are removed first (see core/duplicates.py)
+    delete_duplicate_rows(
+        apps.get_model('tours', 'TourAlbumRelationship'), ['page', 'albums'])
+    delete_duplicate_rows(
+        apps.get_model('tours', 'TourArtistRelationship'), ['page', 'artists'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0002_auto_20170202_2142'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_relationships, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='touralbumrelationship',
+            unique_together=set([('page', 'albums')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tourartistrelationship',
+            unique_together=set([('page', 'artists')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='touralbumrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='tourartistrelationship',
+            index_together=set([('page', 'sort_order')]),
+        ),
+    ]
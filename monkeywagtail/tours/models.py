@@ -12,6 +12,9 @@ from wagtail.wagtailadmin.edit_handlers import (
         ObjectList)
 from wagtail.wagtailsnippets.edit_handlers import SnippetChooserPanel
 from modelcluster.fields import ParentalKey
+from monkeywagtail.core.memoize import (
+    CachedRelationsMixin, cached_relation, related_objects)
+from monkeywagtail.core.models import DistinctRelationshipsMixin
 
 COUNTRY_CHOICES = (
     ('austria', 'Austria'),
@@ -90,6 +93,10 @@ class TourAlbumRelationship(Orderable, models.Model):
         SnippetChooserPanel('albums')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'albums')]
+        index_together = [('page', 'sort_order')]
+
 
 class TourArtistRelationship(Orderable, models.Model):
     page = ParentalKey(
@@ -106,8 +113,12 @@ class TourArtistRelationship(Orderable, models.Model):
         SnippetChooserPanel('artists')
     ]
 
+    class Meta(Orderable.Meta):
+        unique_together = [('page', 'artists')]
+        index_together = [('page', 'sort_order')]
+
 
-class TourPage(Page):
+class TourPage(DistinctRelationshipsMixin, CachedRelationsMixin, Page):
 
     search_fields = Page.search_fields + [
         index.SearchField('title'),
@@ -158,19 +169,15 @@ class TourPage(Page):
     ])
 
     # We iterate within the model over the artists, genres and subgenres
-    # so they can be accessible to the template via a for loop
+    # so they can be accessible to the template via a for loop.
+    # Each is only fetched once per page, have a look at core/memoize.py
+    @cached_relation
     def artists(self):
-        artists = [
-            n.artists for n in self.tour_artist_relationship.all()
-        ]
-        return artists
+        return related_objects(self, 'tour_artist_relationship', 'artists')
 
+    @cached_relation
     def albums(self):
-        albums = [
-             n.albums for n in self.tour_album_relationship.all()
-        ]
-
-        return albums
+        return related_objects(self, 'tour_album_relationship', 'albums')
 
     @property
     def album_image(self):
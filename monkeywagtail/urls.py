@@ -17,6 +17,7 @@ urlpatterns = [
     url(r'^admin/', include(wagtailadmin_urls)),
     url(r'^documents/', include(wagtaildocs_urls)),
     url(r'^search/$', search_views.search, name='search'),
+    url(r'^search/suggest/$', search_views.suggest, name='search_suggest'),
     url(r'', include(artist_urls)),
     url(r'', include(genre_urls)),
     url(r'', include(author_urls)),
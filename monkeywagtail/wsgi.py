@@ -11,9 +11,22 @@ import os
 
 from whitenoise.django import DjangoWhiteNoise
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monkeywagtail.settings.production")
 
-application = DjangoWhiteNoise(get_wsgi_application())
+application = get_wsgi_application()
+
+# Serve the pages made by `./manage.py export_static_site` straight from disk
+# (see core/export.py), picking up each new export as it finishes. Pages that
+# weren't exported, and the admin, still go to Django. Have a look at
+# core/static_site.py
+if settings.SERVE_STATIC_SITE:
+    # Imported once Django's set up, as it uses our models
+    from monkeywagtail.core.static_site import StaticSiteWhiteNoise
+    application = StaticSiteWhiteNoise(
+        application, settings.STATIC_SITE_ROOT)
+else:
+    application = DjangoWhiteNoise(application)